@@ -0,0 +1,100 @@
+"""Shared Gemini client for the AI routes.
+
+Created once per process: the SDK is configured a single time, one
+`GenerativeModel` is kept per system prompt, and generation uses the SDK's
+async API so a 5-20 s call never blocks the event loop. A global semaphore
+bounds concurrent generations and every call has a timeout that covers both
+waiting for a slot and the generation itself.
+
+`stream` yields text chunks as the model produces them. Closing or cancelling
+the consumer (e.g. when an SSE client disconnects) stops the upstream
+generation and frees the slot.
+"""
+import asyncio
+from typing import AsyncIterator, Optional
+
+
+class AIUnavailable(Exception):
+    """Raised when no Gemini API key is configured."""
+
+
+class AITimeout(Exception):
+    """Raised when a generation does not finish within its timeout."""
+
+
+class AIGateway:
+    def __init__(self, api_key: Optional[str], model_name: str, max_concurrency: int, timeout: float, genai=None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._models = {}
+        self._genai = genai
+        if api_key:
+            if self._genai is None:
+                import google.generativeai as genai
+                self._genai = genai
+            self._genai.configure(api_key=api_key)
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def model(self, system_instruction: str):
+        """The configured model for a system prompt, built on first use."""
+        if not self.available:
+            raise AIUnavailable("GEMINI_API_KEY is not configured")
+        model = self._models.get(system_instruction)
+        if model is None:
+            model = self._genai.GenerativeModel(model_name=self.model_name, system_instruction=system_instruction)
+            self._models[system_instruction] = model
+        return model
+
+    async def _acquire(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise AITimeout(f"No AI slot free within {timeout}s")
+
+    async def generate(self, prompt: str, system_instruction: str, timeout: Optional[float] = None) -> str:
+        """Generate a full response, waiting at most `timeout` seconds in total."""
+        model = self.model(system_instruction)
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout
+        await self._acquire(timeout)
+        try:
+            response = await asyncio.wait_for(model.generate_content_async(prompt), max(deadline - loop.time(), 0))
+            return response.text
+        except asyncio.TimeoutError:
+            raise AITimeout(f"AI generation timed out after {timeout}s")
+        finally:
+            self._semaphore.release()
+
+    async def stream(self, prompt: str, system_instruction: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield response text chunks as they arrive; the whole stream must finish within `timeout` seconds."""
+        model = self.model(system_instruction)
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout
+        await self._acquire(timeout)
+        chunks = None
+        try:
+            response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), max(deadline - loop.time(), 0))
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    return
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError:
+            raise AITimeout(f"AI generation timed out after {timeout}s")
+        finally:
+            if chunks is not None and hasattr(chunks, "aclose"):
+                try:
+                    await chunks.aclose()
+                except Exception:
+                    pass
+            self._semaphore.release()
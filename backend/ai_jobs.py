@@ -0,0 +1,178 @@
+"""In-process queue for AI generations submitted as jobs.
+
+`submit` records a job in the `ai_jobs` collection and hands it to a fixed
+pool of worker tasks; clients poll the job document (optionally long-polling
+with `wait`) until it is `done` or `failed`. Job documents expire through a
+TTL index on `expires_at`.
+
+Requests with the same dedup key (startup, prompt type and data fingerprint)
+collapse into one job while it is queued or running: in-process through the
+`_inflight` map, and across workers by reusing a recent active job found in
+Mongo. A job that stays active longer than `stale_after` (e.g. its worker
+process died) is reported as failed and no longer absorbs new requests.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    """Raised when too many jobs are waiting for a worker."""
+
+
+class JobFailed(Exception):
+    """Raise from a job function to record a failure with an HTTP-style status."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class AIJobQueue:
+    def __init__(self, collection: Callable, workers: int, max_pending: int, ttl: int, stale_after: float):
+        self._collection = collection  # called on every use, so tests can swap the database
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+        self._inflight = {}  # dedup key -> job document, while queued or running here
+        self._reserved = 0  # queue slots held by submissions still inserting their job document
+        self._finished = {}  # job id -> asyncio.Event, while the job is in this process
+
+    def start(self):
+        """Start the worker tasks on the running loop (no-op if already running)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not all(t.done() for t in self._tasks):
+            return
+        self._loop = loop
+        self._inflight.clear()
+        self._finished.clear()
+        self._reserved = 0
+        self._queue = asyncio.Queue(self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._inflight.clear()
+        self._finished.clear()
+
+    async def submit(self, startup_id: str, kind: str, fingerprint: str, func: Callable[[], Awaitable[dict]]) -> tuple:
+        """Queue `func` as a job, or join the active job for the same key. Returns (job, deduplicated)."""
+        self.start()
+        dedup_key = f"{startup_id}:{kind}:{fingerprint}"
+        if dedup_key in self._inflight:
+            return dict(self._inflight[dedup_key]), True
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)).isoformat()
+        job = await self._collection().find_one(
+            {"dedup_key": dedup_key, "status": {"$in": list(ACTIVE)}, "created_at": {"$gt": cutoff}},
+            {"_id": 0, "expires_at": 0},
+        )
+        if dedup_key in self._inflight:
+            # Queued by another request while we were looking
+            return dict(self._inflight[dedup_key]), True
+        if job:
+            return job, True
+        if self.max_pending > 0 and self._queue.qsize() + self._reserved >= self.max_pending:
+            raise QueueFull("Too many AI jobs queued, try again shortly")
+
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": str(uuid.uuid4()),
+            "startup_id": startup_id,
+            "kind": kind,
+            "dedup_key": dedup_key,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": now.isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._inflight[dedup_key] = job
+        self._finished[job["id"]] = asyncio.Event()
+        # Hold a queue slot across the insert so put_nowait below always has room
+        self._reserved += 1
+        try:
+            await self._collection().insert_one({**job, "expires_at": now + timedelta(seconds=self.ttl)})
+        except BaseException:
+            del self._inflight[dedup_key]
+            self._finished.pop(job["id"]).set()
+            raise
+        finally:
+            self._reserved -= 1
+        self._queue.put_nowait((job, func))
+        return dict(job), False
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = await self._collection().find_one({"id": job_id}, {"_id": 0, "expires_at": 0})
+        if job and job["status"] in ACTIVE and job_id not in self._finished:
+            cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)).isoformat()
+            if job["created_at"] < cutoff:
+                job.update(status="failed", error={"status": 500, "detail": "Job was lost before it finished"})
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """The job, once finished or after `timeout` seconds, whichever comes first."""
+        finished = self._finished.get(job_id)
+        if finished is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return await self.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job, func = await self._queue.get()
+            try:
+                await self._run(job, func)
+            except Exception as e:
+                logger.error(f"AI job {job['id']} bookkeeping failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict, func):
+        jobs = self._collection()
+        job.update(status="running", started_at=datetime.now(timezone.utc).isoformat())
+        update = {}
+        try:
+            await jobs.update_one({"id": job["id"]}, {"$set": {"status": "running", "started_at": job["started_at"]}})
+            update.update(status="done", result=await func())
+        except JobFailed as e:
+            update.update(status="failed", error={"status": e.status, "detail": e.detail})
+        except asyncio.CancelledError:
+            update.update(status="failed", error={"status": 503, "detail": "Server stopped before the job finished"})
+            raise
+        except Exception as e:
+            logger.error(f"AI job {job['id']} failed: {e}")
+            update.update(status="failed", error={"status": 500, "detail": str(e)})
+        finally:
+            update["finished_at"] = datetime.now(timezone.utc).isoformat()
+            try:
+                await jobs.update_one({"id": job["id"]}, {"$set": update})
+            finally:
+                if self._inflight.get(job["dedup_key"]) is job:
+                    del self._inflight[job["dedup_key"]]
+                finished = self._finished.pop(job["id"], None)
+                if finished is not None:
+                    finished.set()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len([t for t in self._tasks if not t.done()]),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "active": len(self._inflight),
+        }
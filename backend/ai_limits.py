@@ -0,0 +1,185 @@
+"""Per-startup AI rate limits and monthly token budgets, by subscription plan.
+
+Each startup has a token bucket (`ai_rate_buckets`: `capacity` requests,
+refilled at `per_minute`) and a monthly budget of model tokens (`ai_usage`,
+one document per startup and month). Both live in Mongo so every worker
+shares them:
+
+- the bucket is updated with a compare-and-swap on (tokens, updated_at), so two
+  workers can never spend the same request
+- usage is recorded with an atomic `$inc` once a generation finishes
+
+A refusal is remembered in-process: until the retry time (or the end of the
+exhausted month) further requests for that startup are rejected from memory
+without touching Mongo, so a noisy workspace costs no database round trips.
+Plans are cached briefly as well; all three are bounded TTL caches.
+
+Callers report the tokens a generation used (server.py estimates them from
+the prompt and response text).
+"""
+import asyncio
+import calendar
+import time
+from datetime import datetime, timezone
+
+from cachetools import TTLCache
+from pymongo.errors import DuplicateKeyError
+
+PLAN_LIMITS = {
+    "free": {"per_minute": 5, "capacity": 5, "monthly_tokens": 200_000},
+    "pro": {"per_minute": 20, "capacity": 30, "monthly_tokens": 2_000_000},
+    "scale": {"per_minute": 60, "capacity": 120, "monthly_tokens": 20_000_000},
+}
+DEFAULT_PLAN = "free"
+CAS_ATTEMPTS = 5
+MAX_TRACKED_STARTUPS = 10000
+
+
+class RateLimited(Exception):
+    """Raised when a startup is over its request rate or monthly token budget."""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def month_key(now: float) -> str:
+    return datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m")
+
+
+def seconds_to_next_month(now: float) -> float:
+    dt = datetime.fromtimestamp(now, timezone.utc)
+    days = calendar.monthrange(dt.year, dt.month)[1]
+    start = datetime(dt.year, dt.month, 1, tzinfo=timezone.utc).timestamp()
+    return start + days * 86400 - now
+
+
+class AILimiter:
+    def __init__(self, db, plan_cache_ttl: float = 60, clock=time.time):
+        self._db = db  # called on every use, so tests can swap the database
+        self.clock = clock
+        self._plans = TTLCache(maxsize=MAX_TRACKED_STARTUPS, ttl=plan_cache_ttl)
+        # Entries outlive their use (a rate-limit wait is at most a minute or so, a spent
+        # budget is re-checked against Mongo after a day), so both are bounded caches
+        self._blocked_until = TTLCache(maxsize=MAX_TRACKED_STARTUPS, ttl=300, timer=clock)  # startup_id -> (retry at, reason)
+        self._exhausted = TTLCache(maxsize=MAX_TRACKED_STARTUPS, ttl=86400, timer=clock)  # startup_id -> month whose budget is spent
+        self.counters = {"allowed": 0, "rate_limited": 0, "budget_exhausted": 0, "fast_path_rejections": 0, "tokens_recorded": 0}
+
+    async def plan(self, startup_id: str) -> str:
+        plan = self._plans.get(startup_id)
+        if plan is None:
+            startup = await self._db().startups.find_one({"id": startup_id}, {"_id": 0, "subscription_plan": 1})
+            plan = (startup or {}).get("subscription_plan") or DEFAULT_PLAN
+            if plan not in PLAN_LIMITS:
+                plan = DEFAULT_PLAN
+            self._plans[startup_id] = plan
+        return plan
+
+    async def plan_changed(self, startup_id: str):
+        """Drop cached plan and rejection state and start a full bucket at the new plan's size."""
+        self._plans.pop(startup_id, None)
+        self._blocked_until.pop(startup_id, None)
+        self._exhausted.pop(startup_id, None)
+        await self._db().ai_rate_buckets.delete_one({"startup_id": startup_id})
+
+    def check_memory(self, startup_id: str):
+        """Reject from memory if this startup was recently refused; no I/O."""
+        now = self.clock()
+        blocked = self._blocked_until.get(startup_id)
+        if blocked:
+            if blocked[0] > now:
+                self.counters["fast_path_rejections"] += 1
+                raise RateLimited(blocked[1], blocked[0] - now)
+            self._blocked_until.pop(startup_id, None)
+        if self._exhausted.get(startup_id) == month_key(now):
+            self.counters["fast_path_rejections"] += 1
+            raise RateLimited("Monthly AI token budget exhausted", seconds_to_next_month(now))
+
+    async def acquire(self, startup_id: str):
+        """Spend one request from the startup's bucket, or raise RateLimited."""
+        self.check_memory(startup_id)
+        limits = PLAN_LIMITS[await self.plan(startup_id)]
+        now = self.clock()
+        usage = await self._db().ai_usage.find_one({"startup_id": startup_id, "month": month_key(now)}, {"_id": 0, "tokens": 1})
+        if usage and usage.get("tokens", 0) >= limits["monthly_tokens"]:
+            self._exhausted[startup_id] = month_key(now)
+            self.counters["budget_exhausted"] += 1
+            raise RateLimited("Monthly AI token budget exhausted", seconds_to_next_month(now))
+        wait = await self._take(startup_id, limits)
+        if wait > 0:
+            detail = f"AI rate limit reached ({limits['per_minute']} requests per minute)"
+            self._blocked_until[startup_id] = (self.clock() + wait, detail)
+            self.counters["rate_limited"] += 1
+            raise RateLimited(detail, wait)
+        self.counters["allowed"] += 1
+
+    async def _take(self, startup_id: str, limits: dict) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until one is available."""
+        buckets = self._db().ai_rate_buckets
+        rate = limits["per_minute"] / 60.0
+        capacity = float(limits["capacity"])
+        for _ in range(CAS_ATTEMPTS):
+            now = self.clock()
+            doc = await buckets.find_one({"startup_id": startup_id}, {"_id": 0})
+            if doc is None:
+                try:
+                    await buckets.insert_one({"startup_id": startup_id, "tokens": capacity - 1, "updated_at": now})
+                    return 0
+                except DuplicateKeyError:
+                    continue
+            tokens = min(capacity, doc["tokens"] + max(now - doc["updated_at"], 0) * rate)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            result = await buckets.update_one(
+                {"startup_id": startup_id, "tokens": doc["tokens"], "updated_at": doc["updated_at"]},
+                {"$set": {"tokens": tokens - 1, "updated_at": now}},
+            )
+            if result.modified_count:
+                return 0
+            await asyncio.sleep(0)
+        # Persistent contention on one startup's bucket: back off briefly
+        return 1 / rate
+
+    async def record(self, startup_id: str, tokens: int):
+        """Add a finished generation's tokens to this month's usage."""
+        now = self.clock()
+        await self._db().ai_usage.update_one(
+            {"startup_id": startup_id, "month": month_key(now)},
+            {"$inc": {"tokens": tokens, "requests": 1}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+        self.counters["tokens_recorded"] += tokens
+
+    async def usage(self, startup_id: str) -> dict:
+        plan = await self.plan(startup_id)
+        limits = PLAN_LIMITS[plan]
+        now = self.clock()
+        usage, bucket = await asyncio.gather(
+            self._db().ai_usage.find_one({"startup_id": startup_id, "month": month_key(now)}, {"_id": 0}),
+            self._db().ai_rate_buckets.find_one({"startup_id": startup_id}, {"_id": 0}),
+        )
+        used = (usage or {}).get("tokens", 0)
+        available = float(limits["capacity"])
+        if bucket:
+            available = min(available, bucket["tokens"] + max(now - bucket["updated_at"], 0) * limits["per_minute"] / 60.0)
+        return {
+            "plan": plan,
+            "limits": limits,
+            "month": month_key(now),
+            "tokens_used": used,
+            "tokens_remaining": max(limits["monthly_tokens"] - used, 0),
+            "requests": (usage or {}).get("requests", 0),
+            "requests_available": int(available),
+            "resets_in_seconds": int(seconds_to_next_month(now)),
+        }
+
+    def reset(self):
+        self._plans.clear()
+        self._blocked_until.clear()
+        self._exhausted.clear()
+        for k in self.counters:
+            self.counters[k] = 0
+
+    def stats(self) -> dict:
+        return {**self.counters, "blocked_startups": len(self._blocked_until), "exhausted_startups": len(self._exhausted)}
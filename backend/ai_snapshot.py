@@ -0,0 +1,97 @@
+"""Compact startup snapshot the AI prompts are built from.
+
+Counts come from the maintained `startup_stats` counters (rebuilt with one
+aggregation per collection when missing) and a `count_documents` for the
+team, so no full task, milestone or feedback documents are loaded. Alongside
+them, a digest of the most recently updated task titles and the most telling
+recent feedback gives the model some concrete signal; it is capped at a token
+budget (estimated at ~4 characters per token) so prompts stay small. All
+queries run concurrently.
+"""
+import asyncio
+
+import startup_stats
+
+STARTUP_FIELDS = ("name", "industry", "stage", "description", "website")
+RECENT_TASKS = 15
+RECENT_FEEDBACK = 30
+FEEDBACK_HIGHLIGHTS = 8
+MAX_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _clip(text: str, limit: int = MAX_LINE_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def bounded(lines: list, max_tokens: int) -> list:
+    """The leading `lines` that fit in `max_tokens` together."""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def task_lines(tasks: list) -> list:
+    return [f"[{t.get('status') or 'todo'}] {_clip(t.get('title', ''))}" for t in tasks if t.get("title")]
+
+
+def feedback_lines(feedback: list) -> list:
+    """Strongest opinions first (furthest from a neutral 3/5), most recent breaking ties."""
+    ranked = sorted(enumerate(feedback), key=lambda p: (-abs((p[1].get("rating") or 3) - 3), p[0]))
+    lines = []
+    for _, f in ranked[:FEEDBACK_HIGHLIGHTS]:
+        text = f.get("title", "")
+        if f.get("content"):
+            text = f"{text}: {f['content']}" if text else f["content"]
+        if text:
+            lines.append(f"[{f.get('rating', '?')}/5 {f.get('category') or 'other'}] {_clip(text)}")
+    return lines
+
+
+async def build(db, startup_id: str, max_digest_tokens: int) -> dict:
+    startup, stats, team_size, tasks, feedback = await asyncio.gather(
+        db.startups.find_one({"id": startup_id}, {"_id": 0, **{k: 1 for k in STARTUP_FIELDS}}),
+        startup_stats.get(db, startup_id),
+        db.startup_members.count_documents({"startup_id": startup_id}),
+        db.tasks.find({"startup_id": startup_id}, {"_id": 0, "title": 1, "status": 1})
+            .sort([("updated_at", -1), ("id", -1)]).limit(RECENT_TASKS).to_list(RECENT_TASKS),
+        db.feedback.find({"startup_id": startup_id}, {"_id": 0, "title": 1, "content": 1, "rating": 1, "category": 1})
+            .sort([("created_at", -1), ("id", -1)]).limit(RECENT_FEEDBACK).to_list(RECENT_FEEDBACK),
+    )
+    task_status = stats["tasks"]["status"]
+    feedback_total = stats["feedback"]["total"]
+    # Split the digest budget evenly, letting tasks use whatever feedback leaves over
+    highlights = bounded(feedback_lines(feedback), max_digest_tokens // 2)
+    used = sum(estimate_tokens(line) + 1 for line in highlights)
+    return {
+        "startup": {k: v for k, v in (startup or {}).items() if v is not None},
+        "tasks_total": stats["tasks"]["total"],
+        "tasks_done": task_status.get("done", 0),
+        "tasks_in_progress": task_status.get("in_progress", 0),
+        "milestones_total": stats["milestones"]["total"],
+        "milestones_completed": stats["milestones"]["status"].get("completed", 0),
+        "feedback_total": feedback_total,
+        "avg_rating": round(stats["feedback"]["rating_sum"] / feedback_total, 1) if feedback_total else 0,
+        "team_size": team_size,
+        "recent_tasks": bounded(task_lines(tasks), max_digest_tokens - used),
+        "feedback_highlights": highlights,
+    }
+
+
+def digest_text(snapshot: dict) -> str:
+    """The digest as a prompt section ("" when there is nothing to add)."""
+    parts = []
+    if snapshot.get("recent_tasks"):
+        parts.append("Recently updated tasks:\n" + "\n".join(f"- {line}" for line in snapshot["recent_tasks"]))
+    if snapshot.get("feedback_highlights"):
+        parts.append("Feedback highlights:\n" + "\n".join(f"- {line}" for line in snapshot["feedback_highlights"]))
+    return "\n\n".join(parts)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark the finance engine against loading the ledger into Python.
+
+Seeds a throwaway database (<DB_NAME>_bench) with a synthetic ledger, times
+finance.ledger() and a full-fetch Python fold of the same rows, then drops
+the database.
+
+    cd backend
+    python benchmarks/finance_benchmark.py --rows 100000
+    python benchmarks/finance_benchmark.py --rows 5000 --in-memory   # smoke run only; mongomock timings mean nothing
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+load_dotenv(BACKEND_DIR / '.env')
+
+import finance  # noqa: E402
+
+STARTUP_ID = "bench-startup"
+
+
+def make_rows(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    n_investments = max(n // 20, 1)
+    n_income = (n - n_investments) * 9 // 19
+    n_expenses = n - n_investments - n_income
+
+    def row(i, prefix, category):
+        return {
+            "id": f"{prefix}-{i}", "startup_id": STARTUP_ID, "title": f"{prefix} {i}",
+            "amount": round(rng.uniform(5, 20000), 2), "category": category,
+            "date": f"{rng.randint(2023, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+
+    income = [row(i, "income", rng.choice(["revenue", "grant", "other"])) for i in range(n_income)]
+    expenses = [row(i, "expense", rng.choice(["salary", "marketing", "operations", "infrastructure"])) for i in range(n_expenses)]
+    investments = [dict(row(i, "investment", None), investment_type=rng.choice(["seed", "angel"]), equity_percentage=0.5) for i in range(n_investments)]
+    return income, expenses, investments
+
+
+async def python_fold(db):
+    """What the routes used to do, without the row caps."""
+    income = await db.income.find({"startup_id": STARTUP_ID}, {"_id": 0}).to_list(None)
+    expenses = await db.expenses.find({"startup_id": STARTUP_ID}, {"_id": 0}).to_list(None)
+    investments = await db.investments.find({"startup_id": STARTUP_ID}, {"_id": 0}).to_list(None)
+    monthly = defaultdict(float)
+    by_category = defaultdict(float)
+    for e in expenses:
+        monthly[e.get("date", "")[:7]] += e.get("amount", 0)
+        by_category[e.get("category", "other")] += e.get("amount", 0)
+    return sum(i.get("amount", 0) for i in income), sum(e.get("amount", 0) for e in expenses), sum(i.get("amount", 0) for i in investments)
+
+
+async def timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def main(args) -> int:
+    if args.in_memory:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db_name = f"{os.environ.get('DB_NAME', 'velora')}_bench"
+    db = client[db_name]
+    try:
+        income, expenses, investments = make_rows(args.rows)
+        for coll, rows in ((db.income, income), (db.expenses, expenses), (db.investments, investments)):
+            await coll.create_index([("startup_id", 1), ("date", 1), ("id", 1)])
+            for i in range(0, len(rows), 10000):
+                await coll.insert_many(rows[i:i + 10000], ordered=False)
+        print(f"Seeded {len(income)} income, {len(expenses)} expenses, {len(investments)} investments into {db_name}")
+
+        data = await finance.ledger(db, STARTUP_ID)
+        totals = await python_fold(db)
+        assert abs(data["expenses"]["total"] - totals[1]) < 0.01, "engine and full fetch disagree"
+
+        engine = await timed(lambda: finance.ledger(db, STARTUP_ID), args.runs)
+        fold = await timed(lambda: python_fold(db), args.runs)
+        print(f"{'finance.ledger (aggregation)':32} {engine * 1000:10.1f} ms")
+        print(f"{'full fetch + Python fold':32} {fold * 1000:10.1f} ms")
+        print(f"{'speedup':32} {fold / engine:10.1f} x")
+        return 0
+    finally:
+        if not args.keep:
+            await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Total ledger rows (default 100000)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per variant, median reported")
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock instead of MONGO_URL")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark database")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,399 @@
+"""Finance computations shared by the finance summary and the investor view.
+
+All totals come from MongoDB `$group` pipelines over the full ledger, grouped
+by month (the `YYYY-MM` prefix of `date`) and category, so results are exact
+however many rows a startup has. Only the grouped rows (months x categories)
+are transferred to Python.
+
+The same groups are also materialized in the `finance_monthly` collection,
+one document per (startup_id, kind, month, category), and kept current by
+the ledger write routes. Reads go through `rolled_up_ledger`, which touches
+only those small documents. Every rollup change bumps `version` in the
+startup's `finance_rollup_state` document (see `ledger_version`).
+
+Rebuilds are claimed through a `building` token on the state document, so
+only one runs per startup; other readers wait for it. Every ledger write runs
+inside `ledger_write`, which counts it in `writers` before the raw ledger is
+touched and, once the buckets are updated, decrements `writers` and bumps
+`version` in one update. A rebuild only commits while no write is in flight
+and `version` is still what it read before aggregating; otherwise a write
+raced it and it runs again. (A process that dies mid-write leaves `writers`
+raised; reads then fall back to the raw ledger until it is reset.)
+"""
+import asyncio
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# kind -> (ledger collection, category field, default category)
+LEDGER_KINDS = {
+    "income": ("income", "category", "other"),
+    "expense": ("expenses", "category", "other"),
+    "investment": ("investments", "investment_type", "other"),
+}
+
+
+def _month_category_pipeline(startup_id: str, category_field: str, default_category: str, extra: dict = None) -> list:
+    group = {
+        "_id": {
+            # `date` is an ASCII YYYY-MM-DD string, so a byte substring is safe.
+            "month": {"$substr": [{"$ifNull": ["$date", ""]}, 0, 7]},
+            "category": {"$ifNull": ["$" + category_field, default_category]},
+        },
+        "total": {"$sum": "$amount"},
+        "count": {"$sum": 1},
+    }
+    group.update(extra or {})
+    return [{"$match": {"startup_id": startup_id}}, {"$group": group}]
+
+
+def _fold(rows: list) -> dict:
+    """Reduce (month, category) rows to totals and per-month / per-category buckets."""
+    by_month = defaultdict(float)
+    by_category = defaultdict(float)
+    total = 0
+    count = 0
+    for r in rows:
+        month, category = r["_id"]["month"], r["_id"]["category"]
+        total += r["total"]
+        count += r["count"]
+        if month:
+            by_month[month] += r["total"]
+        by_category[category] += r["total"]
+    return {
+        "total": total,
+        "count": count,
+        "by_month": dict(sorted(by_month.items())),
+        "by_category": dict(by_category),
+    }
+
+
+def _investment_extra() -> dict:
+    return {"equity": {"$sum": "$equity_percentage"}}
+
+
+async def _aggregate_kind(db, startup_id: str, kind: str) -> list:
+    collection, category_field, default = LEDGER_KINDS[kind]
+    extra = _investment_extra() if kind == "investment" else None
+    return await db[collection].aggregate(_month_category_pipeline(startup_id, category_field, default, extra)).to_list(None)
+
+
+def _assemble(income_rows: list, expense_rows: list, investment_rows: list) -> dict:
+    investments = _fold(investment_rows)
+    investments["equity_given"] = sum(r.get("equity", 0) for r in investment_rows)
+    return {"income": _fold(income_rows), "expenses": _fold(expense_rows), "investments": investments}
+
+
+async def ledger(db, startup_id: str) -> dict:
+    """Aggregate a startup's income, expenses and investments.
+
+    Returns {"income": {...}, "expenses": {...}, "investments": {...}}, each
+    with total, count, by_month and by_category; investments also carry
+    equity_given.
+    """
+    rows = await asyncio.gather(*(_aggregate_kind(db, startup_id, kind) for kind in LEDGER_KINDS))
+    return _assemble(*rows)
+
+
+# ==================== MONTHLY ROLLUPS ====================
+
+REBUILD_ATTEMPTS = 5
+# How long a reader waits for another process's rebuild, and after how long an unfinished claim is taken over
+REBUILD_WAIT = 30.0
+
+
+class RollupBusy(Exception):
+    """Raised when a startup's rollups could not be rebuilt in time (another rebuild holds the claim)."""
+
+def _rollup_key(startup_id: str, kind: str, entry: dict) -> dict:
+    _, category_field, default = LEDGER_KINDS[kind]
+    return {
+        "startup_id": startup_id,
+        "kind": kind,
+        "month": (entry.get("date") or "")[:7],
+        "category": entry[category_field] if entry.get(category_field) is not None else default,
+    }
+
+
+@asynccontextmanager
+async def ledger_write(db, startup_id: str):
+    """Wrap a raw ledger write and its `record_entries` call, so concurrent rebuilds hold off.
+
+    Marking a startup whose rollups were never built creates its state
+    document as `stale`, so the first read still rebuilds it.
+    """
+    mark = {"$inc": {"writers": 1}}
+    try:
+        await db.finance_rollup_state.update_one({"startup_id": startup_id}, {**mark, "$setOnInsert": {"version": 0, "stale": True}}, upsert=True)
+    except DuplicateKeyError:
+        await db.finance_rollup_state.update_one({"startup_id": startup_id}, mark)  # created concurrently
+    try:
+        yield
+    finally:
+        await db.finance_rollup_state.update_one({"startup_id": startup_id}, {"$inc": {"writers": -1, "version": 1}})
+
+
+async def record_entries(db, startup_id: str, kind: str, entries: list, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) ledger rows from the monthly rollups.
+
+    Rows are pre-grouped, so a batch costs one upsert per touched bucket.
+    Call inside `ledger_write`, together with the raw ledger write.
+    """
+    buckets = {}
+    for entry in entries:
+        key = _rollup_key(startup_id, kind, entry)
+        ident = (key["month"], key["category"])
+        bucket = buckets.setdefault(ident, {"key": key, "total": 0, "count": 0, "equity": 0})
+        bucket["total"] += entry.get("amount") or 0
+        bucket["count"] += 1
+        bucket["equity"] += entry.get("equity_percentage") or 0
+    for bucket in buckets.values():
+        inc = {"total": sign * bucket["total"], "count": sign * bucket["count"]}
+        if kind == "investment":
+            inc["equity"] = sign * bucket["equity"]
+        await db.finance_monthly.update_one(bucket["key"], {"$inc": inc}, upsert=True)
+        if sign < 0:
+            await db.finance_monthly.delete_one({**bucket["key"], "count": {"$lte": 0}})
+
+
+async def record_entry(db, startup_id: str, kind: str, entry: dict, sign: int = 1):
+    await record_entries(db, startup_id, kind, [entry], sign)
+
+
+async def _claim(db, startup_id: str) -> Optional[str]:
+    """Take the rebuild claim (creating the state document if needed); returns a token, or None if it is held."""
+    token = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(seconds=REBUILD_WAIT)).isoformat()
+    try:
+        await db.finance_rollup_state.update_one(
+            {"startup_id": startup_id, "$or": [{"building": None}, {"building_since": {"$lt": stale}}]},
+            {"$set": {"building": token, "building_since": now.isoformat()}, "$setOnInsert": {"version": 0}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return None  # the document exists and another rebuild holds it
+    state = await db.finance_rollup_state.find_one({"startup_id": startup_id}, {"_id": 0, "building": 1})
+    return token if state and state.get("building") == token else None
+
+
+async def _rebuild_claimed(db, startup_id: str, token: str) -> Optional[int]:
+    """Rewrite the buckets from the raw ledger until no write races the rebuild; None if writes kept racing."""
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    attempts = 0
+    while attempts < REBUILD_ATTEMPTS and asyncio.get_running_loop().time() < deadline:
+        state = await db.finance_rollup_state.find_one({"startup_id": startup_id}, {"_id": 0, "version": 1, "writers": 1})
+        if (state or {}).get("writers", 0) > 0:
+            await asyncio.sleep(0.05)  # a write is in flight; its rows may be in the ledger but not in the buckets yet
+            continue
+        attempts += 1
+        version = (state or {}).get("version")  # None also matches state documents from before versioning
+        rows = await asyncio.gather(*(_aggregate_kind(db, startup_id, kind) for kind in LEDGER_KINDS))
+        ops = []
+        for kind, kind_rows in zip(LEDGER_KINDS, rows):
+            for r in kind_rows:
+                values = {"total": r["total"], "count": r["count"], "rebuild": token}
+                if kind == "investment":
+                    values["equity"] = r.get("equity", 0)
+                key = {"startup_id": startup_id, "kind": kind, "month": r["_id"]["month"], "category": r["_id"]["category"]}
+                ops.append(UpdateOne(key, {"$set": values}, upsert=True))
+        if ops:
+            await db.finance_monthly.bulk_write(ops, ordered=False)
+        await db.finance_monthly.delete_many({"startup_id": startup_id, "rebuild": {"$ne": token}})
+        done = await db.finance_rollup_state.update_one(
+            {"startup_id": startup_id, "building": token, "version": version, "writers": {"$in": [0, None]}},
+            {"$set": {"rebuilt_at": datetime.now(timezone.utc).isoformat()},
+             "$unset": {"building": "", "building_since": "", "stale": ""}, "$inc": {"version": 1}},
+        )
+        if done.modified_count:
+            return len(ops)
+    # Leave the rollups marked stale so the next read rebuilds again
+    await db.finance_rollup_state.update_one({"startup_id": startup_id, "building": token},
+                                             {"$set": {"stale": True}, "$unset": {"building": "", "building_since": ""}})
+    return None
+
+
+async def rebuild_rollups(db, startup_id: str) -> int:
+    """Recompute a startup's finance_monthly documents from the raw ledger.
+
+    Waits up to REBUILD_WAIT seconds for a rebuild already in progress.
+    Returns the number of buckets; raises RollupBusy if it could not finish.
+    """
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    while True:
+        token = await _claim(db, startup_id)
+        if token:
+            built = await _rebuild_claimed(db, startup_id, token)
+            if built is None:
+                raise RollupBusy(f"Ledger writes kept racing the rollup rebuild for {startup_id}")
+            return built
+        if asyncio.get_running_loop().time() > deadline:
+            raise RollupBusy(f"Rollup rebuild for {startup_id} is held by another process")
+        await asyncio.sleep(0.05)
+
+
+async def ensure_rollups(db, startup_id: str) -> bool:
+    """Make sure the startup's rollups are built, building them or waiting for a concurrent build.
+
+    Returns False if they are still not ready after REBUILD_WAIT seconds.
+    """
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    while True:
+        state = await db.finance_rollup_state.find_one({"startup_id": startup_id}, {"_id": 1, "building": 1, "stale": 1})
+        if state is not None and not state.get("building") and not state.get("stale"):
+            return True
+        token = await _claim(db, startup_id)
+        if token:
+            return await _rebuild_claimed(db, startup_id, token) is not None
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+
+
+async def ledger_version(db, startup_id: str):
+    """Counter bumped on every rollup change, or None while the rollups are not built.
+
+    Lets callers cache anything derived from the ledger and notice when it changes.
+    """
+    state = await db.finance_rollup_state.find_one({"startup_id": startup_id}, {"_id": 0, "version": 1, "building": 1, "stale": 1})
+    if state is None or state.get("building") or state.get("stale"):
+        return None
+    return state.get("version", 0)
+
+
+async def rolled_up_ledger(db, startup_id: str) -> dict:
+    """Same result as `ledger`, read from finance_monthly.
+
+    Startups whose rollups were never built are rebuilt on first read; if that
+    cannot finish, the result is aggregated from the raw ledger instead.
+    """
+    if not await ensure_rollups(db, startup_id):
+        return await ledger(db, startup_id)
+    return await _read_rollups(db, startup_id)
+
+
+async def versioned_ledger(db, startup_id: str) -> tuple:
+    """(version, ledger): `rolled_up_ledger` plus the `ledger_version` read before it.
+
+    The data is at least as new as the version, so it is safe to cache under it.
+    The version is None when the result had to come from the raw ledger.
+    """
+    if not await ensure_rollups(db, startup_id):
+        return None, await ledger(db, startup_id)
+    version = await ledger_version(db, startup_id)
+    return version, await _read_rollups(db, startup_id)
+
+
+async def _read_rollups(db, startup_id: str) -> dict:
+    docs = await db.finance_monthly.find({"startup_id": startup_id}, {"_id": 0}).to_list(None)
+    rows = {kind: [] for kind in LEDGER_KINDS}
+    for d in docs:
+        rows[d["kind"]].append({"_id": {"month": d["month"], "category": d["category"]},
+                                "total": d["total"], "count": d["count"], "equity": d.get("equity", 0)})
+    return _assemble(rows["income"], rows["expense"], rows["investment"])
+
+
+async def rolled_up_ledgers(db, startup_ids: list) -> dict:
+    """`rolled_up_ledger` for many startups at once: {startup_id: ledger}.
+
+    One `$group` over finance_monthly by (startup_id, kind, month); categories
+    are collapsed, so `by_category` holds a single bucket per kind. Startups
+    whose rollups were never built are rebuilt first (or, if that cannot
+    finish, read from the raw ledger).
+    """
+    ready = await db.finance_rollup_state.distinct("startup_id", {"startup_id": {"$in": startup_ids}, "building": None, "stale": None})
+    missing = [sid for sid in startup_ids if sid not in set(ready)]
+    built = await asyncio.gather(*(ensure_rollups(db, sid) for sid in missing))
+    unavailable = [sid for sid, ok in zip(missing, built) if not ok]
+    pipeline = [
+        {"$match": {"startup_id": {"$in": startup_ids}}},
+        {"$group": {
+            "_id": {"startup_id": "$startup_id", "kind": "$kind", "month": "$month"},
+            "total": {"$sum": "$total"},
+            "count": {"$sum": "$count"},
+            "equity": {"$sum": {"$ifNull": ["$equity", 0]}},
+        }},
+    ]
+    rows = {sid: {kind: [] for kind in LEDGER_KINDS} for sid in startup_ids}
+    async for r in db.finance_monthly.aggregate(pipeline):
+        key = r["_id"]
+        rows[key["startup_id"]][key["kind"]].append({"_id": {"month": key["month"], "category": "all"},
+                                                     "total": r["total"], "count": r["count"], "equity": r["equity"]})
+    result = {sid: _assemble(k["income"], k["expense"], k["investment"]) for sid, k in rows.items()}
+    for sid, data in zip(unavailable, await asyncio.gather(*(ledger(db, sid) for sid in unavailable))):
+        result[sid] = data
+    return result
+
+
+async def check_rollups(db, startup_id: str, tolerance: float = 0.01) -> list:
+    """List the (kind, field, rolled up, actual) values that differ from the raw ledger.
+
+    Reads finance_monthly as stored, without building or repairing it first.
+    """
+    rolled, actual = await asyncio.gather(_read_rollups(db, startup_id), ledger(db, startup_id))
+    drift = []
+    for kind in ("income", "expenses", "investments"):
+        for field in ("total", "count", "by_month", "by_category"):
+            a, b = rolled[kind][field], actual[kind][field]
+            if isinstance(a, dict):
+                keys = set(a) | set(b)
+                same = all(abs(a.get(k, 0) - b.get(k, 0)) <= tolerance for k in keys)
+            else:
+                same = abs(a - b) <= tolerance
+            if not same:
+                drift.append((kind, field, a, b))
+    return drift
+
+
+def burn_and_runway(data: dict) -> dict:
+    """Balance, average monthly burn and runway.
+
+    Burn is total expenses over the number of months that have expenses;
+    runway is the current balance divided by that burn.
+    """
+    income, expenses, investments = data["income"], data["expenses"], data["investments"]
+    balance = income["total"] + investments["total"] - expenses["total"]
+    months = len(expenses["by_month"])
+    avg_monthly_burn = expenses["total"] / months if months else 0
+    runway_months = round(balance / avg_monthly_burn, 1) if avg_monthly_burn > 0 else 0
+    return {"balance": balance, "avg_monthly_burn": avg_monthly_burn, "runway_months": runway_months}
+
+
+def summary_response(data: dict) -> dict:
+    """Body of GET /startups/{id}/finance/summary."""
+    income, expenses, investments = data["income"], data["expenses"], data["investments"]
+    runway = burn_and_runway(data)
+    return {
+        "total_income": income["total"],
+        "total_expenses": expenses["total"],
+        "total_investments": investments["total"],
+        "total_equity_given": investments["equity_given"],
+        "net_balance": runway["balance"],
+        "avg_monthly_burn": round(runway["avg_monthly_burn"], 2),
+        "runway_months": runway["runway_months"],
+        "monthly_income": income["by_month"],
+        "monthly_expenses": expenses["by_month"],
+        "income_by_category": income["by_category"],
+        "expenses_by_category": expenses["by_category"],
+        "investment_count": investments["count"],
+    }
+
+
+def investor_financials(data: dict) -> dict:
+    """`financials` block of GET /startups/{id}/investor-view."""
+    expenses = data["expenses"]
+    runway = burn_and_runway(data)
+    return {
+        "total_income": data["income"]["total"],
+        "total_expenses": expenses["total"],
+        "total_investments": data["investments"]["total"],
+        "current_balance": runway["balance"],
+        "avg_monthly_burn": round(runway["avg_monthly_burn"], 2),
+        "runway_months": runway["runway_months"],
+        "expenses_by_month": dict(list(expenses["by_month"].items())[-6:]),  # Last 6 months
+    }
@@ -0,0 +1,157 @@
+"""Burn and runway forecasting over a startup's monthly ledger.
+
+Works on the output of `finance.rolled_up_ledger`: per-month totals are laid
+out on a contiguous month axis as NumPy arrays, trailing averages and growth
+rates are computed over the whole axis at once, and each scenario is a
+vectorized projection of the cash balance over the forecast horizon.
+
+Trailing windows end at the last complete month, so a half-finished current
+month does not drag the averages down; the starting balance still includes
+every ledger row.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+WINDOWS = (3, 6, 12)
+HISTORY_MONTHS = 24
+# Month-over-month growth is clipped so a single noisy month cannot dominate a projection.
+MAX_MONTHLY_GROWTH = 0.25
+
+
+def month_index(month: str) -> int:
+    year, mon = month.split("-")
+    return int(year) * 12 + int(mon) - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def last_complete_month(now: datetime = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    return now.year * 12 + now.month - 2
+
+
+def monthly_series(data: dict, end: int) -> dict:
+    """Income and expense arrays for every month from the first ledger month through `end`."""
+    points = {"income": {}, "expenses": {}}
+    for kind in points:
+        for month, total in data[kind]["by_month"].items():
+            try:
+                points[kind][month_index(month)] = total
+            except ValueError:
+                continue
+    first = min([end] + [m for kind in points.values() for m in kind])
+    axis = np.arange(first, end + 1)
+    series = {"axis": axis}
+    for kind, values in points.items():
+        arr = np.zeros(len(axis))
+        for m, total in values.items():
+            if first <= m <= end:
+                arr[m - first] += total
+        series[kind] = arr
+    return series
+
+
+def trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last `window` months at every point (shorter at the start of the series)."""
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    return (csum[idx] - csum[lo]) / (idx - lo)
+
+
+def growth_rate(values: np.ndarray, window: int) -> float:
+    """Compound monthly growth from the previous `window` months to the last `window` months."""
+    if len(values) < 2 * window:
+        return 0.0
+    recent = values[-window:].mean()
+    prior = values[-2 * window:-window].mean()
+    if recent <= 0 or prior <= 0:
+        return 0.0
+    rate = (recent / prior) ** (1 / window) - 1
+    return float(np.clip(rate, -MAX_MONTHLY_GROWTH, MAX_MONTHLY_GROWTH))
+
+
+def project(balance: float, income: float, expenses: float, income_growth: float, expense_growth: float,
+            horizon: int, extra_costs: np.ndarray = None) -> dict:
+    """Project the cash balance month by month and find when it crosses zero."""
+    steps = np.arange(1, horizon + 1)
+    income_path = income * (1 + income_growth) ** steps
+    expense_path = expenses * (1 + expense_growth) ** steps
+    if extra_costs is not None:
+        expense_path = expense_path + extra_costs
+    balances = balance + np.cumsum(income_path - expense_path)
+    below = np.nonzero(balances < 0)[0]
+    if balance < 0:
+        runway = 0.0
+    elif len(below):
+        i = below[0]
+        start = balances[i - 1] if i else balance
+        # Interpolate within the month the balance goes negative
+        runway = round(float(i + start / (start - balances[i])), 1)
+    else:
+        runway = None
+    return {
+        "monthly_income": round(float(income_path[0]), 2),
+        "monthly_expenses": round(float(expense_path[0]), 2),
+        "runway_months": runway,
+        "balance": np.round(balances, 2).tolist(),
+    }
+
+
+def hiring_costs(plan: list, first_month: int, horizon: int) -> np.ndarray:
+    """Extra monthly cost of a hiring plan, [{start_month, headcount, monthly_cost}], over the horizon."""
+    months = np.arange(first_month, first_month + horizon)
+    costs = np.zeros(horizon)
+    for hire in plan:
+        costs += np.where(months >= month_index(hire["start_month"]), hire["headcount"] * hire["monthly_cost"], 0.0)
+    return costs
+
+
+def build(data: dict, balance: float, horizon: int, now: datetime = None) -> dict:
+    """Series, trailing statistics and the trailing-window scenarios for one startup."""
+    end = last_complete_month(now)
+    series = monthly_series(data, end)
+    income, expenses = series["income"], series["expenses"]
+    history = slice(-HISTORY_MONTHS, None)
+    trailing = {}
+    scenarios = []
+    for w in WINDOWS:
+        avg_income = float(income[-w:].mean())
+        avg_expenses = float(expenses[-w:].mean())
+        stats = {
+            "avg_income": round(avg_income, 2),
+            "avg_expenses": round(avg_expenses, 2),
+            "avg_net_burn": round(avg_expenses - avg_income, 2),
+            "income_growth": round(growth_rate(income, w), 4),
+            "expense_growth": round(growth_rate(expenses, w), 4),
+        }
+        trailing[str(w)] = stats
+        scenario = project(balance, avg_income, avg_expenses, stats["income_growth"], stats["expense_growth"], horizon)
+        scenarios.append({"name": f"trailing_{w}m", "window": w, **scenario})
+    return {
+        "as_of": month_label(end),
+        "horizon_months": horizon,
+        "current_balance": round(balance, 2),
+        "history": {
+            "months": [month_label(m) for m in series["axis"][history]],
+            "income": np.round(income[history], 2).tolist(),
+            "expenses": np.round(expenses[history], 2).tolist(),
+            "trailing_expenses": {str(w): np.round(trailing_mean(expenses, w)[history], 2).tolist() for w in WINDOWS},
+        },
+        "trailing": trailing,
+        "scenarios": scenarios,
+        "projection_months": [month_label(end + h) for h in range(1, horizon + 1)],
+    }
+
+
+def hiring_scenario(forecast: dict, plan: list, window: int = 6) -> dict:
+    """The `trailing_{window}m` scenario with a hiring plan's costs added."""
+    stats = forecast["trailing"][str(window)]
+    horizon = forecast["horizon_months"]
+    first = month_index(forecast["as_of"]) + 1
+    scenario = project(forecast["current_balance"], stats["avg_income"], stats["avg_expenses"],
+                       stats["income_growth"], stats["expense_growth"], horizon, hiring_costs(plan, first, horizon))
+    return {"name": f"hiring_plan_{window}m", "window": window, **scenario}
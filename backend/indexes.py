@@ -0,0 +1,245 @@
+"""Declarative MongoDB index registry.
+
+`INDEXES` lists every index the API relies on, per collection. `apply_indexes`
+creates whatever is missing and records `INDEX_VERSION` in the
+`schema_versions` collection, so bump the version whenever the registry
+changes; startups with an up-to-date version skip the work entirely.
+
+`ROUTE_QUERIES` mirrors the query shapes the routes issue (filter + sort), and
+`audit` runs `explain` on each of them to report any that would not be served
+by an index scan.
+
+Run from the backend directory:
+    python manage.py apply-indexes [--force] [--drop-unknown]
+    python manage.py audit-indexes
+"""
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+INDEX_VERSION = 6
+
+
+def _index(*fields: str, unique: bool = False) -> IndexModel:
+    return IndexModel([(f, ASCENDING) for f in fields], unique=unique)
+
+
+INDEXES = {
+    "profiles": [
+        _index("id", unique=True),
+        _index("email"),
+    ],
+    "startups": [
+        _index("id", unique=True),
+        _index("invite_code", unique=True),
+        _index("founder_id"),
+    ],
+    "startup_members": [
+        _index("startup_id", "user_id", unique=True),
+        # Also serves lookups on user_id alone (get_user_startups)
+        _index("user_id", "joined_at", "id"),
+    ],
+    "tasks": [
+        _index("id", unique=True),
+        _index("milestone_id"),
+        _index("startup_id", "milestone_id", "status"),
+        _index("startup_id", "created_at", "id"),
+        _index("startup_id", "updated_at", "id"),
+        _index("startup_id", "status", "created_at", "id"),
+        _index("startup_id", "assigned_to", "created_at", "id"),
+        _index("startup_id", "priority", "created_at", "id"),
+        _index("startup_id", "milestone_id", "created_at", "id"),
+    ],
+    "milestones": [
+        _index("id", unique=True),
+        _index("startup_id"),
+    ],
+    "feedback": [
+        _index("startup_id", "created_at", "id"),
+        _index("startup_id", "category", "created_at", "id"),
+        _index("startup_id", "rating", "id"),
+    ],
+    "subscriptions": [
+        _index("startup_id"),
+    ],
+    "income": [
+        _index("id", unique=True),
+        _index("startup_id", "date", "id"),
+        _index("startup_id", "amount", "id"),
+        _index("startup_id", "category", "date", "id"),
+    ],
+    "expenses": [
+        _index("id", unique=True),
+        _index("startup_id", "date", "id"),
+        _index("startup_id", "amount", "id"),
+        _index("startup_id", "category", "date", "id"),
+    ],
+    "investments": [
+        _index("id", unique=True),
+        _index("startup_id", "date", "id"),
+        _index("startup_id", "amount", "id"),
+        _index("startup_id", "investment_type", "date", "id"),
+    ],
+    "investor_invites": [
+        _index("invite_code", "status"),
+        _index("startup_id", "status"),
+    ],
+    "startup_stats": [
+        _index("startup_id", unique=True),
+    ],
+    "finance_monthly": [
+        _index("startup_id", "kind", "month", "category", unique=True),
+    ],
+    "finance_rollup_state": [
+        _index("startup_id", unique=True),
+    ],
+    "startup_versions": [
+        _index("startup_id", unique=True),
+    ],
+    "ai_results": [
+        # TTL: documents are removed once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        _index("startup_id"),
+    ],
+    "ai_jobs": [
+        _index("id", unique=True),
+        _index("dedup_key", "status", "created_at"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "ai_rate_buckets": [
+        _index("startup_id", unique=True),
+    ],
+    "ai_usage": [
+        _index("startup_id", "month", unique=True),
+    ],
+}
+
+
+def _key(spec) -> tuple:
+    return tuple((field, int(direction)) for field, direction in spec.items())
+
+
+async def apply_indexes(db, force: bool = False, drop_unknown: bool = False, logger=None) -> dict:
+    """Create missing registry indexes; optionally drop indexes the registry does not know.
+
+    Returns {"skipped": bool, "created": [...], "dropped": [...], "failed": [...]}.
+    """
+    report = {"skipped": False, "created": [], "dropped": [], "failed": []}
+    state = await db.schema_versions.find_one({"_id": "indexes"})
+    if not force and state and state.get("version", 0) >= INDEX_VERSION:
+        report["skipped"] = True
+        return report
+
+    for collection, models in INDEXES.items():
+        existing = await db[collection].index_information()
+        existing_keys = {_key(dict(info["key"])): name for name, info in existing.items()}
+        wanted = {_key(m.document["key"]): m for m in models}
+        for key, model in wanted.items():
+            if key in existing_keys:
+                continue
+            try:
+                await db[collection].create_indexes([model])
+                report["created"].append(f"{collection}.{model.document['name']}")
+            except OperationFailure as e:
+                # e.g. an index with the same name but different options, or duplicate keys for a unique index
+                report["failed"].append(f"{collection}.{model.document['name']}: {e}")
+        if drop_unknown:
+            for key, name in existing_keys.items():
+                if name != "_id_" and key not in wanted:
+                    await db[collection].drop_index(name)
+                    report["dropped"].append(f"{collection}.{name}")
+
+    if not report["failed"]:
+        await db.schema_versions.update_one(
+            {"_id": "indexes"},
+            {"$set": {"version": INDEX_VERSION, "applied_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+    if logger:
+        for line in report["failed"]:
+            logger.error(f"Index creation failed: {line}")
+        logger.info(f"Indexes at version {INDEX_VERSION}: {len(report['created'])} created, {len(report['dropped'])} dropped")
+    return report
+
+
+# (route, collection, filter, sort). Values are placeholders; only the shape matters to the planner.
+ROUTE_QUERIES = [
+    ("get_membership", "startup_members", {"startup_id": "s", "user_id": "u"}, None),
+    ("GET /startups", "startup_members", {"user_id": "u"}, [("joined_at", -1), ("id", -1)]),
+    ("GET /startups", "startups", {"id": {"$in": ["s"]}}, None),
+    ("POST /startups/join", "startups", {"invite_code": "ABC"}, None),
+    ("GET /startups/{id}/members", "startup_members", {"startup_id": "s"}, None),
+    ("GET /startups/{id}/investors", "startup_members", {"startup_id": "s", "role": "investor"}, None),
+    ("load_profiles", "profiles", {"id": {"$in": ["u"]}}, None),
+    ("GET /startups/{id}/tasks", "tasks", {"startup_id": "s"}, [("created_at", 1), ("id", 1)]),
+    ("GET /startups/{id}/tasks?sort=updated_at", "tasks", {"startup_id": "s"}, [("updated_at", -1), ("id", -1)]),
+    ("GET /startups/{id}/tasks?status=", "tasks", {"startup_id": "s", "status": "todo"}, [("created_at", 1), ("id", 1)]),
+    ("GET /startups/{id}/tasks?assignee=", "tasks", {"startup_id": "s", "assigned_to": "u"}, [("created_at", 1), ("id", 1)]),
+    ("GET /startups/{id}/tasks?priority=", "tasks", {"startup_id": "s", "priority": "high"}, [("created_at", 1), ("id", 1)]),
+    ("GET /startups/{id}/tasks?milestone_id=", "tasks", {"startup_id": "s", "milestone_id": "m"}, [("created_at", 1), ("id", 1)]),
+    ("PUT /tasks/{id}", "tasks", {"id": "t"}, None),
+    ("DELETE /milestones/{id}", "tasks", {"milestone_id": "m"}, None),
+    ("get_milestone_progress", "tasks", {"startup_id": "s", "milestone_id": {"$ne": None}}, None),
+    ("GET /startups/{id}/milestones", "milestones", {"startup_id": "s"}, None),
+    ("PUT /milestones/{id}", "milestones", {"id": "m"}, None),
+    ("GET /startups/{id}/feedback", "feedback", {"startup_id": "s"}, [("created_at", -1), ("id", -1)]),
+    ("GET /startups/{id}/feedback?category=", "feedback", {"startup_id": "s", "category": "product"}, [("created_at", -1), ("id", -1)]),
+    ("GET /startups/{id}/feedback?sort=rating", "feedback", {"startup_id": "s"}, [("rating", -1), ("id", -1)]),
+    ("GET /startups/{id}/subscription", "subscriptions", {"startup_id": "s"}, None),
+    ("GET /finance/income", "income", {"startup_id": "s", "date": {"$gte": "2026-01-01"}}, [("date", -1), ("id", -1)]),
+    ("GET /finance/income?sort=amount", "income", {"startup_id": "s"}, [("amount", -1), ("id", -1)]),
+    ("GET /finance/income?category=", "income", {"startup_id": "s", "category": "revenue"}, [("date", -1), ("id", -1)]),
+    ("DELETE /finance/income/{id}", "income", {"id": "i", "startup_id": "s"}, None),
+    ("GET /finance/expenses", "expenses", {"startup_id": "s", "date": {"$gte": "2026-01-01"}}, [("date", -1), ("id", -1)]),
+    ("GET /finance/expenses?sort=amount", "expenses", {"startup_id": "s"}, [("amount", -1), ("id", -1)]),
+    ("GET /finance/expenses?category=", "expenses", {"startup_id": "s", "category": "salary"}, [("date", -1), ("id", -1)]),
+    ("DELETE /finance/expenses/{id}", "expenses", {"id": "e", "startup_id": "s"}, None),
+    ("GET /finance/investments", "investments", {"startup_id": "s"}, [("date", -1), ("id", -1)]),
+    ("GET /finance/investments?investment_type=", "investments", {"startup_id": "s", "investment_type": "seed"}, [("date", -1), ("id", -1)]),
+    ("DELETE /finance/investments/{id}", "investments", {"id": "i", "startup_id": "s"}, None),
+    ("GET /export/tasks", "tasks", {"startup_id": "s", "created_at": {"$gte": "2026-01-01"}}, [("created_at", 1), ("id", 1)]),
+    ("finance rollups", "finance_monthly", {"startup_id": "s"}, None),
+    ("finance rollup state", "finance_rollup_state", {"startup_id": "s"}, None),
+    ("startup_stats", "startup_stats", {"startup_id": "s"}, None),
+    ("GET /ai/jobs/{id}", "ai_jobs", {"id": "j"}, None),
+    ("POST /ai/*/jobs", "ai_jobs", {"dedup_key": "k", "status": {"$in": ["queued", "running"]}, "created_at": {"$gt": "2026-01-01"}}, None),
+    ("AI rate limits", "ai_rate_buckets", {"startup_id": "s"}, None),
+    ("AI token budgets", "ai_usage", {"startup_id": "s", "month": "2026-01"}, None),
+    ("conditional GETs", "startup_versions", {"startup_id": "s"}, None),
+    ("GET /startups/{id}/investors/pending", "investor_invites", {"startup_id": "s", "status": "pending"}, None),
+    ("POST /investors/join", "investor_invites", {"invite_code": "ABC", "status": "pending"}, None),
+]
+
+INDEXED_STAGES = {"IXSCAN", "IDHACK", "COUNT_SCAN", "DISTINCT_SCAN", "EXPRESS_IXSCAN", "EXPRESS_IDHACK"}
+
+
+def plan_stages(plan: dict) -> set:
+    """Every stage name in an explain winningPlan (classic or SBE layout)."""
+    stages = set()
+    todo = [plan]
+    while todo:
+        node = todo.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.add(node["stage"])
+        for child in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+            if child in node:
+                todo.append(node[child])
+        todo.extend(node.get("inputStages", []))
+    return stages
+
+
+async def audit(db, queries: list = ROUTE_QUERIES) -> list:
+    """Explain every route query; return [(route, collection, stages)] for those without an index scan."""
+    problems = []
+    for route, collection, query, sort in queries:
+        find = {"find": collection, "filter": query}
+        if sort:
+            find["sort"] = dict(sort)
+        result = await db.command({"explain": find, "verbosity": "queryPlanner"})
+        stages = plan_stages(result["queryPlanner"]["winningPlan"])
+        if not stages & INDEXED_STAGES:
+            problems.append((route, collection, sorted(stages)))
+    return problems
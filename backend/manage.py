@@ -0,0 +1,138 @@
+"""Maintenance commands for the Velora backend.
+
+Usage (from the backend directory, with the same .env as the API):
+    python manage.py rebuild-stats [--startup ID]
+    python manage.py check-stats [--startup ID] [--fix]
+    python manage.py rebuild-finance-rollups [--startup ID]
+    python manage.py check-finance-rollups [--startup ID] [--fix]
+    python manage.py apply-indexes [--force] [--drop-unknown]
+    python manage.py audit-indexes
+"""
+import argparse
+import asyncio
+import sys
+
+from server import client, db, logger
+import finance
+import indexes
+import startup_stats
+
+
+async def _startup_ids(startup_id):
+    if startup_id:
+        return [startup_id]
+    return await db.startups.distinct("id")
+
+
+async def rebuild_stats(args) -> int:
+    ids = await _startup_ids(args.startup)
+    for startup_id in ids:
+        await startup_stats.rebuild(db, startup_id)
+    logger.info(f"Rebuilt stats for {len(ids)} startups")
+    return 0
+
+
+async def check_stats(args) -> int:
+    drifted = 0
+    for startup_id in await _startup_ids(args.startup):
+        drift = await startup_stats.check(db, startup_id)
+        if not drift:
+            continue
+        drifted += 1
+        for counter, (stored, actual) in sorted(drift.items()):
+            print(f"{startup_id} {counter}: stored={stored} actual={actual}")
+        if args.fix:
+            await startup_stats.rebuild(db, startup_id)
+    print(f"{drifted} startups with drifted stats" + (" (rebuilt)" if args.fix and drifted else ""))
+    return 1 if drifted and not args.fix else 0
+
+
+async def rebuild_finance_rollups(args) -> int:
+    ids = await _startup_ids(args.startup)
+    buckets = 0
+    for startup_id in ids:
+        buckets += await finance.rebuild_rollups(db, startup_id)
+    logger.info(f"Rebuilt {buckets} finance_monthly buckets for {len(ids)} startups")
+    return 0
+
+
+async def check_finance_rollups(args) -> int:
+    drifted = 0
+    for startup_id in await _startup_ids(args.startup):
+        drift = await finance.check_rollups(db, startup_id)
+        if not drift:
+            continue
+        drifted += 1
+        for kind, field, rolled, actual in drift:
+            print(f"{startup_id} {kind}.{field}: rolled_up={rolled} actual={actual}")
+        if args.fix:
+            await finance.rebuild_rollups(db, startup_id)
+    print(f"{drifted} startups with drifted finance rollups" + (" (rebuilt)" if args.fix and drifted else ""))
+    return 1 if drifted and not args.fix else 0
+
+
+async def apply_indexes(args) -> int:
+    report = await indexes.apply_indexes(db, force=args.force, drop_unknown=args.drop_unknown)
+    if report["skipped"]:
+        print(f"Indexes already at version {indexes.INDEX_VERSION} (use --force to re-check)")
+        return 0
+    for name in report["created"]:
+        print(f"created {name}")
+    for name in report["dropped"]:
+        print(f"dropped {name}")
+    for line in report["failed"]:
+        print(f"FAILED {line}")
+    return 1 if report["failed"] else 0
+
+
+async def audit_indexes(args) -> int:
+    problems = await indexes.audit(db)
+    for route, collection, stages in problems:
+        print(f"{route}: {collection} planned as {'/'.join(stages)}")
+    print(f"{len(problems)} of {len(indexes.ROUTE_QUERIES)} route queries without an index scan")
+    return 1 if problems else 0
+
+
+COMMANDS = {
+    "rebuild-stats": rebuild_stats,
+    "check-stats": check_stats,
+    "rebuild-finance-rollups": rebuild_finance_rollups,
+    "check-finance-rollups": check_finance_rollups,
+    "apply-indexes": apply_indexes,
+    "audit-indexes": audit_indexes,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Velora backend maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-stats", help="Recompute startup_stats from tasks, milestones and feedback")
+    p.add_argument("--startup", help="Only this startup id")
+
+    p = sub.add_parser("check-stats", help="Report startup_stats counters that drifted from the source collections")
+    p.add_argument("--startup", help="Only this startup id")
+    p.add_argument("--fix", action="store_true", help="Rebuild startups with drift")
+
+    p = sub.add_parser("rebuild-finance-rollups", help="Recompute finance_monthly from income, expenses and investments")
+    p.add_argument("--startup", help="Only this startup id")
+
+    p = sub.add_parser("check-finance-rollups", help="Report finance_monthly buckets that drifted from the raw ledger")
+    p.add_argument("--startup", help="Only this startup id")
+    p.add_argument("--fix", action="store_true", help="Rebuild startups with drift")
+
+    p = sub.add_parser("apply-indexes", help="Create missing indexes from the registry in indexes.py")
+    p.add_argument("--force", action="store_true", help="Re-check even if the recorded version is current")
+    p.add_argument("--drop-unknown", action="store_true", help="Drop indexes that are not in the registry")
+
+    sub.add_parser("audit-indexes", help="Explain every route query and report those without an index scan")
+
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Cache for computed per-startup reports (analytics, finance summary, ...).
+
+Entries are keyed by (startup_id, endpoint, data version), so any write that
+bumps the startup's data version makes older entries unreachable at once, in
+every worker; `invalidate` additionally frees them. Values are stored as
+JSON bytes.
+
+Backends:
+    MemoryBackend  in-process LRU, capped by entry count and total bytes
+    RedisBackend   any Redis-protocol server (redis-py asyncio client), shared by all workers
+
+Concurrent misses for the same key are coalesced into one computation
+(single-flight) in-process; with Redis, a short lock key also keeps other
+workers from computing the same entry at the same time.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, tag)
+        self._tags = {}  # tag -> set of keys
+        self.bytes = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: int, tag: str):
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl, tag)
+        self._tags.setdefault(tag, set()).add(key)
+        self.bytes += len(value)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, tag: str):
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+
+    async def lock(self, key: str, ttl: float) -> bool:
+        return True  # single-flight already covers this process
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= len(entry[0])
+        keys = self._tags.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry[2]]
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    def info(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes, "evictions": self.evictions}
+
+
+class RedisBackend:
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "velora:rc:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis.asyncio as redis
+        return cls(redis.from_url(url), **kwargs)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int, tag: str):
+        tag_key = f"{self.prefix}tag:{tag}"
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, value, ex=ttl)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, ttl)
+            await pipe.execute()
+
+    async def invalidate(self, tag: str):
+        tag_key = f"{self.prefix}tag:{tag}"
+        keys = await self.client.smembers(tag_key)
+        await self.client.delete(tag_key, *(self.prefix + k.decode() for k in keys))
+
+    async def lock(self, key: str, ttl: float) -> bool:
+        return bool(await self.client.set(f"{self.prefix}lock:{key}", b"1", nx=True, px=int(ttl * 1000)))
+
+    async def unlock(self, key: str):
+        await self.client.delete(f"{self.prefix}lock:{key}")
+
+    def clear(self):
+        pass
+
+    def info(self) -> dict:
+        return {}
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int, lock_timeout: float = 10.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def get_or_compute(self, startup_id: str, endpoint: str, version, compute):
+        """Return the cached value for (startup_id, endpoint, version), computing it with `compute()` on a miss."""
+        key = f"{startup_id}:{endpoint}:{version}"
+        raw = await self._get(key)
+        if raw is not None:
+            self.counters["hits"] += 1
+            return json.loads(raw)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.counters["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The request computing the value went away; compute it here instead.
+                return await self.get_or_compute(startup_id, endpoint, version, compute)
+
+        self.counters["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._compute_once(key, startup_id, compute)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _compute_once(self, key: str, startup_id: str, compute):
+        locked = await self._lock(key)
+        if not locked:
+            # Another worker is computing this entry; wait briefly for it to land.
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                raw = await self._get(key)
+                if raw is not None:
+                    self.counters["misses"] -= 1
+                    self.counters["coalesced"] += 1
+                    return json.loads(raw)
+        try:
+            value = await compute()
+            try:
+                await self.backend.set(key, json.dumps(value, default=str).encode(), self.ttl, startup_id)
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning(f"Response cache write failed: {e}")
+            return value
+        finally:
+            if locked and hasattr(self.backend, "unlock"):
+                try:
+                    await self.backend.unlock(key)
+                except Exception:
+                    pass
+
+    async def invalidate(self, startup_id: str):
+        try:
+            await self.backend.invalidate(startup_id)
+        except Exception as e:
+            self.counters["errors"] += 1
+            logger.warning(f"Response cache invalidation failed: {e}")
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never fail the request
+            self.counters["errors"] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    async def _lock(self, key: str) -> bool:
+        try:
+            return await self.backend.lock(key, self.lock_timeout)
+        except Exception:
+            return True
+
+    def reset(self):
+        self.backend.clear()
+        self._inflight.clear()
+        for k in self.counters:
+            self.counters[k] = 0
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+        served = self.counters["hits"] + self.counters["coalesced"]
+        return {
+            "backend": self.backend.name,
+            **self.counters,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+            **self.backend.info(),
+        }
+
+
+class NullCache(ResponseCache):
+    """Cache disabled: always compute."""
+
+    def __init__(self):
+        super().__init__(MemoryBackend(0, 0), ttl=0)
+        self.backend.name = "off"
+
+    async def get_or_compute(self, startup_id, endpoint, version, compute):
+        self.counters["misses"] += 1
+        return await compute()
@@ -1,16 +1,40 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response, Query
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 import uuid
+import io
+import csv
+import json
+import base64
+import time
+import hashlib
+import functools
+import asyncio
 import httpx
+import jwt
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime, timezone
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
 from supabase import create_client, Client
+from cachetools import TLRUCache, TTLCache
+from contextvars import ContextVar
+import startup_stats
+import finance
+import forecast
+import indexes
+import response_cache as rcache
+import ai_snapshot
+from ai_gateway import AIGateway, AITimeout, AIUnavailable
+from ai_jobs import AIJobQueue, JobFailed, QueueFull
+from ai_limits import AILimiter, RateLimited
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -24,9 +48,59 @@ db = client[os.environ['DB_NAME']]
 supabase_url = os.environ.get('SUPABASE_URL')
 supabase_service_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
 supabase_client: Client = create_client(supabase_url, supabase_service_key)
+SUPABASE_MAX_WORKERS = int(os.environ.get('SUPABASE_MAX_WORKERS', '16'))
+SUPABASE_MAX_CONCURRENCY = int(os.environ.get('SUPABASE_MAX_CONCURRENCY', '16'))
+SUPABASE_CALL_TIMEOUT = float(os.environ.get('SUPABASE_CALL_TIMEOUT', '10'))
+
+# Local JWT verification (avoids a Supabase round-trip per request)
+AUTH_VERIFY_MODE = os.environ.get('AUTH_VERIFY_MODE', 'local').lower()  # local, remote
+SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET')
+# Without the secret, HS256 tokens can only be checked by Supabase, so fall back by default
+AUTH_REMOTE_FALLBACK = os.environ.get('AUTH_REMOTE_FALLBACK', 'false' if SUPABASE_JWT_SECRET else 'true').lower() == 'true'
+SUPABASE_JWT_AUDIENCE = os.environ.get('SUPABASE_JWT_AUDIENCE', 'authenticated')
+SUPABASE_JWT_ISSUER = os.environ.get('SUPABASE_JWT_ISSUER') or (f"{supabase_url.rstrip('/')}/auth/v1" if supabase_url else None)
+SUPABASE_JWKS_URL = os.environ.get('SUPABASE_JWKS_URL') or (f"{SUPABASE_JWT_ISSUER}/.well-known/jwks.json" if SUPABASE_JWT_ISSUER else None)
+JWKS_CACHE_TTL = int(os.environ.get('JWKS_CACHE_TTL', '3600'))
+AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', '300'))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '10000'))
+AUTH_NEGATIVE_CACHE_TTL = int(os.environ.get('AUTH_NEGATIVE_CACHE_TTL', '30'))
+MEMBERSHIP_CACHE_TTL = int(os.environ.get('MEMBERSHIP_CACHE_TTL', '30'))
+MEMBERSHIP_CACHE_MAX_ENTRIES = int(os.environ.get('MEMBERSHIP_CACHE_MAX_ENTRIES', '50000'))
+
+# Bulk ledger import
+LEDGER_IMPORT_MAX_ROWS = int(os.environ.get('LEDGER_IMPORT_MAX_ROWS', '20000'))
+LEDGER_IMPORT_CHUNK_SIZE = int(os.environ.get('LEDGER_IMPORT_CHUNK_SIZE', '1000'))
+TASK_BULK_MAX_OPS = int(os.environ.get('TASK_BULK_MAX_OPS', '500'))
+
+# Create missing indexes from the registry (indexes.py) when the API starts
+APPLY_INDEXES_ON_STARTUP = os.environ.get('APPLY_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
+# Cache for computed startup reports: memory (default), redis or off
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory').lower()
+RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Most startups returned by GET /investors/portfolio
+PORTFOLIO_MAX_STARTUPS = int(os.environ.get('PORTFOLIO_MAX_STARTUPS', '500'))
+
+# Runway forecasts, cached per startup until the ledger changes
+FORECAST_CACHE_TTL = int(os.environ.get('FORECAST_CACHE_TTL', '3600'))
+FORECAST_CACHE_MAX_ENTRIES = int(os.environ.get('FORECAST_CACHE_MAX_ENTRIES', '10000'))
 
 # Gemini API key
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', '8'))
+AI_CALL_TIMEOUT = float(os.environ.get('AI_CALL_TIMEOUT', '60'))
+AI_DIGEST_MAX_TOKENS = int(os.environ.get('AI_DIGEST_MAX_TOKENS', '400'))
+AI_RESULT_CACHE_TTL = int(os.environ.get('AI_RESULT_CACHE_TTL', '604800'))
+AI_RATE_LIMITS_ENABLED = os.environ.get('AI_RATE_LIMITS_ENABLED', 'true').lower() == 'true'
+AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', '4'))
+AI_JOB_MAX_PENDING = int(os.environ.get('AI_JOB_MAX_PENDING', '200'))
+AI_JOB_TTL = int(os.environ.get('AI_JOB_TTL', '86400'))
+AI_JOB_STALE_AFTER = float(os.environ.get('AI_JOB_STALE_AFTER', '600'))
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -92,9 +166,11 @@ class FeedbackCreate(BaseModel):
 class AIInsightRequest(BaseModel):
     startup_id: str
     prompt_type: Optional[str] = "general"
+    force_refresh: bool = False
 
 class PitchRequest(BaseModel):
     startup_id: str
+    force_refresh: bool = False
 
 class SubscriptionUpdate(BaseModel):
     plan: str
@@ -105,6 +181,16 @@ class MemberRoleUpdate(BaseModel):
 class TaskStatusUpdate(BaseModel):
     status: str
 
+class TaskBulkOperation(BaseModel):
+    op: Literal["create", "update", "status", "delete"]
+    task_id: Optional[str] = None  # update, status, delete
+    task: Optional[TaskCreate] = None  # create
+    changes: Optional[TaskUpdate] = None  # update
+    status: Optional[str] = None  # status
+
+class TaskBulkRequest(BaseModel):
+    operations: List[TaskBulkOperation]
+
 # Finance Models
 class IncomeCreate(BaseModel):
     title: str
@@ -128,6 +214,16 @@ class InvestmentCreate(BaseModel):
     date: Optional[str] = None
     notes: Optional[str] = None
 
+class HiringPlanItem(BaseModel):
+    start_month: str = Field(pattern=r"^\d{4}-(0[1-9]|1[0-2])$")  # YYYY-MM
+    headcount: int = Field(1, ge=1)
+    monthly_cost: float = Field(ge=0)  # per hire
+
+class ForecastRequest(BaseModel):
+    horizon_months: int = Field(24, ge=1, le=60)
+    base_window: Literal[3, 6, 12] = 6
+    hiring_plan: List[HiringPlanItem] = []
+
 class InvestorInviteCreate(BaseModel):
     email: str
     name: str
@@ -140,8 +236,200 @@ class SignupRequest(BaseModel):
     password: str
     full_name: Optional[str] = None
 
+class AuthUser(BaseModel):
+    """Authenticated user as seen by the routes (mirrors the Supabase user fields we use)."""
+    id: str
+    email: str = ""
+    role: Optional[str] = None
+    user_metadata: dict = Field(default_factory=dict)
+    app_metadata: dict = Field(default_factory=dict)
+
+# ==================== SUPABASE GATEWAY ====================
+
+class SupabaseTimeout(Exception):
+    """Raised when a Supabase call does not finish within its timeout."""
+
+class SupabaseGateway:
+    """Runs the blocking supabase-py SDK off the event loop.
+
+    Calls go through a bounded thread pool and a concurrency semaphore, and each
+    one is given a timeout. A slot is only released once the underlying call
+    really finishes, so calls that hang past their timeout cannot pile up threads.
+    """
+
+    def __init__(self, client: Client, max_workers: int, max_concurrency: int, timeout: float):
+        self.client = client
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call(self, fn, *args, timeout: Optional[float] = None, **kwargs):
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise SupabaseTimeout(f"No Supabase slot free within {timeout}s")
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(lambda _: self._semaphore.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            raise SupabaseTimeout(f"{getattr(fn, '__name__', 'Supabase call')} timed out after {timeout}s")
+
+    async def get_user(self, token: str):
+        return await self.call(self.client.auth.get_user, token)
+
+    async def create_user(self, attributes: dict):
+        return await self.call(self.client.auth.admin.create_user, attributes)
+
+    async def sign_in_with_password(self, credentials: dict):
+        return await self.call(self.client.auth.sign_in_with_password, credentials)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+supabase_gateway = SupabaseGateway(supabase_client, SUPABASE_MAX_WORKERS, SUPABASE_MAX_CONCURRENCY, SUPABASE_CALL_TIMEOUT)
+
 # ==================== AUTH DEPENDENCY ====================
 
+class SigningKeyUnavailable(Exception):
+    """Raised when a token cannot be checked locally because no key material is available."""
+
+_jwks_cache = {"keys": {}, "fetched_at": 0.0, "attempted_at": 0.0, "failures": 0}
+
+# Verified tokens, keyed by sha256(token). Entries expire at the token's own `exp`
+# (capped at AUTH_CACHE_TTL) so a cached user never outlives the token.
+_verified_tokens = TLRUCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttu=lambda key, value, now: value[1], timer=time.time)
+_rejected_tokens = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_NEGATIVE_CACHE_TTL)
+auth_cache_stats = {"hits": 0, "misses": 0, "negative_hits": 0}
+_jwks_lock = asyncio.Lock()
+JWKS_MIN_REFRESH_INTERVAL = 60
+JWKS_RETRY_BACKOFF = 2  # seconds after the first failed fetch, doubling up to JWKS_MIN_REFRESH_INTERVAL
+
+def _jwks_fetch_due(now: float) -> bool:
+    if _jwks_cache["failures"]:
+        backoff = min(JWKS_RETRY_BACKOFF * 2 ** (_jwks_cache["failures"] - 1), JWKS_MIN_REFRESH_INTERVAL)
+        return now - _jwks_cache["attempted_at"] >= backoff
+    return not _jwks_cache["fetched_at"] or now - _jwks_cache["fetched_at"] >= JWKS_MIN_REFRESH_INTERVAL
+
+async def _get_jwks_key(kid: Optional[str]):
+    """Return the signing key for `kid` from the cached JWKS, refreshing it when stale or unknown."""
+    if not SUPABASE_JWKS_URL:
+        raise SigningKeyUnavailable("No JWKS URL configured")
+    age = time.monotonic() - _jwks_cache["fetched_at"]
+    key = _jwks_cache["keys"].get(kid)
+    if key is not None and age < JWKS_CACHE_TTL:
+        return key
+    async with _jwks_lock:
+        age = time.monotonic() - _jwks_cache["fetched_at"]
+        key = _jwks_cache["keys"].get(kid)
+        # Refetch when the cache expired, or when an unknown kid shows up (key rotation),
+        # but never hammer the endpoint more than once per JWKS_MIN_REFRESH_INTERVAL,
+        # and back off after failed fetches instead of retrying on every request.
+        if (key is None or age >= JWKS_CACHE_TTL) and _jwks_fetch_due(time.monotonic()):
+            _jwks_cache["attempted_at"] = time.monotonic()
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as http:
+                    resp = await http.get(SUPABASE_JWKS_URL, headers={"apikey": supabase_service_key or ""})
+                    resp.raise_for_status()
+                    jwks = resp.json()
+                keys = {}
+                for jwk in jwks.get("keys", []):
+                    try:
+                        keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+                    except jwt.PyJWTError as e:
+                        logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+                _jwks_cache["keys"] = keys
+                _jwks_cache["fetched_at"] = time.monotonic()
+                _jwks_cache["failures"] = 0
+                logger.info(f"Loaded {len(keys)} signing keys from JWKS")
+            except Exception as e:
+                _jwks_cache["failures"] += 1
+                logger.error(f"JWKS fetch failed ({_jwks_cache['failures']} in a row): {type(e).__name__}: {e}")
+            key = _jwks_cache["keys"].get(kid)
+    if key is None:
+        raise SigningKeyUnavailable(f"No signing key for kid {kid}")
+    return key
+
+async def verify_token_locally(token: str) -> dict:
+    """Check signature, exp, aud and iss of a Supabase access token and return its claims.
+
+    Raises jwt.InvalidTokenError for tokens that are definitely invalid and
+    SigningKeyUnavailable when the token cannot be checked without Supabase.
+    """
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg")
+    if alg == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            raise SigningKeyUnavailable("SUPABASE_JWT_SECRET is not configured")
+        key = SUPABASE_JWT_SECRET
+    elif alg in ("RS256", "ES256", "EdDSA"):
+        key = await _get_jwks_key(header.get("kid"))
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {alg}")
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=SUPABASE_JWT_AUDIENCE,
+        issuer=SUPABASE_JWT_ISSUER,
+        leeway=10,
+        options={"require": ["exp", "sub"], "verify_iss": bool(SUPABASE_JWT_ISSUER)},
+    )
+
+def user_from_claims(claims: dict) -> AuthUser:
+    return AuthUser(
+        id=claims["sub"],
+        email=claims.get("email") or "",
+        role=claims.get("role"),
+        user_metadata=claims.get("user_metadata") or {},
+        app_metadata=claims.get("app_metadata") or {},
+    )
+
+async def _verify_token_remotely(token: str) -> AuthUser:
+    user_response = await supabase_gateway.get_user(token)
+    if not user_response or not user_response.user:
+        logger.error("Supabase returned no user for token")
+        raise TokenRejected("Supabase returned no user for token")
+    u = user_response.user
+    return AuthUser(
+        id=u.id,
+        email=u.email or "",
+        role=u.role,
+        user_metadata=u.user_metadata or {},
+        app_metadata=u.app_metadata or {},
+    )
+
+class TokenRejected(Exception):
+    """Raised when a token is definitely invalid, so the rejection may be cached."""
+
+async def _authenticate_token(token: str) -> AuthUser:
+    if AUTH_VERIFY_MODE == 'local':
+        try:
+            user = user_from_claims(await verify_token_locally(token))
+            logger.debug(f"User authenticated locally: {user.email}")
+            return user
+        except SigningKeyUnavailable as e:
+            if not AUTH_REMOTE_FALLBACK:
+                logger.error(f"Cannot verify token locally and remote fallback is disabled: {e}")
+                raise HTTPException(status_code=401, detail="Invalid or expired token")
+            logger.warning(f"Falling back to remote token verification: {e}")
+        except jwt.InvalidTokenError as e:
+            raise TokenRejected(f"{type(e).__name__}: {e}")
+    user = await _verify_token_remotely(token)
+    logger.info(f"User authenticated: {user.email}")
+    return user
+
+def _token_expiry(token: str) -> float:
+    """Read `exp` from a token whose signature has already been checked."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        return float(exp) if exp else 0.0
+    except jwt.PyJWTError:
+        return 0.0
+
 async def get_current_user(request: Request):
     auth_header = request.headers.get('authorization', '')
     if not auth_header.startswith('Bearer '):
@@ -151,38 +439,219 @@ async def get_current_user(request: Request):
     if not token or token == 'undefined' or token == 'null':
         logger.warning(f"Invalid token value: {token[:20] if token else 'empty'}...")
         raise HTTPException(status_code=401, detail="No valid token provided")
+
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        auth_cache_stats["hits"] += 1
+        return cached[0]
+    if cache_key in _rejected_tokens:
+        auth_cache_stats["negative_hits"] += 1
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    auth_cache_stats["misses"] += 1
+
     try:
-        user_response = supabase_client.auth.get_user(token)
-        if not user_response or not user_response.user:
-            logger.error("Supabase returned no user for token")
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        logger.info(f"User authenticated: {user_response.user.email}")
-        return user_response.user
+        user = await _authenticate_token(token)
     except HTTPException:
         raise
+    except TokenRejected as e:
+        logger.warning(f"Rejected token: {e}")
+        _rejected_tokens[cache_key] = True
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    except SupabaseTimeout as e:
+        logger.error(f"Auth verification timed out: {e}")
+        raise HTTPException(status_code=503, detail="Authentication service unavailable")
     except Exception as e:
         logger.error(f"Auth error for token prefix {token[:30]}...: {type(e).__name__}: {e}")
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    expires_at = min(_token_expiry(token), time.time() + AUTH_CACHE_TTL)
+    if expires_at > time.time():
+        _verified_tokens[cache_key] = (user, expires_at)
+    return user
+
+# ==================== MEMBERSHIP CACHE ====================
+
+# Membership lookups are resolved request-scoped first, then from a short-lived
+# process cache, then from Mongo. Non-membership is cached too, so every route
+# that writes startup_members must call invalidate_membership().
+_membership_cache = TTLCache(maxsize=MEMBERSHIP_CACHE_MAX_ENTRIES, ttl=MEMBERSHIP_CACHE_TTL)
+_request_memberships: ContextVar[Optional[dict]] = ContextVar("request_memberships", default=None)
+_NOT_A_MEMBER = object()
+
+async def get_membership(startup_id: str, user_id: str) -> Optional[dict]:
+    """Return the startup_members document for (startup_id, user_id), or None."""
+    key = (startup_id, user_id)
+    scoped = _request_memberships.get()
+    if scoped is not None and key in scoped:
+        member = scoped[key]
+    else:
+        member = _membership_cache.get(key)
+        if member is None:
+            member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user_id}, {"_id": 0})
+            member = member or _NOT_A_MEMBER
+            _membership_cache[key] = member
+        if scoped is not None:
+            scoped[key] = member
+    return None if member is _NOT_A_MEMBER else member
+
+def invalidate_membership(startup_id: str, user_id: Optional[str] = None):
+    """Drop cached memberships for one user of a startup, or for the whole startup."""
+    scoped = _request_memberships.get()
+    caches = [_membership_cache] + ([scoped] if scoped is not None else [])
+    for cache in caches:
+        if user_id is not None:
+            cache.pop((startup_id, user_id), None)
+        else:
+            for key in [k for k in list(cache.keys()) if k[0] == startup_id]:
+                cache.pop(key, None)
+
+# ==================== PROFILE LOADER ====================
+
+PROFILE_LISTING_FIELDS = {"_id": 0, "id": 1, "email": 1, "full_name": 1, "avatar_url": 1}
+
+async def load_profiles(user_ids, projection: Optional[dict] = None) -> dict:
+    """Fetch the profiles for many users with one `$in` query, keyed by user id.
+
+    Use this whenever memberships are joined to profiles instead of calling
+    find_one per member.
+    """
+    ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+    if not ids:
+        return {}
+    cursor = db.profiles.find({"id": {"$in": ids}}, projection or PROFILE_LISTING_FIELDS)
+    return {p["id"]: p for p in await cursor.to_list(len(ids))}
+
+# ==================== PAGINATION ====================
+
+# List endpoints keep returning plain JSON arrays. When more rows exist, the
+# opaque cursor for the next page is sent in the X-Next-Cursor header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort_field: str, order: str):
+    try:
+        value, last_id, field, cursor_order = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if field != sort_field or cursor_order != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return value, last_id
+
+def date_range_filter(field: str, date_from: Optional[date], date_to: Optional[date]) -> dict:
+    """Inclusive date range on a YYYY-MM-DD or ISO timestamp string field."""
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from.isoformat()
+    if date_to:
+        bounds["$lt"] = (date_to + timedelta(days=1)).isoformat()
+    return {field: bounds} if bounds else {}
+
+async def fetch_page(collection, query: dict, response: Response, *, sort_field: str, order: str, limit: int, cursor: Optional[str] = None) -> list:
+    """Keyset-paginate `collection` on (sort_field, id).
+
+    Sets the X-Next-Cursor header when another page exists.
+    """
+    direction = -1 if order == "desc" else 1
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_field, order)
+        op = "$lt" if direction == -1 else "$gt"
+        query = {"$and": [query, {"$or": [{sort_field: {op: value}}, {sort_field: value, "id": {op: last_id}}]}]}
+    docs = await collection.find(query, {"_id": 0}).sort([(sort_field, direction), ("id", direction)]).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor([last.get(sort_field), last["id"], sort_field, order])
+    return docs
+
+# ==================== DATA VERSIONS ====================
+
+async def bump_data_version(startup_id: str):
+    """Mark a startup's data as changed. Every route that writes startup data calls this."""
+    await db.startup_versions.update_one({"startup_id": startup_id}, {"$inc": {"version": 1}}, upsert=True)
+    await response_cache.invalidate(startup_id)
+
+async def get_data_version(startup_id: str) -> int:
+    doc = await db.startup_versions.find_one({"startup_id": startup_id}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+async def not_modified(request: Request, response: Response, startup_id: str) -> Optional[Response]:
+    """Conditional GET on the startup's data version.
+
+    Sets a strong ETag over (path, query string, version) on `response` and
+    returns a 304 response when the client's If-None-Match already matches,
+    before the route runs any of its queries. Must be called before reading
+    the data, so a concurrent write can only make the ETag older than the body.
+    """
+    version = await get_data_version(startup_id)
+    request.state.data_version = version
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha256(f"{request.url.path}?{query}#{version}".encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# ==================== RESPONSE CACHE ====================
+
+def _build_response_cache() -> rcache.ResponseCache:
+    if RESPONSE_CACHE_BACKEND == "off":
+        return rcache.NullCache()
+    if RESPONSE_CACHE_BACKEND == "redis":
+        backend = rcache.RedisBackend.from_url(RESPONSE_CACHE_URL)
+    else:
+        backend = rcache.MemoryBackend(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+    return rcache.ResponseCache(backend, RESPONSE_CACHE_TTL)
+
+response_cache = _build_response_cache()
+
+async def cached_report(startup_id: str, endpoint: str, compute, version: Optional[int] = None):
+    """Serve a computed per-startup report from the response cache.
+
+    Pass the version `not_modified` already read (request.state.data_version) to
+    save a lookup; writes invalidate entries through bump_data_version.
+    """
+    if version is None:
+        version = await get_data_version(startup_id)
+    return await response_cache.get_or_compute(startup_id, endpoint, version, compute)
+
 # ==================== HEALTH CHECK ====================
 
 @api_router.get("/")
 async def root():
     return {"message": "Velora API is running"}
 
+@api_router.get("/health/cache")
+async def cache_health():
+    """Hit ratio, size and error counters of the response cache."""
+    return response_cache.stats()
+
+@api_router.get("/health/ai")
+async def ai_health():
+    """AI gateway availability, job queue depth and rate limiter counters."""
+    return {"available": ai_gateway.available, "jobs": ai_jobs.stats(), "limits": ai_limiter.stats()}
+
 # ==================== AUTH ROUTES ====================
 
 @api_router.post("/auth/signup")
 async def signup_user(body: SignupRequest):
     """Create user with auto-confirm so they can start immediately."""
     try:
-        user_response = supabase_client.auth.admin.create_user({
+        user_response = await supabase_gateway.create_user({
             "email": body.email,
             "password": body.password,
             "email_confirm": True,
             "user_metadata": {"full_name": body.full_name or body.email.split("@")[0]},
         })
         return {"message": "Account created", "user_id": user_response.user.id}
+    except SupabaseTimeout as e:
+        logger.error(f"Signup timed out: {e}")
+        raise HTTPException(status_code=504, detail="Authentication service timed out")
     except Exception as e:
         error_msg = str(e)
         if "already been registered" in error_msg or "already exists" in error_msg:
@@ -250,6 +719,8 @@ async def create_startup(body: StartupCreate, user=Depends(get_current_user)):
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }
     await db.startups.insert_one(startup)
+    await db.startup_stats.insert_one(startup_stats.empty_stats(startup["id"]))
+    await db.finance_rollup_state.insert_one({"startup_id": startup["id"], "version": 0, "rebuilt_at": startup["created_at"]})
     member = {
         "id": str(uuid.uuid4()),
         "startup_id": startup["id"],
@@ -258,21 +729,36 @@ async def create_startup(body: StartupCreate, user=Depends(get_current_user)):
         "joined_at": datetime.now(timezone.utc).isoformat(),
     }
     await db.startup_members.insert_one(member)
+    invalidate_membership(startup["id"], user.id)
     return {k: v for k, v in startup.items() if k != "_id"}
 
 @api_router.get("/startups")
-async def get_user_startups(user=Depends(get_current_user)):
-    memberships = await db.startup_members.find({"user_id": user.id}, {"_id": 0}).to_list(100)
-    startup_ids = [m["startup_id"] for m in memberships]
-    startups = await db.startups.find({"id": {"$in": startup_ids}}, {"_id": 0}).to_list(100)
-    for s in startups:
-        membership = next((m for m in memberships if m["startup_id"] == s["id"]), None)
-        s["user_role"] = membership["role"] if membership else "member"
-    return startups
+async def get_user_startups(
+    response: Response,
+    role: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    query = {"user_id": user.id}
+    if role:
+        query["role"] = role
+    memberships = await fetch_page(db.startup_members, query, response, sort_field="joined_at", order=order, limit=limit, cursor=cursor)
+    roles = {m["startup_id"]: m["role"] for m in memberships}
+    startups = await db.startups.find({"id": {"$in": list(roles)}}, {"_id": 0}).to_list(len(roles))
+    by_id = {s["id"]: s for s in startups}
+    result = []
+    for startup_id, member_role in roles.items():
+        s = by_id.get(startup_id)
+        if s:
+            s["user_role"] = member_role
+            result.append(s)
+    return result
 
 @api_router.get("/startups/{startup_id}")
 async def get_startup(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member of this startup")
     startup = await db.startups.find_one({"id": startup_id}, {"_id": 0})
@@ -283,7 +769,7 @@ async def get_startup(startup_id: str, user=Depends(get_current_user)):
 
 @api_router.put("/startups/{startup_id}")
 async def update_startup(startup_id: str, body: StartupUpdate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can update startup")
     updates = {"updated_at": datetime.now(timezone.utc).isoformat()}
@@ -292,6 +778,7 @@ async def update_startup(startup_id: str, body: StartupUpdate, user=Depends(get_
         if val is not None:
             updates[field] = val
     await db.startups.update_one({"id": startup_id}, {"$set": updates})
+    await bump_data_version(startup_id)
     startup = await db.startups.find_one({"id": startup_id}, {"_id": 0})
     return startup
 
@@ -300,7 +787,7 @@ async def join_startup(body: JoinStartupRequest, user=Depends(get_current_user))
     startup = await db.startups.find_one({"invite_code": body.invite_code}, {"_id": 0})
     if not startup:
         raise HTTPException(status_code=404, detail="Invalid invite code")
-    existing = await db.startup_members.find_one({"startup_id": startup["id"], "user_id": user.id})
+    existing = await get_membership(startup["id"], user.id)
     if existing:
         raise HTTPException(status_code=400, detail="Already a member")
     member_count = await db.startup_members.count_documents({"startup_id": startup["id"]})
@@ -316,16 +803,16 @@ async def join_startup(body: JoinStartupRequest, user=Depends(get_current_user))
         "joined_at": datetime.now(timezone.utc).isoformat(),
     }
     await db.startup_members.insert_one(member)
+    invalidate_membership(startup["id"], user.id)
+    await bump_data_version(startup["id"])
     return {k: v for k, v in startup.items() if k != "_id"}
 
 # ==================== TASK ROUTES ====================
 
-@api_router.post("/startups/{startup_id}/tasks")
-async def create_task(startup_id: str, body: TaskCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
-    if not member:
-        raise HTTPException(status_code=403, detail="Not a member")
-    task = {
+VALID_TASK_STATUSES = ["todo", "in_progress", "review", "done"]
+
+def task_doc(startup_id: str, body: TaskCreate, user_id: str) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "startup_id": startup_id,
         "title": body.title,
@@ -333,21 +820,59 @@ async def create_task(startup_id: str, body: TaskCreate, user=Depends(get_curren
         "status": body.status or "todo",
         "priority": body.priority or "medium",
         "assigned_to": body.assigned_to,
-        "created_by": user.id,
+        "created_by": user_id,
         "milestone_id": body.milestone_id,
         "due_date": body.due_date,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }
-    await db.tasks.insert_one(task)
+
+def task_updates(body: TaskUpdate) -> dict:
+    updates = {"updated_at": datetime.now(timezone.utc).isoformat()}
+    for field in ["title", "description", "status", "priority", "assigned_to", "milestone_id", "due_date"]:
+        val = getattr(body, field, None)
+        if val is not None:
+            updates[field] = val
+    return updates
+
+@api_router.post("/startups/{startup_id}/tasks")
+async def create_task(startup_id: str, body: TaskCreate, user=Depends(get_current_user)):
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    task = task_doc(startup_id, body, user.id)
+    async with startup_stats.writing(db, startup_id):
+        await db.tasks.insert_one(task)
+        await startup_stats.on_task_change(db, startup_id, None, task)
+    await bump_data_version(startup_id)
     return {k: v for k, v in task.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/tasks")
-async def get_tasks(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_tasks(
+    startup_id: str,
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assignee: Optional[str] = None,
+    milestone_id: Optional[str] = None,
+    sort: Literal["created_at", "updated_at"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    tasks = await db.tasks.find({"startup_id": startup_id}, {"_id": 0}).to_list(1000)
+    cached = await not_modified(request, response, startup_id)
+    if cached:
+        return cached
+    query = {"startup_id": startup_id}
+    for field, val in [("status", status), ("priority", priority), ("assigned_to", assignee), ("milestone_id", milestone_id)]:
+        if val is not None:
+            query[field] = val
+    tasks = await fetch_page(db.tasks, query, response, sort_field=sort, order=order, limit=limit, cursor=cursor)
     return tasks
 
 @api_router.put("/tasks/{task_id}")
@@ -355,16 +880,18 @@ async def update_task(task_id: str, body: TaskUpdate, user=Depends(get_current_u
     task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    member = await db.startup_members.find_one({"startup_id": task["startup_id"], "user_id": user.id})
+    member = await get_membership(task["startup_id"], user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    updates = {"updated_at": datetime.now(timezone.utc).isoformat()}
-    for field in ["title", "description", "status", "priority", "assigned_to", "milestone_id", "due_date"]:
-        val = getattr(body, field, None)
-        if val is not None:
-            updates[field] = val
-    await db.tasks.update_one({"id": task_id}, {"$set": updates})
-    updated = await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    updates = task_updates(body)
+    async with startup_stats.writing(db, task["startup_id"]):
+        before = await db.tasks.find_one_and_update({"id": task_id}, {"$set": updates}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+        if before:
+            updated = {**before, **updates}
+            await startup_stats.on_task_change(db, before["startup_id"], before, updated)
+    if not before:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await bump_data_version(before["startup_id"])
     return updated
 
 @api_router.delete("/tasks/{task_id}")
@@ -372,10 +899,15 @@ async def delete_task(task_id: str, user=Depends(get_current_user)):
     task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    member = await db.startup_members.find_one({"startup_id": task["startup_id"], "user_id": user.id})
+    member = await get_membership(task["startup_id"], user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    await db.tasks.delete_one({"id": task_id})
+    async with startup_stats.writing(db, task["startup_id"]):
+        deleted = await db.tasks.find_one_and_delete({"id": task_id}, projection={"_id": 0})
+        if deleted:
+            await startup_stats.on_task_change(db, deleted["startup_id"], deleted, None)
+    if deleted:
+        await bump_data_version(deleted["startup_id"])
     return {"success": True}
 
 @api_router.patch("/tasks/{task_id}/status")
@@ -387,7 +919,7 @@ async def update_task_status(task_id: str, body: TaskStatusUpdate, user=Depends(
         logger.error(f"Task not found: task_id={task_id}")
         raise HTTPException(status_code=404, detail="Task not found")
     
-    member = await db.startup_members.find_one({"startup_id": task["startup_id"], "user_id": user.id})
+    member = await get_membership(task["startup_id"], user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     
@@ -398,23 +930,131 @@ async def update_task_status(task_id: str, body: TaskStatusUpdate, user=Depends(
     if not is_assigned and not is_manager_or_founder:
         raise HTTPException(status_code=403, detail="You can only update status of tasks assigned to you")
     
-    valid_statuses = ["todo", "in_progress", "review", "done"]
-    if body.status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
+    if body.status not in VALID_TASK_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {VALID_TASK_STATUSES}")
     
-    await db.tasks.update_one(
-        {"id": task_id}, 
-        {"$set": {"status": body.status, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
-    updated = await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    updates = {"status": body.status, "updated_at": datetime.now(timezone.utc).isoformat()}
+    async with startup_stats.writing(db, task["startup_id"]):
+        before = await db.tasks.find_one_and_update({"id": task_id}, {"$set": updates}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+        if before:
+            updated = {**before, **updates}
+            await startup_stats.on_task_change(db, before["startup_id"], before, updated)
+    if not before:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await bump_data_version(before["startup_id"])
     logger.info(f"Task status updated successfully: task_id={task_id}")
     return updated
 
+def _task_guard(startup_id: str, task: dict) -> dict:
+    """Filter that only matches the task while its counted fields are as we read them."""
+    return {"id": task["id"], "startup_id": startup_id, "status": task.get("status"), "priority": task.get("priority")}
+
+async def _mark_bulk_conflicts(startup_id: str, done: list, results: list):
+    ids = list({(after or before)["id"] for _, _, before, after in done if before})
+    stored = {t["id"]: t for t in await db.tasks.find({"id": {"$in": ids}, "startup_id": startup_id}, {"_id": 0}).to_list(None)}
+    for i, _, before, after in done:
+        if not before:
+            continue
+        task = stored.get(before["id"])
+        applied = task is None if after is None else task is not None and all(task.get(k) == after.get(k) for k in ("status", "priority", "updated_at"))
+        if not applied:
+            results[i].update(status_code=409, task=None, detail="Task was modified concurrently")
+
+def _bulk_item(index: int, op: str, task_id: Optional[str], status_code: int, task: Optional[dict] = None, detail: Optional[str] = None) -> dict:
+    return {"index": index, "op": op, "task_id": task_id, "status_code": status_code, "task": task, "detail": detail}
+
+@api_router.post("/startups/{startup_id}/tasks/bulk")
+async def bulk_tasks(startup_id: str, body: TaskBulkRequest, user=Depends(get_current_user)):
+    """Create, update, change the status of, or delete many tasks in one request.
+
+    Permissions are the same as the single-task routes. Every operation gets its
+    own result (status_code 200/201 on success, 400/403/404/409 otherwise); the
+    valid ones are applied with one ordered bulk_write and one startup_stats update.
+    """
+    if len(body.operations) > TASK_BULK_MAX_OPS:
+        raise HTTPException(status_code=400, detail=f"At most {TASK_BULK_MAX_OPS} operations per request")
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    is_manager_or_founder = member["role"] in ["founder", "manager"]
+
+    ids = {op.task_id for op in body.operations if op.task_id}
+    current = {t["id"]: t for t in await db.tasks.find({"id": {"$in": list(ids)}, "startup_id": startup_id}, {"_id": 0}).to_list(None)}
+
+    results = []
+    requests = []  # (result index, write request, task before, task after)
+    for i, op in enumerate(body.operations):
+        if op.op == "create":
+            if not op.task:
+                results.append(_bulk_item(i, op.op, None, 400, detail="`task` is required"))
+                continue
+            task = task_doc(startup_id, op.task, user.id)
+            results.append(_bulk_item(i, op.op, task["id"], 201, task))
+            requests.append((i, InsertOne(dict(task)), None, task))
+            continue
+
+        before = current.get(op.task_id)
+        if not before:
+            results.append(_bulk_item(i, op.op, op.task_id, 404, detail="Task not found"))
+            continue
+        if op.op == "delete":
+            after = None
+            request = DeleteOne(_task_guard(startup_id, before))
+        else:
+            if op.op == "update":
+                if not op.changes:
+                    results.append(_bulk_item(i, op.op, op.task_id, 400, detail="`changes` is required"))
+                    continue
+                updates = task_updates(op.changes)
+            else:
+                if op.status not in VALID_TASK_STATUSES:
+                    results.append(_bulk_item(i, op.op, op.task_id, 400, detail=f"Invalid status. Must be one of: {VALID_TASK_STATUSES}"))
+                    continue
+                if before.get("assigned_to") != user.id and not is_manager_or_founder:
+                    results.append(_bulk_item(i, op.op, op.task_id, 403, detail="You can only update status of tasks assigned to you"))
+                    continue
+                updates = {"status": op.status, "updated_at": datetime.now(timezone.utc).isoformat()}
+            after = {**before, **updates}
+            request = UpdateOne(_task_guard(startup_id, before), {"$set": updates})
+        current[op.task_id] = after
+        results.append(_bulk_item(i, op.op, op.task_id, 200, after))
+        requests.append((i, request, before, after))
+
+    if requests:
+        applied = len(requests)
+        async with startup_stats.writing(db, startup_id):
+            try:
+                result = await db.tasks.bulk_write([r for _, r, _, _ in requests], ordered=True)
+                matched, removed = result.matched_count, result.deleted_count
+            except BulkWriteError as e:
+                # Ordered: everything from the first failed write on was not applied
+                applied = e.details["writeErrors"][0]["index"]
+                matched, removed = e.details.get("nMatched", 0), e.details.get("nRemoved", 0)
+                for n, (i, *_rest) in enumerate(requests[applied:]):
+                    results[i].update(status_code=409, task=None, detail="Not applied" if n else e.details["writeErrors"][0].get("errmsg", "Write failed"))
+            done = requests[:applied]
+            expected_matched = sum(1 for _, r, _, _ in done if isinstance(r, UpdateOne))
+            expected_removed = sum(1 for _, r, _, _ in done if isinstance(r, DeleteOne))
+            consistent = matched == expected_matched and removed == expected_removed
+            if consistent:
+                inc = {}
+                for _, _, before, after in done:
+                    inc = startup_stats.diff(inc, startup_stats.diff(startup_stats.task_counters(before, -1) if before else {}, startup_stats.task_counters(after) if after else {}))
+                await startup_stats.apply(db, startup_id, inc)
+        if not consistent:
+            # A task changed between our read and the write, so some guarded writes matched nothing.
+            # Rebuilt once our own write is no longer counted as in flight.
+            await _mark_bulk_conflicts(startup_id, done, results)
+            await startup_stats.rebuild(db, startup_id)
+        await bump_data_version(startup_id)
+
+    return {"results": results, "succeeded": sum(1 for r in results if r["status_code"] < 300), "failed": sum(1 for r in results if r["status_code"] >= 300)}
+
 # ==================== MILESTONE ROUTES ====================
 
 @api_router.post("/startups/{startup_id}/milestones")
 async def create_milestone(startup_id: str, body: MilestoneCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     milestone = {
@@ -427,19 +1067,40 @@ async def create_milestone(startup_id: str, body: MilestoneCreate, user=Depends(
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }
-    await db.milestones.insert_one(milestone)
+    async with startup_stats.writing(db, startup_id):
+        await db.milestones.insert_one(milestone)
+        await startup_stats.on_milestone_change(db, startup_id, None, milestone)
+    await bump_data_version(startup_id)
     return {k: v for k, v in milestone.items() if k != "_id"}
 
+async def get_milestone_progress(startup_id: str) -> dict:
+    """Return {milestone_id: (task_count, tasks_done)} for every milestone of a startup in one aggregation.
+
+    Served from the (startup_id, milestone_id, status) index without touching task documents.
+    """
+    pipeline = [
+        {"$match": {"startup_id": startup_id, "milestone_id": {"$ne": None}}},
+        {"$group": {
+            "_id": "$milestone_id",
+            "task_count": {"$sum": 1},
+            "tasks_done": {"$sum": {"$cond": [{"$eq": ["$status", "done"]}, 1, 0]}},
+        }},
+    ]
+    rows = await db.tasks.aggregate(pipeline).to_list(None)
+    return {r["_id"]: (r["task_count"], r["tasks_done"]) for r in rows}
+
 @api_router.get("/startups/{startup_id}/milestones")
-async def get_milestones(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_milestones(startup_id: str, request: Request, response: Response, user=Depends(get_current_user)):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
+    cached = await not_modified(request, response, startup_id)
+    if cached:
+        return cached
     milestones = await db.milestones.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
+    progress = await get_milestone_progress(startup_id)
     for m in milestones:
-        tasks = await db.tasks.find({"milestone_id": m["id"]}, {"_id": 0}).to_list(100)
-        total = len(tasks)
-        done = len([t for t in tasks if t.get("status") == "done"])
+        total, done = progress.get(m["id"], (0, 0))
         m["progress"] = int((done / total) * 100) if total > 0 else 0
         m["task_count"] = total
         m["tasks_done"] = done
@@ -450,7 +1111,7 @@ async def update_milestone(milestone_id: str, body: MilestoneUpdate, user=Depend
     milestone = await db.milestones.find_one({"id": milestone_id}, {"_id": 0})
     if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
-    member = await db.startup_members.find_one({"startup_id": milestone["startup_id"], "user_id": user.id})
+    member = await get_membership(milestone["startup_id"], user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     updates = {"updated_at": datetime.now(timezone.utc).isoformat()}
@@ -458,8 +1119,14 @@ async def update_milestone(milestone_id: str, body: MilestoneUpdate, user=Depend
         val = getattr(body, field, None)
         if val is not None:
             updates[field] = val
-    await db.milestones.update_one({"id": milestone_id}, {"$set": updates})
-    updated = await db.milestones.find_one({"id": milestone_id}, {"_id": 0})
+    async with startup_stats.writing(db, milestone["startup_id"]):
+        before = await db.milestones.find_one_and_update({"id": milestone_id}, {"$set": updates}, projection={"_id": 0}, return_document=ReturnDocument.BEFORE)
+        if before:
+            updated = {**before, **updates}
+            await startup_stats.on_milestone_change(db, before["startup_id"], before, updated)
+    if not before:
+        raise HTTPException(status_code=404, detail="Milestone not found")
+    await bump_data_version(before["startup_id"])
     return updated
 
 @api_router.delete("/milestones/{milestone_id}")
@@ -467,18 +1134,22 @@ async def delete_milestone(milestone_id: str, user=Depends(get_current_user)):
     milestone = await db.milestones.find_one({"id": milestone_id}, {"_id": 0})
     if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
-    member = await db.startup_members.find_one({"startup_id": milestone["startup_id"], "user_id": user.id})
+    member = await get_membership(milestone["startup_id"], user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    await db.milestones.delete_one({"id": milestone_id})
+    async with startup_stats.writing(db, milestone["startup_id"]):
+        deleted = await db.milestones.find_one_and_delete({"id": milestone_id}, projection={"_id": 0})
+        if deleted:
+            await startup_stats.on_milestone_change(db, deleted["startup_id"], deleted, None)
     await db.tasks.update_many({"milestone_id": milestone_id}, {"$set": {"milestone_id": None}})
+    await bump_data_version(milestone["startup_id"])
     return {"success": True}
 
 # ==================== FEEDBACK ROUTES ====================
 
 @api_router.post("/startups/{startup_id}/feedback")
 async def create_feedback(startup_id: str, body: FeedbackCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     feedback = {
@@ -492,127 +1163,166 @@ async def create_feedback(startup_id: str, body: FeedbackCreate, user=Depends(ge
         "source": body.source or "internal",
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
-    await db.feedback.insert_one(feedback)
+    async with startup_stats.writing(db, startup_id):
+        await db.feedback.insert_one(feedback)
+        await startup_stats.on_feedback_change(db, startup_id, None, feedback)
+    await bump_data_version(startup_id)
     return {k: v for k, v in feedback.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/feedback")
-async def get_feedback(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_feedback(
+    startup_id: str,
+    response: Response,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Literal["created_at", "rating"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(500, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    feedbacks = await db.feedback.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
+    query = {"startup_id": startup_id, **date_range_filter("created_at", date_from, date_to)}
+    if category:
+        query["category"] = category
+    if source:
+        query["source"] = source
+    feedbacks = await fetch_page(db.feedback, query, response, sort_field=sort, order=order, limit=limit, cursor=cursor)
     return feedbacks
 
 # ==================== ANALYTICS ROUTES ====================
 
 @api_router.get("/startups/{startup_id}/analytics")
-async def get_analytics(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_analytics(startup_id: str, request: Request, response: Response, user=Depends(get_current_user)):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    tasks = await db.tasks.find({"startup_id": startup_id}, {"_id": 0}).to_list(1000)
-    milestones = await db.milestones.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
-    feedbacks = await db.feedback.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    members = await db.startup_members.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
+    cached = await not_modified(request, response, startup_id)
+    if cached:
+        return cached
+    return await cached_report(startup_id, "analytics", functools.partial(compute_analytics, startup_id), request.state.data_version)
+
+async def compute_analytics(startup_id: str) -> dict:
+    stats, team_size = await asyncio.gather(
+        startup_stats.get(db, startup_id),
+        db.startup_members.count_documents({"startup_id": startup_id}),
+    )
+    return startup_stats.to_analytics(stats, team_size)
 
-    task_stats = {"todo": 0, "in_progress": 0, "review": 0, "done": 0}
-    priority_stats = {"low": 0, "medium": 0, "high": 0, "urgent": 0}
-    for t in tasks:
-        status = t.get("status", "todo")
-        if status in task_stats:
-            task_stats[status] += 1
-        prio = t.get("priority", "medium")
-        if prio in priority_stats:
-            priority_stats[prio] += 1
-
-    milestone_stats = {"pending": 0, "in_progress": 0, "completed": 0}
-    for m in milestones:
-        ms = m.get("status", "pending")
-        if ms in milestone_stats:
-            milestone_stats[ms] += 1
-
-    feedback_by_category = {}
-    avg_rating = 0
-    if feedbacks:
-        for f in feedbacks:
-            cat = f.get("category", "other")
-            feedback_by_category[cat] = feedback_by_category.get(cat, 0) + 1
-        avg_rating = round(sum(f.get("rating", 0) for f in feedbacks) / len(feedbacks), 1)
-
-    total_tasks = len(tasks)
-    completed_tasks = task_stats["done"]
-    completion_rate = round((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
+# ==================== AI ROUTES (GEMINI) ====================
 
-    return {
-        "total_tasks": total_tasks,
-        "completed_tasks": completed_tasks,
-        "completion_rate": completion_rate,
-        "task_stats": task_stats,
-        "priority_stats": priority_stats,
-        "total_milestones": len(milestones),
-        "milestone_stats": milestone_stats,
-        "total_feedback": len(feedbacks),
-        "feedback_by_category": feedback_by_category,
-        "avg_rating": avg_rating,
-        "team_size": len(members),
-    }
+INSIGHTS_SYSTEM_PROMPT = "You are a startup advisor AI. Provide concise, actionable insights for early-stage founders. Format your response with clear sections using markdown. Be specific and practical."
+PITCH_SYSTEM_PROMPT = "You are an expert startup pitch consultant. Create compelling, professional investor pitch outlines. Use markdown formatting with clear sections."
 
-# ==================== AI ROUTES (GEMINI) ====================
+ai_gateway = AIGateway(GEMINI_API_KEY, GEMINI_MODEL, AI_MAX_CONCURRENCY, AI_CALL_TIMEOUT)
+ai_limiter = AILimiter(lambda: db)
 
-@api_router.post("/ai/insights")
-async def get_ai_insights(body: AIInsightRequest, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": body.startup_id, "user_id": user.id})
-    if not member:
-        raise HTTPException(status_code=403, detail="Not a member")
-    startup = await db.startups.find_one({"id": body.startup_id}, {"_id": 0})
-    tasks = await db.tasks.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(100)
-    milestones = await db.milestones.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(50)
-    feedbacks = await db.feedback.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(50)
-
-    task_summary = f"Total tasks: {len(tasks)}, Done: {len([t for t in tasks if t.get('status')=='done'])}, In Progress: {len([t for t in tasks if t.get('status')=='in_progress'])}"
-    milestone_summary = f"Total milestones: {len(milestones)}, Completed: {len([m for m in milestones if m.get('status')=='completed'])}"
-    feedback_summary = f"Total feedback: {len(feedbacks)}"
-    if feedbacks:
-        avg = round(sum(f.get("rating", 0) for f in feedbacks) / len(feedbacks), 1)
-        feedback_summary += f", Average rating: {avg}/5"
+def rate_limited(e: RateLimited) -> HTTPException:
+    return HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
 
-    prompt_map = {
-        "general": f"Analyze this startup's progress and provide 3-5 actionable insights:\nStartup: {startup.get('name', 'Unknown')} ({startup.get('industry', 'Unknown')} - {startup.get('stage', 'idea')} stage)\n{task_summary}\n{milestone_summary}\n{feedback_summary}\nProvide specific, actionable recommendations for improvement.",
-        "tasks": f"Suggest 5 strategic tasks for this startup:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\nCurrent tasks: {task_summary}\nSuggest tasks with title, description, and priority level.",
-        "milestones": f"Suggest 3 key milestones for this startup:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\nCurrent milestones: {milestone_summary}\nSuggest milestones with clear deliverables and target timeframes.",
-        "growth": f"Provide a growth strategy analysis:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\n{task_summary}\n{milestone_summary}\n{feedback_summary}\nSuggest growth strategies, metrics to track, and potential challenges."
-    }
-    prompt = prompt_map.get(body.prompt_type, prompt_map["general"])
+async def acquire_ai(startup_id: str):
+    """Spend one AI request from the startup's plan allowance; 429 with Retry-After when over it."""
+    if not AI_RATE_LIMITS_ENABLED:
+        return
+    try:
+        await ai_limiter.acquire(startup_id)
+    except RateLimited as e:
+        raise rate_limited(e)
+
+async def record_ai_usage(startup_id: str, prompt: str, system_instruction: str, text: str):
+    if not AI_RATE_LIMITS_ENABLED:
+        return
+    tokens = ai_snapshot.estimate_tokens(system_instruction) + ai_snapshot.estimate_tokens(prompt) + ai_snapshot.estimate_tokens(text)
+    try:
+        await ai_limiter.record(startup_id, tokens)
+    except Exception as e:
+        logger.warning(f"AI usage not recorded for {startup_id}: {e}")
 
+async def run_ai(prompt: str, system_instruction: str, label: str) -> str:
+    """Generate through the shared gateway, mapping failures to HTTP errors."""
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction="You are a startup advisor AI. Provide concise, actionable insights for early-stage founders. Format your response with clear sections using markdown. Be specific and practical."
-        )
-        response = model.generate_content(prompt)
-        return {"insights": response.text, "prompt_type": body.prompt_type}
+        return await ai_gateway.generate(prompt, system_instruction)
+    except AIUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AITimeout as e:
+        logger.error(f"{label} timed out: {e}")
+        raise HTTPException(status_code=504, detail="AI service timed out")
     except Exception as e:
-        logger.error(f"AI insights error: {e}")
+        logger.error(f"{label} error: {e}")
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
-@api_router.post("/ai/pitch")
-async def generate_pitch(body: PitchRequest, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": body.startup_id, "user_id": user.id})
-    if not member:
-        raise HTTPException(status_code=403, detail="Not a member")
-    startup = await db.startups.find_one({"id": body.startup_id}, {"_id": 0})
-    tasks = await db.tasks.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(100)
-    milestones = await db.milestones.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(50)
-    feedbacks = await db.feedback.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(50)
-    members = await db.startup_members.find({"startup_id": body.startup_id}, {"_id": 0}).to_list(50)
+def ai_result_key(startup_id: str, prompt: str, system_instruction: str) -> str:
+    """Hash of everything that determines a generation: model, system prompt and the exact prompt (per startup)."""
+    return hashlib.sha256(f"{startup_id}\0{ai_gateway.model_name}\0{system_instruction}\0{prompt}".encode()).hexdigest()
+
+async def find_ai_result(key: str) -> Optional[dict]:
+    if AI_RESULT_CACHE_TTL <= 0:
+        return None
+    return await db.ai_results.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+
+async def store_ai_result(key: str, startup_id: str, kind: str, text: str) -> str:
+    """Save a generated result; returns its generated_at timestamp."""
+    now = datetime.now(timezone.utc)
+    if AI_RESULT_CACHE_TTL > 0:
+        await db.ai_results.replace_one({"_id": key}, {
+            "startup_id": startup_id,
+            "kind": kind,
+            "model": ai_gateway.model_name,
+            "text": text,
+            "generated_at": now.isoformat(),
+            "expires_at": now + timedelta(seconds=AI_RESULT_CACHE_TTL),
+        }, upsert=True)
+    return now.isoformat()
+
+async def cached_ai(startup_id: str, kind: str, prompt: str, system_instruction: str, label: str, force_refresh: bool = False) -> dict:
+    """Generate through `run_ai`, reusing a stored result for an identical prompt.
+
+    The prompt embeds the startup's current state, so any relevant change
+    produces a new key. Stored results expire via the TTL index on `expires_at`.
+    Returns {"text", "cached", "generated_at"}.
+    """
+    key = ai_result_key(startup_id, prompt, system_instruction)
+    hit = None if force_refresh else await find_ai_result(key)
+    if hit:
+        return {"text": hit["text"], "cached": True, "generated_at": hit["generated_at"]}
+    await acquire_ai(startup_id)
+    text = await run_ai(prompt, system_instruction, label)
+    await record_ai_usage(startup_id, prompt, system_instruction, text)
+    generated_at = await store_ai_result(key, startup_id, kind, text)
+    return {"text": text, "cached": False, "generated_at": generated_at}
+
+async def build_ai_context(startup_id: str) -> dict:
+    """Startup facts, progress counts and a short digest the AI prompts are built from."""
+    return await ai_snapshot.build(db, startup_id, AI_DIGEST_MAX_TOKENS)
+
+async def get_ai_context(startup_id: str) -> dict:
+    return await cached_report(startup_id, "ai_context", functools.partial(build_ai_context, startup_id))
+
+def insights_prompt(context: dict, prompt_type: Optional[str]) -> str:
+    startup = context["startup"]
+    task_summary = f"Total tasks: {context['tasks_total']}, Done: {context['tasks_done']}, In Progress: {context['tasks_in_progress']}"
+    milestone_summary = f"Total milestones: {context['milestones_total']}, Completed: {context['milestones_completed']}"
+    feedback_summary = f"Total feedback: {context['feedback_total']}"
+    if context["feedback_total"]:
+        feedback_summary += f", Average rating: {context['avg_rating']}/5"
 
-    completed_tasks = len([t for t in tasks if t.get("status") == "done"])
-    completed_milestones = len([m for m in milestones if m.get("status") == "completed"])
-    avg_rating = round(sum(f.get("rating", 0) for f in feedbacks) / len(feedbacks), 1) if feedbacks else 0
+    prompt_map = {
+        "general": f"Analyze this startup's progress and provide 3-5 actionable insights:\nStartup: {startup.get('name', 'Unknown')} ({startup.get('industry', 'Unknown')} - {startup.get('stage', 'idea')} stage)\n{task_summary}\n{milestone_summary}\n{feedback_summary}\nProvide specific, actionable recommendations for improvement.",
+        "tasks": f"Suggest 5 strategic tasks for this startup:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\nCurrent tasks: {task_summary}\nSuggest tasks with title, description, and priority level.",
+        "milestones": f"Suggest 3 key milestones for this startup:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\nCurrent milestones: {milestone_summary}\nSuggest milestones with clear deliverables and target timeframes.",
+        "growth": f"Provide a growth strategy analysis:\nStartup: {startup.get('name', 'Unknown')} in {startup.get('industry', 'Unknown')} at {startup.get('stage', 'idea')} stage.\n{task_summary}\n{milestone_summary}\n{feedback_summary}\nSuggest growth strategies, metrics to track, and potential challenges."
+    }
+    prompt = prompt_map.get(prompt_type, prompt_map["general"])
+    digest = ai_snapshot.digest_text(context)
+    return f"{prompt}\n\n{digest}" if digest else prompt
 
-    prompt = f"""Generate a compelling investor pitch outline for this startup:
+def pitch_prompt(context: dict) -> str:
+    startup = context["startup"]
+    return f"""Generate a compelling investor pitch outline for this startup:
 
 Startup: {startup.get('name', 'Unknown')}
 Industry: {startup.get('industry', 'Unknown')}
@@ -621,10 +1331,12 @@ Description: {startup.get('description', 'No description')}
 Website: {startup.get('website', 'N/A')}
 
 Traction:
-- Team size: {len(members)}
-- Tasks completed: {completed_tasks}/{len(tasks)}
-- Milestones achieved: {completed_milestones}/{len(milestones)}
-- Average feedback rating: {avg_rating}/5
+- Team size: {context['team_size']}
+- Tasks completed: {context['tasks_done']}/{context['tasks_total']}
+- Milestones achieved: {context['milestones_completed']}/{context['milestones_total']}
+- Average feedback rating: {context['avg_rating']}/5
+
+{ai_snapshot.digest_text(context) or "No recent task or feedback details."}
 
 Generate a structured pitch with these sections:
 1. **Problem Statement** - The problem being solved
@@ -638,30 +1350,175 @@ Generate a structured pitch with these sections:
 
 Make it compelling, data-driven where possible, and suitable for a 5-minute pitch."""
 
+def insights_response(result: dict, prompt_type: Optional[str]) -> dict:
+    return {"insights": result["text"], "prompt_type": prompt_type, "cached": result["cached"], "generated_at": result["generated_at"]}
+
+def pitch_response(result: dict, context: dict) -> dict:
+    return {"pitch": result["text"], "startup_name": context["startup"].get("name", ""), "cached": result["cached"], "generated_at": result["generated_at"]}
+
+@api_router.post("/ai/insights")
+async def get_ai_insights(body: AIInsightRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    prompt = insights_prompt(context, body.prompt_type)
+    result = await cached_ai(body.startup_id, f"insights:{body.prompt_type}", prompt, INSIGHTS_SYSTEM_PROMPT, "AI insights", body.force_refresh)
+    return insights_response(result, body.prompt_type)
+
+@api_router.post("/ai/pitch")
+async def generate_pitch(body: PitchRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    prompt = pitch_prompt(context)
+    result = await cached_ai(body.startup_id, "pitch", prompt, PITCH_SYSTEM_PROMPT, "Pitch generation", body.force_refresh)
+    return pitch_response(result, context)
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_ai(startup_id: str, kind: str, prompt: str, system_instruction: str, label: str, force_refresh: bool = False) -> StreamingResponse:
+    """SSE variant of `cached_ai`: `chunk` events carry text as the model produces it, then one `done` (or `error`) event.
+
+    If the client disconnects, Starlette cancels this generator, which closes
+    the upstream stream and frees the gateway slot. Only complete generations
+    are stored in ai_results.
+    """
+    key = ai_result_key(startup_id, prompt, system_instruction)
+    hit = None if force_refresh else await find_ai_result(key)
+    if not hit:
+        # Stored results stay servable without a key; only new generations need one
+        if not ai_gateway.available:
+            raise HTTPException(status_code=503, detail="GEMINI_API_KEY is not configured")
+        await acquire_ai(startup_id)
+
+    async def events():
+        if hit:
+            yield sse_event("chunk", {"text": hit["text"]})
+            yield sse_event("done", {"cached": True, "generated_at": hit["generated_at"]})
+            return
+        parts = []
+        try:
+            async for text in ai_gateway.stream(prompt, system_instruction):
+                parts.append(text)
+                yield sse_event("chunk", {"text": text})
+        except asyncio.CancelledError:
+            # Client went away; what was generated so far still counts against the budget
+            if parts:
+                await asyncio.shield(record_ai_usage(startup_id, prompt, system_instruction, "".join(parts)))
+            raise
+        except AITimeout as e:
+            logger.error(f"{label} timed out: {e}")
+            yield sse_event("error", {"status": 504, "detail": "AI service timed out"})
+            return
+        except Exception as e:
+            logger.error(f"{label} error: {e}")
+            yield sse_event("error", {"status": 500, "detail": f"AI service error: {str(e)}"})
+            return
+        await record_ai_usage(startup_id, prompt, system_instruction, "".join(parts))
+        generated_at = await store_ai_result(key, startup_id, kind, "".join(parts))
+        yield sse_event("done", {"cached": False, "generated_at": generated_at})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_router.post("/ai/insights/stream")
+async def stream_ai_insights(body: AIInsightRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    prompt = insights_prompt(context, body.prompt_type)
+    return await stream_ai(body.startup_id, f"insights:{body.prompt_type}", prompt, INSIGHTS_SYSTEM_PROMPT, "AI insights", body.force_refresh)
+
+@api_router.post("/ai/pitch/stream")
+async def stream_pitch(body: PitchRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    return await stream_ai(body.startup_id, "pitch", pitch_prompt(context), PITCH_SYSTEM_PROMPT, "Pitch generation", body.force_refresh)
+
+ai_jobs = AIJobQueue(lambda: db.ai_jobs, AI_JOB_WORKERS, AI_JOB_MAX_PENDING, AI_JOB_TTL, AI_JOB_STALE_AFTER)
+
+async def submit_ai_job(startup_id: str, kind: str, prompt: str, system_instruction: str, label: str, force_refresh: bool, shape) -> dict:
+    """Queue a `cached_ai` generation; identical active requests share one job. `shape` builds the result document."""
+    async def job():
+        try:
+            result = await cached_ai(startup_id, kind, prompt, system_instruction, label, force_refresh)
+        except HTTPException as e:
+            raise JobFailed(e.status_code, e.detail)
+        return shape(result)
+    key = ai_result_key(startup_id, prompt, system_instruction)
+    if force_refresh or not await find_ai_result(key):
+        # Stored results stay servable without a key (the job's cached_ai returns them); new generations need one
+        if not ai_gateway.available:
+            raise HTTPException(status_code=503, detail="GEMINI_API_KEY is not configured")
+        if AI_RATE_LIMITS_ENABLED:
+            try:
+                # The job spends the allowance when it runs; refuse early if this startup is already over it
+                ai_limiter.check_memory(startup_id)
+            except RateLimited as e:
+                raise rate_limited(e)
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction="You are an expert startup pitch consultant. Create compelling, professional investor pitch outlines. Use markdown formatting with clear sections."
-        )
-        response = model.generate_content(prompt)
-        return {"pitch": response.text, "startup_name": startup.get("name", "")}
-    except Exception as e:
-        logger.error(f"Pitch generation error: {e}")
-        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+        queued, deduplicated = await ai_jobs.submit(startup_id, kind, key, job)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": queued["id"], "status": queued["status"], "deduplicated": deduplicated}
+
+@api_router.post("/ai/insights/jobs", status_code=202)
+async def submit_ai_insights(body: AIInsightRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    return await submit_ai_job(body.startup_id, f"insights:{body.prompt_type}", insights_prompt(context, body.prompt_type), INSIGHTS_SYSTEM_PROMPT,
+                               "AI insights", body.force_refresh, functools.partial(insights_response, prompt_type=body.prompt_type))
+
+@api_router.post("/ai/pitch/jobs", status_code=202)
+async def submit_pitch(body: PitchRequest, user=Depends(get_current_user)):
+    member = await get_membership(body.startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    context = await get_ai_context(body.startup_id)
+    return await submit_ai_job(body.startup_id, "pitch", pitch_prompt(context), PITCH_SYSTEM_PROMPT,
+                               "Pitch generation", body.force_refresh, functools.partial(pitch_response, context=context))
+
+@api_router.get("/startups/{startup_id}/ai/usage")
+async def get_ai_usage(startup_id: str, user=Depends(get_current_user)):
+    """This month's AI token usage and the remaining allowance for the startup's plan."""
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    return {"enforced": AI_RATE_LIMITS_ENABLED, **await ai_limiter.usage(startup_id)}
+
+@api_router.get("/ai/jobs/{job_id}")
+async def get_ai_job(job_id: str, wait: float = Query(0, ge=0, le=30), user=Depends(get_current_user)):
+    """Job status and, once done, its result. `wait` long-polls up to that many seconds for the job to finish."""
+    job = await ai_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    member = await get_membership(job["startup_id"], user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    if wait and job["status"] in ("queued", "running"):
+        job = await ai_jobs.wait(job_id, wait)
+    job.pop("dedup_key", None)
+    return job
 
 # ==================== TEAM ROUTES ====================
 
 @api_router.get("/startups/{startup_id}/members")
 async def get_members(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     members = await db.startup_members.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
+    profiles = await load_profiles(m["user_id"] for m in members)
     result = []
     for m in members:
-        profile = await db.profiles.find_one({"id": m["user_id"]}, {"_id": 0})
+        profile = profiles.get(m["user_id"])
         result.append({
             "id": m["id"],
             "user_id": m["user_id"],
@@ -675,22 +1532,24 @@ async def get_members(startup_id: str, user=Depends(get_current_user)):
 
 @api_router.delete("/startups/{startup_id}/members/{user_id}")
 async def remove_member(startup_id: str, user_id: str, user=Depends(get_current_user)):
-    requester = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    requester = await get_membership(startup_id, user.id)
     if not requester or requester["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can remove members")
     if user_id == user.id:
         raise HTTPException(status_code=400, detail="Cannot remove yourself")
     await db.startup_members.delete_one({"startup_id": startup_id, "user_id": user_id})
+    invalidate_membership(startup_id, user_id)
+    await bump_data_version(startup_id)
     return {"success": True}
 
 @api_router.put("/startups/{startup_id}/members/{user_id}/role")
 async def update_member_role(startup_id: str, user_id: str, body: MemberRoleUpdate, user=Depends(get_current_user)):
     logger.info(f"Updating member role: startup_id={startup_id}, target_user_id={user_id}, new_role={body.role}, requester_id={user.id}")
-    requester = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    requester = await get_membership(startup_id, user.id)
     if not requester or requester["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can change roles")
     
-    target_member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user_id}, {"_id": 0})
+    target_member = await get_membership(startup_id, user_id)
     logger.info(f"Target member lookup result: {target_member}")
     if not target_member:
         logger.error(f"Member not found: startup_id={startup_id}, user_id={user_id}")
@@ -706,12 +1565,14 @@ async def update_member_role(startup_id: str, user_id: str, body: MemberRoleUpda
         {"startup_id": startup_id, "user_id": user_id},
         {"$set": {"role": body.role}}
     )
+    invalidate_membership(startup_id, user_id)
+    await bump_data_version(startup_id)
     logger.info(f"Member role updated successfully: user_id={user_id}, new_role={body.role}")
     return {"success": True, "role": body.role}
 
 @api_router.get("/startups/{startup_id}/invite-code")
 async def get_invite_code(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can view invite code")
     startup = await db.startups.find_one({"id": startup_id}, {"_id": 0})
@@ -719,18 +1580,19 @@ async def get_invite_code(startup_id: str, user=Depends(get_current_user)):
 
 @api_router.post("/startups/{startup_id}/regenerate-invite")
 async def regenerate_invite(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can regenerate invite code")
     new_code = str(uuid.uuid4())[:8].upper()
     await db.startups.update_one({"id": startup_id}, {"$set": {"invite_code": new_code}})
+    await bump_data_version(startup_id)
     return {"invite_code": new_code}
 
 # ==================== SUBSCRIPTION ROUTES (MOCK) ====================
 
 @api_router.get("/startups/{startup_id}/subscription")
 async def get_subscription(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     sub = await db.subscriptions.find_one({"startup_id": startup_id}, {"_id": 0})
@@ -749,7 +1611,7 @@ async def get_subscription(startup_id: str, user=Depends(get_current_user)):
 
 @api_router.post("/startups/{startup_id}/subscription")
 async def update_subscription(startup_id: str, body: SubscriptionUpdate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id}, {"_id": 0})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can manage subscription")
     existing = await db.subscriptions.find_one({"startup_id": startup_id})
@@ -768,18 +1630,21 @@ async def update_subscription(startup_id: str, body: SubscriptionUpdate, user=De
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         await db.subscriptions.insert_one(sub)
-    await db.startups.update_one({"id": startup_id}, {"$set": {"subscription_plan": body.plan}})
+    before = await db.startups.find_one_and_update(
+        {"id": startup_id}, {"$set": {"subscription_plan": body.plan}},
+        projection={"_id": 0, "subscription_plan": 1}, return_document=ReturnDocument.BEFORE,
+    )
+    if before is not None and before.get("subscription_plan") != body.plan:
+        # Re-posting the current plan must not refill the AI rate bucket
+        await ai_limiter.plan_changed(startup_id)
+    await bump_data_version(startup_id)
     sub = await db.subscriptions.find_one({"startup_id": startup_id}, {"_id": 0})
     return sub
 
 # ==================== FINANCE ROUTES ====================
 
-@api_router.post("/startups/{startup_id}/finance/income")
-async def create_income(startup_id: str, body: IncomeCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
-    if not member or member["role"] not in ["founder", "manager"]:
-        raise HTTPException(status_code=403, detail="Only founders and managers can add income")
-    income = {
+def income_doc(startup_id: str, body: IncomeCreate, user_id: str) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "startup_id": startup_id,
         "title": body.title,
@@ -787,159 +1652,322 @@ async def create_income(startup_id: str, body: IncomeCreate, user=Depends(get_cu
         "category": body.category or "revenue",
         "date": body.date or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
         "notes": body.notes or "",
-        "created_by": user.id,
+        "created_by": user_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def expense_doc(startup_id: str, body: ExpenseCreate, user_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "startup_id": startup_id,
+        "title": body.title,
+        "amount": body.amount,
+        "category": body.category or "operations",
+        "date": body.date or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        "notes": body.notes or "",
+        "created_by": user_id,
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
-    await db.income.insert_one(income)
+
+def investment_doc(startup_id: str, body: InvestmentCreate, user_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "startup_id": startup_id,
+        "investor_name": body.investor_name,
+        "amount": body.amount,
+        "equity_percentage": body.equity_percentage or 0,
+        "investment_type": body.investment_type or "seed",
+        "date": body.date or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        "notes": body.notes or "",
+        "created_by": user_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+@api_router.post("/startups/{startup_id}/finance/income")
+async def create_income(startup_id: str, body: IncomeCreate, user=Depends(get_current_user)):
+    member = await get_membership(startup_id, user.id)
+    if not member or member["role"] not in ["founder", "manager"]:
+        raise HTTPException(status_code=403, detail="Only founders and managers can add income")
+    income = income_doc(startup_id, body, user.id)
+    async with finance.ledger_write(db, startup_id):
+        await db.income.insert_one(income)
+        await finance.record_entry(db, startup_id, "income", income)
+    await bump_data_version(startup_id)
     return {k: v for k, v in income.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/finance/income")
-async def get_income(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_income(
+    startup_id: str,
+    response: Response,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Literal["date", "amount"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(500, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    income = await db.income.find({"startup_id": startup_id}, {"_id": 0}).sort("date", -1).to_list(500)
+    query = {"startup_id": startup_id, **date_range_filter("date", date_from, date_to)}
+    if category:
+        query["category"] = category
+    income = await fetch_page(db.income, query, response, sort_field=sort, order=order, limit=limit, cursor=cursor)
     return income
 
 @api_router.delete("/startups/{startup_id}/finance/income/{income_id}")
 async def delete_income(startup_id: str, income_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] not in ["founder", "manager"]:
         raise HTTPException(status_code=403, detail="Only founders and managers can delete income")
-    await db.income.delete_one({"id": income_id, "startup_id": startup_id})
+    async with finance.ledger_write(db, startup_id):
+        deleted = await db.income.find_one_and_delete({"id": income_id, "startup_id": startup_id}, projection={"_id": 0})
+        if deleted:
+            await finance.record_entry(db, startup_id, "income", deleted, sign=-1)
+    if deleted:
+        await bump_data_version(startup_id)
     return {"success": True}
 
 @api_router.post("/startups/{startup_id}/finance/expenses")
 async def create_expense(startup_id: str, body: ExpenseCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] not in ["founder", "manager"]:
         raise HTTPException(status_code=403, detail="Only founders and managers can add expenses")
-    expense = {
-        "id": str(uuid.uuid4()),
-        "startup_id": startup_id,
-        "title": body.title,
-        "amount": body.amount,
-        "category": body.category or "operations",
-        "date": body.date or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        "notes": body.notes or "",
-        "created_by": user.id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    }
-    await db.expenses.insert_one(expense)
+    expense = expense_doc(startup_id, body, user.id)
+    async with finance.ledger_write(db, startup_id):
+        await db.expenses.insert_one(expense)
+        await finance.record_entry(db, startup_id, "expense", expense)
+    await bump_data_version(startup_id)
     return {k: v for k, v in expense.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/finance/expenses")
-async def get_expenses(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_expenses(
+    startup_id: str,
+    response: Response,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Literal["date", "amount"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(500, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    expenses = await db.expenses.find({"startup_id": startup_id}, {"_id": 0}).sort("date", -1).to_list(500)
+    query = {"startup_id": startup_id, **date_range_filter("date", date_from, date_to)}
+    if category:
+        query["category"] = category
+    expenses = await fetch_page(db.expenses, query, response, sort_field=sort, order=order, limit=limit, cursor=cursor)
     return expenses
 
 @api_router.delete("/startups/{startup_id}/finance/expenses/{expense_id}")
 async def delete_expense(startup_id: str, expense_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] not in ["founder", "manager"]:
         raise HTTPException(status_code=403, detail="Only founders and managers can delete expenses")
-    await db.expenses.delete_one({"id": expense_id, "startup_id": startup_id})
+    async with finance.ledger_write(db, startup_id):
+        deleted = await db.expenses.find_one_and_delete({"id": expense_id, "startup_id": startup_id}, projection={"_id": 0})
+        if deleted:
+            await finance.record_entry(db, startup_id, "expense", deleted, sign=-1)
+    if deleted:
+        await bump_data_version(startup_id)
     return {"success": True}
 
 @api_router.post("/startups/{startup_id}/finance/investments")
 async def create_investment(startup_id: str, body: InvestmentCreate, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can add investments")
-    investment = {
-        "id": str(uuid.uuid4()),
-        "startup_id": startup_id,
-        "investor_name": body.investor_name,
-        "amount": body.amount,
-        "equity_percentage": body.equity_percentage or 0,
-        "investment_type": body.investment_type or "seed",
-        "date": body.date or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        "notes": body.notes or "",
-        "created_by": user.id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    }
-    await db.investments.insert_one(investment)
+    investment = investment_doc(startup_id, body, user.id)
+    async with finance.ledger_write(db, startup_id):
+        await db.investments.insert_one(investment)
+        await finance.record_entry(db, startup_id, "investment", investment)
+    await bump_data_version(startup_id)
     return {k: v for k, v in investment.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/finance/investments")
-async def get_investments(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_investments(
+    startup_id: str,
+    response: Response,
+    investment_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Literal["date", "amount"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    investments = await db.investments.find({"startup_id": startup_id}, {"_id": 0}).sort("date", -1).to_list(100)
+    query = {"startup_id": startup_id, **date_range_filter("date", date_from, date_to)}
+    if investment_type:
+        query["investment_type"] = investment_type
+    investments = await fetch_page(db.investments, query, response, sort_field=sort, order=order, limit=limit, cursor=cursor)
     return investments
 
 @api_router.delete("/startups/{startup_id}/finance/investments/{investment_id}")
 async def delete_investment(startup_id: str, investment_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can delete investments")
-    await db.investments.delete_one({"id": investment_id, "startup_id": startup_id})
+    async with finance.ledger_write(db, startup_id):
+        deleted = await db.investments.find_one_and_delete({"id": investment_id, "startup_id": startup_id}, projection={"_id": 0})
+        if deleted:
+            await finance.record_entry(db, startup_id, "investment", deleted, sign=-1)
+    if deleted:
+        await bump_data_version(startup_id)
     return {"success": True}
 
+# dataset -> (collection, finance kind, row model, document builder, roles allowed to import)
+LEDGER_IMPORTS = {
+    "income": ("income", "income", IncomeCreate, income_doc, ["founder", "manager"]),
+    "expenses": ("expenses", "expense", ExpenseCreate, expense_doc, ["founder", "manager"]),
+    "investments": ("investments", "investment", InvestmentCreate, investment_doc, ["founder"]),
+}
+
+def _parse_import_body(raw: bytes, content_type: str) -> list:
+    """Rows of an import request: a JSON array of objects, or CSV with a header row."""
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import body must be UTF-8")
+    if "csv" in content_type:
+        # Empty CSV cells mean "not given", so optional fields fall back to their defaults.
+        return [{k: (v if v != "" else None) for k, v in row.items() if k} for row in csv.DictReader(io.StringIO(text))]
+    try:
+        rows = json.loads(text)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Import body must be a JSON array or CSV")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Import body must be a JSON array or CSV")
+    return rows
+
+def _validate_import_row(model, row) -> tuple:
+    """Return (parsed body, None) or (None, [{field, message}])."""
+    if not isinstance(row, dict):
+        return None, [{"field": None, "message": "Row must be an object"}]
+    try:
+        body = model(**row)
+    except ValidationError as e:
+        return None, [{"field": ".".join(str(p) for p in err["loc"]) or None, "message": err["msg"]} for err in e.errors()]
+    if body.date:
+        try:
+            date.fromisoformat(body.date)
+        except ValueError:
+            return None, [{"field": "date", "message": "Expected YYYY-MM-DD"}]
+    return body, None
+
+@api_router.post("/startups/{startup_id}/finance/{dataset}/import")
+async def import_ledger(
+    startup_id: str,
+    dataset: Literal["income", "expenses", "investments"],
+    request: Request,
+    user=Depends(get_current_user),
+):
+    """Bulk-create ledger rows from a JSON array or CSV (Content-Type: text/csv).
+
+    Valid rows are inserted in chunks; invalid ones are reported by row number
+    (1-based, excluding the CSV header) and skipped.
+    """
+    collection, kind, model, build, roles = LEDGER_IMPORTS[dataset]
+    member = await get_membership(startup_id, user.id)
+    if not member or member["role"] not in roles:
+        raise HTTPException(status_code=403, detail=f"Only {' and '.join(r + 's' for r in roles)} can import {dataset}")
+    rows = _parse_import_body(await request.body(), request.headers.get("content-type", ""))
+    if len(rows) > LEDGER_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {LEDGER_IMPORT_MAX_ROWS} rows per import")
+
+    docs, row_numbers, errors = [], [], []
+    for n, row in enumerate(rows, start=1):
+        body, row_errors = _validate_import_row(model, row)
+        if row_errors:
+            errors.append({"row": n, "errors": row_errors})
+        else:
+            docs.append(build(startup_id, body, user.id))
+            row_numbers.append(n)
+
+    inserted = 0
+    for start in range(0, len(docs), LEDGER_IMPORT_CHUNK_SIZE):
+        chunk = docs[start:start + LEDGER_IMPORT_CHUNK_SIZE]
+        failed = set()
+        # One rollup update per chunk instead of one per row
+        async with finance.ledger_write(db, startup_id):
+            try:
+                await db[collection].insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get("writeErrors", []):
+                    failed.add(err["index"])
+                    errors.append({"row": row_numbers[start + err["index"]], "errors": [{"field": None, "message": err.get("errmsg", "Write failed")}]})
+            written = [doc for i, doc in enumerate(chunk) if i not in failed]
+            await finance.record_entries(db, startup_id, kind, written)
+        inserted += len(written)
+    if inserted:
+        await bump_data_version(startup_id)
+
+    logger.info(f"Imported {inserted}/{len(rows)} {dataset} rows for startup {startup_id}")
+    return {"received": len(rows), "inserted": inserted, "failed": len(rows) - inserted, "errors": sorted(errors, key=lambda e: e["row"])}
+
 @api_router.get("/startups/{startup_id}/finance/summary")
-async def get_finance_summary(startup_id: str, user=Depends(get_current_user)):
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+async def get_finance_summary(startup_id: str, request: Request, response: Response, user=Depends(get_current_user)):
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    
-    income = await db.income.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    expenses = await db.expenses.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    investments = await db.investments.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
-    
-    total_income = sum(i.get("amount", 0) for i in income)
-    total_expenses = sum(e.get("amount", 0) for e in expenses)
-    total_investments = sum(inv.get("amount", 0) for inv in investments)
-    total_equity_given = sum(inv.get("equity_percentage", 0) for inv in investments)
-    
-    # Monthly breakdown (last 6 months)
-    from collections import defaultdict
-    monthly_income = defaultdict(float)
-    monthly_expenses = defaultdict(float)
-    
-    for i in income:
-        month = i.get("date", "")[:7]  # YYYY-MM
-        if month:
-            monthly_income[month] += i.get("amount", 0)
-    
-    for e in expenses:
-        month = e.get("date", "")[:7]
-        if month:
-            monthly_expenses[month] += e.get("amount", 0)
-    
-    # Category breakdown
-    income_by_category = defaultdict(float)
-    expenses_by_category = defaultdict(float)
-    
-    for i in income:
-        income_by_category[i.get("category", "other")] += i.get("amount", 0)
-    
-    for e in expenses:
-        expenses_by_category[e.get("category", "other")] += e.get("amount", 0)
-    
-    return {
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "total_investments": total_investments,
-        "total_equity_given": total_equity_given,
-        "net_balance": total_income + total_investments - total_expenses,
-        "runway_months": round((total_income + total_investments - total_expenses) / max(total_expenses / max(len(set(e.get("date", "")[:7] for e in expenses)), 1), 1), 1) if total_expenses > 0 else 0,
-        "monthly_income": dict(monthly_income),
-        "monthly_expenses": dict(monthly_expenses),
-        "income_by_category": dict(income_by_category),
-        "expenses_by_category": dict(expenses_by_category),
-        "investment_count": len(investments),
-    }
+    cached = await not_modified(request, response, startup_id)
+    if cached:
+        return cached
+    return await cached_report(startup_id, "finance_summary", functools.partial(compute_finance_summary, startup_id), request.state.data_version)
+
+async def compute_finance_summary(startup_id: str) -> dict:
+    return finance.summary_response(await finance.rolled_up_ledger(db, startup_id))
+
+_forecast_cache = TTLCache(maxsize=FORECAST_CACHE_MAX_ENTRIES, ttl=FORECAST_CACHE_TTL)
+
+async def get_forecast(startup_id: str, horizon: int) -> dict:
+    """Trailing-window runway forecast, recomputed only when the ledger version or month changes."""
+    version = await finance.ledger_version(db, startup_id)
+    as_of = forecast.last_complete_month()
+    key = (startup_id, horizon, as_of)
+    cached = _forecast_cache.get(key)
+    if cached and version is not None and cached[0] == version:
+        return cached[1]
+    version, data = await finance.versioned_ledger(db, startup_id)
+    result = forecast.build(data, finance.burn_and_runway(data)["balance"], horizon)
+    if version is not None:
+        _forecast_cache[key] = (version, result)
+    return result
+
+@api_router.get("/startups/{startup_id}/finance/forecast")
+async def get_finance_forecast(startup_id: str, horizon_months: int = Query(24, ge=1, le=60), user=Depends(get_current_user)):
+    """Monthly history, trailing 3/6/12-month averages and growth, and a runway projection for each window."""
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    return await get_forecast(startup_id, horizon_months)
+
+@api_router.post("/startups/{startup_id}/finance/forecast")
+async def run_finance_forecast(startup_id: str, body: ForecastRequest, user=Depends(get_current_user)):
+    """Same as the GET forecast, plus a scenario with the given hiring plan on top of `base_window`."""
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    result = await get_forecast(startup_id, body.horizon_months)
+    scenarios = list(result["scenarios"])
+    if body.hiring_plan:
+        scenarios.append(forecast.hiring_scenario(result, [h.model_dump() for h in body.hiring_plan], body.base_window))
+    return {**result, "scenarios": scenarios}
 
 # ==================== INVESTOR ROUTES ====================
 
 @api_router.post("/startups/{startup_id}/investors/invite")
 async def invite_investor(startup_id: str, body: InvestorInviteCreate, user=Depends(get_current_user)):
     """Founder invites an investor by email"""
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member or member["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can invite investors")
     
@@ -955,20 +1983,22 @@ async def invite_investor(startup_id: str, body: InvestorInviteCreate, user=Depe
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
     await db.investor_invites.insert_one(invite)
+    await bump_data_version(startup_id)
     return {k: v for k, v in invite.items() if k != "_id"}
 
 @api_router.get("/startups/{startup_id}/investors")
 async def get_investors(startup_id: str, user=Depends(get_current_user)):
     """Get all investors for a startup"""
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
     
     # Get investor members
     investors = await db.startup_members.find({"startup_id": startup_id, "role": "investor"}, {"_id": 0}).to_list(100)
+    profiles = await load_profiles(inv["user_id"] for inv in investors)
     result = []
     for inv in investors:
-        profile = await db.profiles.find_one({"id": inv["user_id"]}, {"_id": 0})
+        profile = profiles.get(inv["user_id"])
         result.append({
             "id": inv["id"],
             "user_id": inv["user_id"],
@@ -993,7 +2023,7 @@ async def join_as_investor(body: JoinStartupRequest, user=Depends(get_current_us
     startup_id = invite["startup_id"]
     
     # Check if already a member
-    existing = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    existing = await get_membership(startup_id, user.id)
     if existing:
         raise HTTPException(status_code=400, detail="Already a member of this startup")
     
@@ -1006,12 +2036,14 @@ async def join_as_investor(body: JoinStartupRequest, user=Depends(get_current_us
         "joined_at": datetime.now(timezone.utc).isoformat(),
     }
     await db.startup_members.insert_one(membership)
+    invalidate_membership(startup_id, user.id)
     
     # Update invite status
     await db.investor_invites.update_one(
         {"id": invite["id"]},
         {"$set": {"status": "accepted", "accepted_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await bump_data_version(startup_id)
     
     startup = await db.startups.find_one({"id": startup_id}, {"_id": 0})
     return {"message": "Joined as investor", "startup": startup}
@@ -1019,56 +2051,37 @@ async def join_as_investor(body: JoinStartupRequest, user=Depends(get_current_us
 @api_router.delete("/startups/{startup_id}/investors/{user_id}")
 async def remove_investor(startup_id: str, user_id: str, user=Depends(get_current_user)):
     """Remove an investor from startup"""
-    requester = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    requester = await get_membership(startup_id, user.id)
     if not requester or requester["role"] != "founder":
         raise HTTPException(status_code=403, detail="Only founders can remove investors")
     
     await db.startup_members.delete_one({"startup_id": startup_id, "user_id": user_id, "role": "investor"})
+    invalidate_membership(startup_id, user_id)
+    await bump_data_version(startup_id)
     return {"success": True}
 
 @api_router.get("/startups/{startup_id}/investor-view")
-async def get_investor_view(startup_id: str, user=Depends(get_current_user)):
+async def get_investor_view(startup_id: str, request: Request, response: Response, user=Depends(get_current_user)):
     """Special view for investors - shows financial summary and key metrics"""
-    member = await db.startup_members.find_one({"startup_id": startup_id, "user_id": user.id})
+    member = await get_membership(startup_id, user.id)
     if not member:
         raise HTTPException(status_code=403, detail="Not a member")
-    
+    cached = await not_modified(request, response, startup_id)
+    if cached:
+        return cached
+    return await cached_report(startup_id, "investor_view", functools.partial(compute_investor_view, startup_id), request.state.data_version)
+
+async def compute_investor_view(startup_id: str) -> dict:
     # Get startup info
     startup = await db.startups.find_one({"id": startup_id}, {"_id": 0})
     
-    # Get financial data
-    income = await db.income.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    expenses = await db.expenses.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    investments = await db.investments.find({"startup_id": startup_id}, {"_id": 0}).to_list(100)
-    
-    total_income = sum(i.get("amount", 0) for i in income)
-    total_expenses = sum(e.get("amount", 0) for e in expenses)
-    total_investments = sum(inv.get("amount", 0) for inv in investments)
-    
-    # Get team size
-    members = await db.startup_members.find({"startup_id": startup_id}).to_list(100)
-    
-    # Get milestones progress
-    milestones = await db.milestones.find({"startup_id": startup_id}, {"_id": 0}).to_list(50)
-    completed_milestones = len([m for m in milestones if m.get("status") == "completed"])
-    
-    # Get tasks progress
-    tasks = await db.tasks.find({"startup_id": startup_id}, {"_id": 0}).to_list(500)
-    completed_tasks = len([t for t in tasks if t.get("status") == "done"])
-    
-    # Monthly burn rate
-    from collections import defaultdict
-    monthly_expenses = defaultdict(float)
-    for e in expenses:
-        month = e.get("date", "")[:7]
-        if month:
-            monthly_expenses[month] += e.get("amount", 0)
-    
-    avg_monthly_burn = sum(monthly_expenses.values()) / max(len(monthly_expenses), 1) if monthly_expenses else 0
-    
-    # Runway calculation
-    current_balance = total_income + total_investments - total_expenses
-    runway_months = round(current_balance / avg_monthly_burn, 1) if avg_monthly_burn > 0 else 0
+    # Financial totals, burn and runway over the full ledger
+    ledger, investments, team_size, stats = await asyncio.gather(
+        finance.rolled_up_ledger(db, startup_id),
+        db.investments.find({"startup_id": startup_id}, {"_id": 0}).sort("date", -1).to_list(100),
+        db.startup_members.count_documents({"startup_id": startup_id}),
+        startup_stats.get(db, startup_id),
+    )
     
     return {
         "startup": {
@@ -1077,25 +2090,151 @@ async def get_investor_view(startup_id: str, user=Depends(get_current_user)):
             "stage": startup.get("stage", ""),
             "description": startup.get("description", ""),
         },
-        "financials": {
-            "total_income": total_income,
-            "total_expenses": total_expenses,
-            "total_investments": total_investments,
-            "current_balance": current_balance,
-            "avg_monthly_burn": round(avg_monthly_burn, 2),
-            "runway_months": runway_months,
-            "expenses_by_month": dict(sorted(monthly_expenses.items())[-6:]),  # Last 6 months
-        },
+        "financials": finance.investor_financials(ledger),
         "metrics": {
-            "team_size": len(members),
-            "milestones_completed": completed_milestones,
-            "milestones_total": len(milestones),
-            "tasks_completed": completed_tasks,
-            "tasks_total": len(tasks),
+            "team_size": team_size,
+            "milestones_completed": stats["milestones"]["status"].get("completed", 0),
+            "milestones_total": stats["milestones"]["total"],
+            "tasks_completed": stats["tasks"]["status"].get("done", 0),
+            "tasks_total": stats["tasks"]["total"],
         },
         "investments": investments,
     }
 
+@api_router.get("/investors/portfolio")
+async def get_portfolio(
+    response: Response,
+    role: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(PORTFOLIO_MAX_STARTUPS, ge=1, le=PORTFOLIO_MAX_STARTUPS),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    """Balance, burn, runway and milestone/task completion for every startup the caller belongs to.
+
+    A fixed number of queries, each covering all startups on the page at once. Pages
+    follow the caller's memberships by join date (X-Next-Cursor, like GET /startups);
+    `totals` cover this page only, and `has_more` says whether further pages exist.
+    """
+    query = {"user_id": user.id}
+    if role:
+        query["role"] = role
+    memberships = await fetch_page(db.startup_members, query, response, sort_field="joined_at", order=order, limit=limit, cursor=cursor)
+    has_more = NEXT_CURSOR_HEADER in response.headers
+    roles = {m["startup_id"]: m["role"] for m in memberships}
+    ids = list(roles)
+    if not ids:
+        return {"startups": [], "totals": {"startups": 0, "balance": 0, "monthly_burn": 0}, "has_more": has_more}
+
+    startups, ledgers, stats, team_rows = await asyncio.gather(
+        db.startups.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "name": 1, "industry": 1, "stage": 1}).to_list(None),
+        finance.rolled_up_ledgers(db, ids),
+        startup_stats.get_many(db, ids),
+        db.startup_members.aggregate([
+            {"$match": {"startup_id": {"$in": ids}}},
+            {"$group": {"_id": "$startup_id", "n": {"$sum": 1}}},
+        ]).to_list(None),
+    )
+    team_sizes = {r["_id"]: r["n"] for r in team_rows}
+
+    result = []
+    for startup in sorted(startups, key=lambda s: s.get("name", "")):
+        sid = startup["id"]
+        runway = finance.burn_and_runway(ledgers[sid])
+        tasks, milestones = stats[sid]["tasks"], stats[sid]["milestones"]
+        tasks_done = tasks["status"].get("done", 0)
+        milestones_done = milestones["status"].get("completed", 0)
+        result.append({
+            "startup_id": sid,
+            "name": startup.get("name", ""),
+            "industry": startup.get("industry", ""),
+            "stage": startup.get("stage", ""),
+            "role": roles[sid],
+            "financials": {
+                "current_balance": runway["balance"],
+                "total_investments": ledgers[sid]["investments"]["total"],
+                "avg_monthly_burn": round(runway["avg_monthly_burn"], 2),
+                "runway_months": runway["runway_months"],
+            },
+            "metrics": {
+                "team_size": team_sizes.get(sid, 0),
+                "tasks_completed": tasks_done,
+                "tasks_total": tasks["total"],
+                "task_completion_rate": round(tasks_done / tasks["total"] * 100) if tasks["total"] else 0,
+                "milestones_completed": milestones_done,
+                "milestones_total": milestones["total"],
+                "milestone_completion_rate": round(milestones_done / milestones["total"] * 100) if milestones["total"] else 0,
+            },
+        })
+    return {
+        "startups": result,
+        "totals": {
+            "startups": len(result),
+            "balance": sum(s["financials"]["current_balance"] for s in result),
+            "monthly_burn": round(sum(s["financials"]["avg_monthly_burn"] for s in result), 2),
+        },
+        "has_more": has_more,
+    }
+
+# ==================== EXPORT ROUTES ====================
+
+# dataset -> (collection, date field used for filtering/ordering, columns)
+EXPORT_DATASETS = {
+    "income": ("income", "date", ["id", "date", "title", "amount", "category", "notes", "created_by", "created_at"]),
+    "expenses": ("expenses", "date", ["id", "date", "title", "amount", "category", "notes", "created_by", "created_at"]),
+    "investments": ("investments", "date", ["id", "date", "investor_name", "amount", "equity_percentage", "investment_type", "notes", "created_by", "created_at"]),
+    "tasks": ("tasks", "created_at", ["id", "title", "description", "status", "priority", "assigned_to", "milestone_id", "due_date", "created_by", "created_at", "updated_at"]),
+}
+EXPORT_BATCH_SIZE = 1000
+
+async def _export_rows(cursor, columns: list, fmt: str):
+    """Yield CSV or NDJSON chunks straight from a Motor cursor, one batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    pending = 0
+    async for doc in cursor:
+        if fmt == "csv":
+            writer.writerow(["" if doc.get(c) is None else doc.get(c) for c in columns])
+        else:
+            buffer.write(json.dumps({c: doc.get(c) for c in columns}) + "\n")
+        pending += 1
+        if pending >= 200:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+@api_router.get("/startups/{startup_id}/export/{dataset}")
+async def export_dataset(
+    startup_id: str,
+    dataset: Literal["income", "expenses", "investments", "tasks"],
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user=Depends(get_current_user),
+):
+    """Stream a ledger or the task list as CSV or NDJSON, with constant memory use."""
+    member = await get_membership(startup_id, user.id)
+    if not member:
+        raise HTTPException(status_code=403, detail="Not a member")
+    collection, date_field, columns = EXPORT_DATASETS[dataset]
+    query = {"startup_id": startup_id, **date_range_filter(date_field, date_from, date_to)}
+    cursor = db[collection].find(query, {"_id": 0}).sort([(date_field, 1), ("id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{dataset}-{startup_id}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        _export_rows(cursor, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # ==================== DEMO MODE ====================
 
 DEMO_EMAIL = "demo@velora.io"
@@ -1107,7 +2246,7 @@ async def setup_demo():
     try:
         # Try to create demo user via Supabase admin API
         try:
-            user_response = supabase_client.auth.admin.create_user({
+            user_response = await supabase_gateway.create_user({
                 "email": DEMO_EMAIL,
                 "password": DEMO_PASSWORD,
                 "email_confirm": True,
@@ -1117,7 +2256,7 @@ async def setup_demo():
         except Exception:
             # User might already exist - try signing in to get their ID
             try:
-                sign_in = supabase_client.auth.sign_in_with_password({
+                sign_in = await supabase_gateway.sign_in_with_password({
                     "email": DEMO_EMAIL,
                     "password": DEMO_PASSWORD
                 })
@@ -1154,10 +2293,15 @@ async def setup_demo():
             # Delete the old demo data to start fresh
             await db.startups.delete_one({"invite_code": "DEMO2026"})
             await db.startup_members.delete_many({"startup_id": existing_invite["id"]})
+            invalidate_membership(existing_invite["id"])
             await db.tasks.delete_many({"startup_id": existing_invite["id"]})
             await db.milestones.delete_many({"startup_id": existing_invite["id"]})
             await db.feedback.delete_many({"startup_id": existing_invite["id"]})
             await db.subscriptions.delete_many({"startup_id": existing_invite["id"]})
+            await db.startup_stats.delete_many({"startup_id": existing_invite["id"]})
+            await db.ai_results.delete_many({"startup_id": existing_invite["id"]})
+            await db.ai_jobs.delete_many({"startup_id": existing_invite["id"]})
+            await bump_data_version(existing_invite["id"])
 
         # Create demo startup
         startup_id = str(uuid.uuid4())
@@ -1296,6 +2440,8 @@ async def setup_demo():
             "updated_at": datetime.now(timezone.utc).isoformat(),
         })
 
+        await startup_stats.rebuild(db, startup_id)
+
         return {"email": DEMO_EMAIL, "password": DEMO_PASSWORD, "message": "Demo ready"}
 
     except HTTPException:
@@ -1306,6 +2452,28 @@ async def setup_demo():
 
 # ==================== APP SETUP ====================
 
+class RequestScopeMiddleware:
+    """Give each request its own membership lookup cache.
+
+    Plain ASGI rather than @app.middleware("http"): BaseHTTPMiddleware runs the
+    endpoint in a separate task and buffers streamed responses through a
+    memory stream, which is overhead on every request for no benefit here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_memberships.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_memberships.reset(token)
+
+app.add_middleware(RequestScopeMiddleware)
 
 
 # CORS Configuration - Allow Vercel frontend and local development
@@ -1337,6 +2505,7 @@ app.add_middleware(
     allow_origins=cors_origins if cors_origins else ['*'],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(api_router)
@@ -1344,22 +2513,21 @@ app.include_router(api_router)
 @app.on_event("startup")
 async def startup_event():
     logger.info("Velora API starting up...")
-    try:
-        await db.profiles.create_index("id", unique=True)
-        await db.startups.create_index("id", unique=True)
-        await db.startups.create_index("invite_code", unique=True)
-        await db.startup_members.create_index([("startup_id", 1), ("user_id", 1)], unique=True)
-        await db.tasks.create_index("id", unique=True)
-        await db.tasks.create_index("startup_id")
-        await db.milestones.create_index("id", unique=True)
-        await db.milestones.create_index("startup_id")
-        await db.feedback.create_index("startup_id")
-        await db.subscriptions.create_index("startup_id")
-        logger.info("Database indexes created")
-    except Exception as e:
-        # Indexes may already exist, log and continue
-        logger.warning(f"Index creation warning (may already exist): {e}")
+    if AUTH_VERIFY_MODE == 'local' and not SUPABASE_JWT_SECRET:
+        if AUTH_REMOTE_FALLBACK:
+            logger.warning("SUPABASE_JWT_SECRET is not set: HS256 tokens are verified by Supabase on every cache miss")
+        else:
+            logger.error("SUPABASE_JWT_SECRET is not set and AUTH_REMOTE_FALLBACK=false: HS256 tokens will be rejected")
+    if APPLY_INDEXES_ON_STARTUP:
+        try:
+            await indexes.apply_indexes(db, logger=logger)
+        except Exception as e:
+            # Never block startup on index maintenance; `manage.py apply-indexes` can be rerun
+            logger.warning(f"Index registry not applied: {e}")
+    ai_jobs.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await ai_jobs.stop()
     client.close()
+    supabase_gateway.shutdown()
@@ -0,0 +1,305 @@
+"""Incrementally maintained per-startup counters (the `startup_stats` collection).
+
+Every task, milestone and feedback write route applies an atomic `$inc` to the
+startup's stats document, so analytics can be read in O(1). The counters can
+be recomputed from the source collections with `rebuild` and compared against
+them with `check` (see manage.py).
+
+A rebuild first claims the document through a `building` token (creating a
+placeholder marked `stale` if there is none), so only one rebuild runs per
+startup and counter updates from concurrent writes land on the document
+instead of being skipped. Write routes wrap the source write and its counter
+update in `writing`, which counts the write in `writers` before the source
+collection is touched, then decrements it and bumps `version` once the `$inc`
+has landed. The rebuild only commits its counters while no write is in
+flight and `version` is unchanged since before it aggregated; otherwise it
+aggregates again.
+
+Document shape:
+    {
+        "startup_id": "...",
+        "tasks": {"total": 0, "status": {"todo": 0, ...}, "priority": {"medium": 0, ...}},
+        "milestones": {"total": 0, "status": {"pending": 0, ...}},
+        "feedback": {"total": 0, "category": {"product": 0, ...}, "rating_sum": 0},
+        "version": 0,
+        "writers": 0,
+        "rebuilt_at": "...",
+    }
+"""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+REBUILD_ATTEMPTS = 5
+# How long a reader waits for another rebuild, and after how long an unfinished claim is taken over
+REBUILD_WAIT = 30.0
+
+TASK_STATUSES = ["todo", "in_progress", "review", "done"]
+TASK_PRIORITIES = ["low", "medium", "high", "urgent"]
+MILESTONE_STATUSES = ["pending", "in_progress", "completed"]
+
+
+def _key(value, default: str) -> str:
+    # Counter keys become field names, so keep them free of path/operator characters.
+    return str(value if value is not None else default).replace(".", "_").replace("$", "_")
+
+
+def task_counters(task: dict, sign: int = 1) -> dict:
+    return {
+        "tasks.total": sign,
+        f"tasks.status.{_key(task.get('status'), 'todo')}": sign,
+        f"tasks.priority.{_key(task.get('priority'), 'medium')}": sign,
+    }
+
+
+def milestone_counters(milestone: dict, sign: int = 1) -> dict:
+    return {
+        "milestones.total": sign,
+        f"milestones.status.{_key(milestone.get('status'), 'pending')}": sign,
+    }
+
+
+def feedback_counters(feedback: dict, sign: int = 1) -> dict:
+    return {
+        "feedback.total": sign,
+        f"feedback.category.{_key(feedback.get('category'), 'other')}": sign,
+        "feedback.rating_sum": sign * (feedback.get("rating") or 0),
+    }
+
+
+def diff(before: dict, after: dict) -> dict:
+    """Merge two counter dicts, dropping zero entries."""
+    merged = dict(before)
+    for k, v in after.items():
+        merged[k] = merged.get(k, 0) + v
+    return {k: v for k, v in merged.items() if v}
+
+
+@asynccontextmanager
+async def writing(db, startup_id: str):
+    """Wrap a task, milestone or feedback write and its counter update, so concurrent rebuilds hold off.
+
+    A startup without a stats document gets a `stale` placeholder, built from
+    the source collections on first read.
+    """
+    mark = {"$inc": {"writers": 1}}
+    try:
+        await db.startup_stats.update_one({"startup_id": startup_id}, {**mark, "$setOnInsert": {"version": 0, "stale": True}}, upsert=True)
+    except DuplicateKeyError:
+        await db.startup_stats.update_one({"startup_id": startup_id}, mark)  # created concurrently
+    try:
+        yield
+    finally:
+        await db.startup_stats.update_one({"startup_id": startup_id}, {"$inc": {"writers": -1, "version": 1}})
+
+
+async def apply(db, startup_id: str, inc: dict):
+    """Atomically apply counter changes; call inside `writing`, after the source write.
+
+    Startups without a stats document are skipped (`writing` creates one
+    marked stale, which is rebuilt on first read).
+    """
+    if inc:
+        await db.startup_stats.update_one({"startup_id": startup_id}, {"$inc": {**inc, "version": 1}})
+
+
+async def on_task_change(db, startup_id: str, before: Optional[dict], after: Optional[dict]):
+    inc = diff(task_counters(before, -1) if before else {}, task_counters(after) if after else {})
+    await apply(db, startup_id, inc)
+
+
+async def on_milestone_change(db, startup_id: str, before: Optional[dict], after: Optional[dict]):
+    inc = diff(milestone_counters(before, -1) if before else {}, milestone_counters(after) if after else {})
+    await apply(db, startup_id, inc)
+
+
+async def on_feedback_change(db, startup_id: str, before: Optional[dict], after: Optional[dict]):
+    inc = diff(feedback_counters(before, -1) if before else {}, feedback_counters(after) if after else {})
+    await apply(db, startup_id, inc)
+
+
+def empty_stats(startup_id: str) -> dict:
+    return {
+        "startup_id": startup_id,
+        "tasks": {"total": 0, "status": {}, "priority": {}},
+        "milestones": {"total": 0, "status": {}},
+        "feedback": {"total": 0, "category": {}, "rating_sum": 0},
+    }
+
+
+def _group_count(field: str, default: str) -> list:
+    return [{"$group": {"_id": {"$ifNull": ["$" + field, default]}, "n": {"$sum": 1}}}]
+
+
+async def aggregate(db, startup_id: str) -> dict:
+    """Compute the stats document from the source collections."""
+    task_pipeline = [
+        {"$match": {"startup_id": startup_id}},
+        {"$facet": {"status": _group_count("status", "todo"), "priority": _group_count("priority", "medium")}},
+    ]
+    milestone_pipeline = [{"$match": {"startup_id": startup_id}}] + _group_count("status", "pending")
+    feedback_pipeline = [
+        {"$match": {"startup_id": startup_id}},
+        {"$facet": {
+            "category": _group_count("category", "other"),
+            "rating": [{"$group": {"_id": None, "sum": {"$sum": {"$ifNull": ["$rating", 0]}}}}],
+        }},
+    ]
+    task_facets, milestone_rows, feedback_facets = await asyncio.gather(
+        db.tasks.aggregate(task_pipeline).to_list(1),
+        db.milestones.aggregate(milestone_pipeline).to_list(None),
+        db.feedback.aggregate(feedback_pipeline).to_list(1),
+    )
+    task_facets = task_facets[0] if task_facets else {"status": [], "priority": []}
+    feedback_facets = feedback_facets[0] if feedback_facets else {"category": [], "rating": []}
+
+    stats = empty_stats(startup_id)
+    stats["tasks"]["status"] = {_key(r["_id"], "todo"): r["n"] for r in task_facets["status"]}
+    stats["tasks"]["priority"] = {_key(r["_id"], "medium"): r["n"] for r in task_facets["priority"]}
+    stats["tasks"]["total"] = sum(stats["tasks"]["status"].values())
+    stats["milestones"]["status"] = {_key(r["_id"], "pending"): r["n"] for r in milestone_rows}
+    stats["milestones"]["total"] = sum(stats["milestones"]["status"].values())
+    stats["feedback"]["category"] = {_key(r["_id"], "other"): r["n"] for r in feedback_facets["category"]}
+    stats["feedback"]["total"] = sum(stats["feedback"]["category"].values())
+    stats["feedback"]["rating_sum"] = feedback_facets["rating"][0]["sum"] if feedback_facets["rating"] else 0
+    return stats
+
+
+async def _claim(db, startup_id: str) -> Optional[str]:
+    """Take the rebuild claim; returns a token, or None if another rebuild holds it."""
+    token = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(seconds=REBUILD_WAIT)).isoformat()
+    try:
+        await db.startup_stats.update_one(
+            {"startup_id": startup_id, "$or": [{"building": None}, {"building_since": {"$lt": stale}}]},
+            {"$set": {"building": token, "building_since": now.isoformat()}, "$setOnInsert": {"version": 0, "stale": True}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return None
+    doc = await db.startup_stats.find_one({"startup_id": startup_id}, {"_id": 0, "building": 1})
+    return token if doc and doc.get("building") == token else None
+
+
+async def _rebuild_claimed(db, startup_id: str, token: str) -> Optional[dict]:
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    attempts = 0
+    while attempts < REBUILD_ATTEMPTS and asyncio.get_running_loop().time() < deadline:
+        doc = await db.startup_stats.find_one({"startup_id": startup_id}, {"_id": 0, "version": 1, "writers": 1})
+        if (doc or {}).get("writers", 0) > 0:
+            await asyncio.sleep(0.05)  # a write is in flight; its source change may be visible before its $inc
+            continue
+        attempts += 1
+        version = (doc or {}).get("version")  # None also matches documents from before versioning
+        stats = await aggregate(db, startup_id)
+        stats["rebuilt_at"] = datetime.now(timezone.utc).isoformat()
+        committed = await db.startup_stats.find_one_and_update(
+            {"startup_id": startup_id, "building": token, "version": version, "writers": {"$in": [0, None]}},
+            {"$set": {k: v for k, v in stats.items() if k != "startup_id"},
+             "$unset": {"building": "", "building_since": "", "stale": ""}, "$inc": {"version": 1}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+        if committed:
+            return committed
+    # Writes kept landing; leave the document stale so the next read rebuilds it
+    await db.startup_stats.update_one({"startup_id": startup_id, "building": token},
+                                      {"$set": {"stale": True}, "$unset": {"building": "", "building_since": ""}})
+    return None
+
+
+async def rebuild(db, startup_id: str) -> dict:
+    """Recompute the stats document from the source collections.
+
+    Waits for a rebuild already in progress. If the document cannot be
+    committed within REBUILD_WAIT seconds, returns freshly aggregated stats
+    and leaves it to be rebuilt on the next read.
+    """
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    while True:
+        token = await _claim(db, startup_id)
+        if token:
+            built = await _rebuild_claimed(db, startup_id, token)
+            return built or await aggregate(db, startup_id)
+        if asyncio.get_running_loop().time() > deadline:
+            return await aggregate(db, startup_id)
+        await asyncio.sleep(0.05)
+
+
+def _ready(doc: Optional[dict]) -> bool:
+    return bool(doc) and not doc.get("building") and not doc.get("stale")
+
+
+async def get(db, startup_id: str) -> dict:
+    """Return the stats document, building it on first use (or waiting for a concurrent build)."""
+    deadline = asyncio.get_running_loop().time() + REBUILD_WAIT
+    while True:
+        stats = await db.startup_stats.find_one({"startup_id": startup_id}, {"_id": 0})
+        if _ready(stats):
+            return stats
+        token = await _claim(db, startup_id)
+        if token:
+            return await _rebuild_claimed(db, startup_id, token) or await aggregate(db, startup_id)
+        if asyncio.get_running_loop().time() > deadline:
+            return await aggregate(db, startup_id)
+        await asyncio.sleep(0.05)
+
+
+async def get_many(db, startup_ids: list) -> dict:
+    """`get` for many startups at once: {startup_id: stats}."""
+    docs = await db.startup_stats.find({"startup_id": {"$in": startup_ids}}, {"_id": 0}).to_list(None)
+    stats = {s["startup_id"]: s for s in docs if _ready(s)}
+    missing = [sid for sid in startup_ids if sid not in stats]
+    for sid, built in zip(missing, await asyncio.gather(*(get(db, sid) for sid in missing))):
+        stats[sid] = built
+    return stats
+
+
+def _flatten(doc: dict, prefix: str = "") -> dict:
+    flat = {}
+    for k, v in doc.items():
+        if isinstance(v, dict):
+            flat.update(_flatten(v, f"{prefix}{k}."))
+        elif isinstance(v, (int, float)) and v:
+            flat[f"{prefix}{k}"] = v
+    return flat
+
+
+async def check(db, startup_id: str) -> dict:
+    """Return {counter: (stored, actual)} for every counter that has drifted."""
+    stored = await db.startup_stats.find_one({"startup_id": startup_id}, {"_id": 0, "tasks": 1, "milestones": 1, "feedback": 1}) or {}
+    actual = await aggregate(db, startup_id)
+    actual.pop("startup_id")
+    stored_flat, actual_flat = _flatten(stored), _flatten(actual)
+    return {
+        k: (stored_flat.get(k, 0), actual_flat.get(k, 0))
+        for k in set(stored_flat) | set(actual_flat)
+        if stored_flat.get(k, 0) != actual_flat.get(k, 0)
+    }
+
+
+def to_analytics(stats: dict, team_size: int) -> dict:
+    """Render a stats document in the get_analytics response shape."""
+    tasks, milestones, feedback = stats["tasks"], stats["milestones"], stats["feedback"]
+    task_stats = {s: tasks["status"].get(s, 0) for s in TASK_STATUSES}
+    total_tasks = tasks["total"]
+    completed_tasks = task_stats["done"]
+    return {
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "completion_rate": round((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0,
+        "task_stats": task_stats,
+        "priority_stats": {p: tasks["priority"].get(p, 0) for p in TASK_PRIORITIES},
+        "total_milestones": milestones["total"],
+        "milestone_stats": {s: milestones["status"].get(s, 0) for s in MILESTONE_STATUSES},
+        "total_feedback": feedback["total"],
+        "feedback_by_category": {c: n for c, n in feedback["category"].items() if n},
+        "avg_rating": round(feedback["rating_sum"] / feedback["total"], 1) if feedback["total"] else 0,
+        "team_size": team_size,
+    }
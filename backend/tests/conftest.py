@@ -0,0 +1,60 @@
+"""
+Shared setup for in-process backend tests.
+
+server.py reads its configuration from the environment at import time, so
+defaults are set here before any test module imports it. No network services
+are contacted by these defaults.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "velora_test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret-with-at-least-32-bytes!!")
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Replace server.db with an in-memory Motor-compatible database."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server
+
+    database = mongomock_motor.AsyncMongoMockClient()["velora_test"]
+    monkeypatch.setattr(server, "db", database)
+    server._membership_cache.clear()
+    server.response_cache.reset()
+    server.ai_limiter.reset()
+    return database
+
+
+@pytest.fixture
+def api_client(mongo):
+    """TestClient for the app, authenticated as user `u1` and backed by the in-memory db."""
+    from fastapi.testclient import TestClient
+    import server
+
+    server.app.dependency_overrides[server.get_current_user] = lambda: server.AuthUser(id="u1", email="u1@test.com")
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.pop(server.get_current_user, None)
+
+
+@pytest.fixture
+def startup(mongo):
+    """Startup `s1` with user `u1` as its founder (membership `m1`); returns the in-memory db."""
+    async def seed():
+        await mongo.startups.insert_one({"id": "s1", "name": "Acme", "industry": "fintech", "stage": "seed"})
+        await mongo.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "founder", "joined_at": "2026-01-01T00:00:00"})
+    asyncio.run(seed())
+    return mongo
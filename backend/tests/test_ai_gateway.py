@@ -0,0 +1,134 @@
+"""
+Tests for the shared AI gateway:
+- The SDK is configured once and one model is kept per system prompt
+- Generation is async and bounded by the concurrency semaphore
+- Slow generations raise AITimeout; the AI routes map it to 504
+"""
+import asyncio
+
+import pytest
+
+import server
+from ai_gateway import AIGateway, AITimeout, AIUnavailable
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """Async iterator of response chunks, like the SDK's stream=True response."""
+
+    def __init__(self, fake, text):
+        self.fake = fake
+        self.words = text.split(" ")
+
+    async def __aiter__(self):
+        self.fake.active += 1
+        self.fake.peak = max(self.fake.peak, self.fake.active)
+        try:
+            for i, word in enumerate(self.words):
+                await asyncio.sleep(self.fake.delay)
+                self.fake.streamed += 1
+                yield FakeResponse(word if i == 0 else " " + word)
+        except (asyncio.CancelledError, GeneratorExit):
+            self.fake.cancelled = True
+            raise
+        finally:
+            self.fake.active -= 1
+
+
+class FakeGenAI:
+    """Stand-in for google.generativeai."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.configured = 0
+        self.models = []
+        self.active = 0
+        self.peak = 0
+        self.streamed = 0
+        self.cancelled = False
+
+    def configure(self, api_key):
+        self.configured += 1
+
+    def GenerativeModel(self, model_name, system_instruction):
+        fake = self
+
+        class Model:
+            async def generate_content_async(self, prompt, stream=False):
+                text = f"[{system_instruction[:10]}] {prompt[:20]}"
+                if stream:
+                    return FakeStream(fake, text)
+                fake.active += 1
+                fake.peak = max(fake.peak, fake.active)
+                try:
+                    await asyncio.sleep(fake.delay)
+                    return FakeResponse(text)
+                finally:
+                    fake.active -= 1
+        self.models.append(system_instruction)
+        return Model()
+
+
+class TestGateway:
+
+    def test_models_reused_per_system_prompt(self):
+        genai = FakeGenAI()
+        gateway = AIGateway("key", "gemini-test", 4, 5, genai=genai)
+
+        async def scenario():
+            for prompt in ("a", "b", "c"):
+                await gateway.generate(prompt, "advisor")
+            await gateway.generate("d", "pitch")
+        asyncio.run(scenario())
+        assert genai.configured == 1
+        assert genai.models == ["advisor", "pitch"]
+
+    def test_concurrency_is_bounded(self):
+        genai = FakeGenAI(delay=0.02)
+        gateway = AIGateway("key", "gemini-test", 3, 5, genai=genai)
+
+        async def scenario():
+            return await asyncio.gather(*(gateway.generate(str(i), "advisor") for i in range(10)))
+        assert len(asyncio.run(scenario())) == 10
+        assert genai.peak == 3
+        print("✓ 10 generations, never more than 3 at once")
+
+    def test_timeout(self):
+        gateway = AIGateway("key", "gemini-test", 1, 0.05, genai=FakeGenAI(delay=1))
+        with pytest.raises(AITimeout):
+            asyncio.run(gateway.generate("slow", "advisor"))
+
+    def test_unconfigured(self):
+        with pytest.raises(AIUnavailable):
+            asyncio.run(AIGateway(None, "gemini-test", 1, 1).generate("x", "advisor"))
+
+
+class TestAIRoutes:
+
+    @pytest.fixture
+    def startup(self, mongo):
+        async def seed():
+            await mongo.startups.insert_one({"id": "s1", "name": "Acme", "industry": "fintech", "stage": "seed"})
+            await mongo.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "founder"})
+        asyncio.run(seed())
+        return mongo
+
+    def test_insights_and_pitch(self, api_client, startup, monkeypatch):
+        monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 2, 5, genai=FakeGenAI()))
+        insights = api_client.post("/api/ai/insights", json={"startup_id": "s1", "prompt_type": "growth"})
+        assert insights.status_code == 200
+        assert insights.json()["insights"].startswith("[You are a ] Provide a growth")
+        pitch = api_client.post("/api/ai/pitch", json={"startup_id": "s1"})
+        assert pitch.json()["startup_name"] == "Acme"
+
+    def test_timeout_maps_to_504(self, api_client, startup, monkeypatch):
+        monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 1, 0.05, genai=FakeGenAI(delay=1)))
+        assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).status_code == 504
+
+    def test_missing_key_maps_to_503(self, api_client, startup, monkeypatch):
+        monkeypatch.setattr(server, "ai_gateway", AIGateway(None, "gemini-test", 1, 1))
+        assert api_client.post("/api/ai/insights", json={"startup_id": "s1"}).status_code == 503
@@ -0,0 +1,156 @@
+"""
+Tests for the AI job queue:
+- POST returns a job id at once; polling (or long-polling) returns the result
+- Identical requests while a job is active share it: one Gemini call
+- The worker pool bounds how many jobs generate at once
+- Failures are recorded on the job
+- Stored results are served without a model key
+- Submissions racing for the last queue slot get QueueFull, not a stray job
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from ai_gateway import AIGateway
+from ai_jobs import AIJobQueue, JobFailed, QueueFull
+from test_ai_result_cache import CountingGenAI
+
+
+@pytest.fixture
+def client(api_client, startup, monkeypatch):
+    monkeypatch.setattr(server, "APPLY_INDEXES_ON_STARTUP", False)
+    # One event loop for the whole test, so the workers outlive each request
+    with TestClient(server.app) as c:
+        yield c
+
+
+def test_jobs_are_deduplicated_and_polled(client, monkeypatch):
+    genai = CountingGenAI()
+    genai.delay = 0.2
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 4, 5, genai=genai))
+
+    submitted = [client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"}) for _ in range(3)]
+    assert [r.status_code for r in submitted] == [202] * 3
+    ids = {r.json()["job_id"] for r in submitted}
+    assert len(ids) == 1
+    assert [r.json()["deduplicated"] for r in submitted] == [False, True, True]
+
+    job_id = ids.pop()
+    job = client.get(f"/api/ai/jobs/{job_id}", params={"wait": 5}).json()
+    assert job["status"] == "done"
+    assert job["result"]["pitch"].startswith("[You are an]")
+    assert job["result"]["startup_name"] == "Acme"
+    assert "dedup_key" not in job
+    assert genai.calls == 1
+
+    # A different prompt type is a separate job; a finished job is not reused
+    other = client.post("/api/ai/insights/jobs", json={"startup_id": "s1", "prompt_type": "growth"}).json()
+    assert other["job_id"] != job_id
+    again = client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"}).json()
+    assert again["job_id"] != job_id and not again["deduplicated"]
+    done = client.get(f"/api/ai/jobs/{again['job_id']}", params={"wait": 5}).json()
+    assert done["result"]["cached"] is True
+
+    # Stored results are still served once the key is gone; new generations are not
+    monkeypatch.setattr(server, "ai_gateway", AIGateway(None, "gemini-test", 1, 1))
+    offline = client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"})
+    assert offline.status_code == 202
+    assert client.get(f"/api/ai/jobs/{offline.json()['job_id']}", params={"wait": 5}).json()["result"]["cached"] is True
+    assert client.post("/api/ai/pitch/jobs", json={"startup_id": "s1", "force_refresh": True}).status_code == 503
+
+
+def test_job_access_and_failures(client, monkeypatch):
+    assert client.get("/api/ai/jobs/missing").status_code == 404
+    assert client.post("/api/ai/pitch/jobs", json={"startup_id": "other"}).status_code == 403
+
+    monkeypatch.setattr(server, "ai_gateway", AIGateway(None, "gemini-test", 1, 1))
+    assert client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"}).status_code == 503
+
+    genai = CountingGenAI()
+    genai.delay = 1
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 1, 0.05, genai=genai))
+    job_id = client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"}).json()["job_id"]
+    job = client.get(f"/api/ai/jobs/{job_id}", params={"wait": 5}).json()
+    assert job["status"] == "failed"
+    assert job["error"] == {"status": 504, "detail": "AI service timed out"}
+
+
+def test_worker_pool_bounds_concurrency(mongo):
+    async def scenario():
+        queue = AIJobQueue(lambda: mongo.ai_jobs, workers=2, max_pending=10, ttl=60, stale_after=60)
+        running, peak = 0, 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return {"ok": True}
+
+        async def fail():
+            raise JobFailed(429, "slow down")
+
+        jobs = [(await queue.submit("s1", "pitch", str(i), work))[0] for i in range(6)]
+        failed = (await queue.submit("s1", "pitch", "f", fail))[0]
+        results = [await queue.wait(j["id"], 5) for j in jobs]
+        failure = await queue.wait(failed["id"], 5)
+        await queue.stop()
+        return peak, results, failure
+
+    peak, results, failure = asyncio.run(scenario())
+    assert peak == 2
+    assert all(r["status"] == "done" and r["result"] == {"ok": True} for r in results)
+    assert failure["error"] == {"status": 429, "detail": "slow down"}
+
+
+def test_stale_job_is_reported_failed(mongo):
+    async def scenario():
+        queue = AIJobQueue(lambda: mongo.ai_jobs, workers=1, max_pending=10, ttl=60, stale_after=60)
+        # Left behind by a worker process that died
+        await mongo.ai_jobs.insert_one({"id": "j1", "startup_id": "s1", "dedup_key": "s1:pitch:x", "status": "running",
+                                        "created_at": "2020-01-01T00:00:00+00:00"})
+        job = await queue.get("j1")
+        fresh, deduplicated = await queue.submit("s1", "pitch", "x", lambda: asyncio.sleep(0, {}))
+        await queue.stop()
+        return job, fresh, deduplicated
+
+    job, fresh, deduplicated = asyncio.run(scenario())
+    assert job["status"] == "failed"
+    assert fresh["id"] != "j1" and not deduplicated
+
+
+def test_submissions_racing_for_last_slot(mongo):
+    class SlowInserts:
+        """The job collection, with inserts that yield to other submissions"""
+
+        def __getattr__(self, name):
+            return getattr(mongo.ai_jobs, name)
+
+        async def insert_one(self, doc):
+            await asyncio.sleep(0.01)
+            return await mongo.ai_jobs.insert_one(doc)
+
+    async def scenario():
+        queue = AIJobQueue(SlowInserts, workers=1, max_pending=1, ttl=60, stale_after=60)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+            return {}
+
+        await queue.submit("s1", "pitch", "busy", blocked)
+        await asyncio.sleep(0.01)  # the worker picks it up, leaving one free slot
+        results = await asyncio.gather(
+            *(queue.submit("s1", "pitch", str(i), blocked) for i in range(3)),
+            return_exceptions=True,
+        )
+        release.set()
+        await queue.stop()
+        return results, await mongo.ai_jobs.count_documents({})
+
+    results, stored = asyncio.run(scenario())
+    assert sum(isinstance(r, QueueFull) for r in results) == 2
+    assert stored == 2
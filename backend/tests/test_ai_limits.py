@@ -0,0 +1,116 @@
+"""
+Tests for per-startup AI rate limits and token budgets:
+- The token bucket allows the plan's burst, then refills at the plan's rate
+- Refusals return 429 with Retry-After and are then served from memory
+- Monthly token budgets are enforced and usage is exposed per startup
+- Cached results do not spend any allowance
+"""
+import asyncio
+
+import pytest
+
+import server
+from ai_gateway import AIGateway
+from ai_limits import PLAN_LIMITS, AILimiter, RateLimited
+from test_ai_gateway import FakeGenAI
+
+
+class Clock:
+    def __init__(self, now=1_780_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def limiter(mongo):
+    async def seed():
+        await mongo.startups.insert_many([
+            {"id": "free1", "subscription_plan": "free"},
+            {"id": "pro1", "subscription_plan": "pro"},
+        ])
+    asyncio.run(seed())
+    return AILimiter(lambda: mongo, clock=Clock())
+
+
+def test_token_bucket_per_plan(limiter):
+    async def burst(startup_id, n):
+        allowed = 0
+        for _ in range(n):
+            try:
+                await limiter.acquire(startup_id)
+                allowed += 1
+            except RateLimited as e:
+                return allowed, e
+        return allowed, None
+
+    allowed, refused = asyncio.run(burst("free1", 10))
+    assert allowed == PLAN_LIMITS["free"]["capacity"]
+    assert refused.retry_after == 12  # one request per 12 s at 5/minute
+    assert asyncio.run(burst("pro1", 10)) == (10, None)
+
+    # Refused again from memory, without reading the bucket
+    asyncio.run(burst("free1", 1))
+    assert limiter.counters["fast_path_rejections"] == 1
+
+    limiter.clock.now += 12
+    assert asyncio.run(burst("free1", 2))[0] == 1
+
+
+def test_rejection_state_is_bounded(limiter):
+    limiter._blocked_until["free1"] = (limiter.clock.now + 12, "limited")
+    limiter._exhausted["pro1"] = "2026-05"
+    limiter.clock.now += 86400
+    assert "free1" not in limiter._blocked_until and "pro1" not in limiter._exhausted
+    assert limiter._blocked_until.maxsize == limiter._exhausted.maxsize
+
+
+def test_monthly_budget(limiter):
+    async def scenario():
+        await limiter.acquire("free1")
+        await limiter.record("free1", PLAN_LIMITS["free"]["monthly_tokens"])
+        with pytest.raises(RateLimited) as refused:
+            await limiter.acquire("free1")
+        usage = await limiter.usage("free1")
+        limiter.clock.now += refused.value.retry_after
+        await limiter.acquire("free1")  # a new month
+        return refused.value, usage
+
+    refused, usage = asyncio.run(scenario())
+    assert refused.detail == "Monthly AI token budget exhausted"
+    assert usage["plan"] == "free"
+    assert usage["tokens_remaining"] == 0 and usage["requests"] == 1
+
+
+def test_routes_return_429_and_usage(api_client, monkeypatch):
+    async def seed():
+        await server.db.startups.insert_one({"id": "s1", "name": "Acme", "subscription_plan": "free"})
+        await server.db.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "founder"})
+    asyncio.run(seed())
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 4, 5, genai=FakeGenAI()))
+
+    statuses = [api_client.post("/api/ai/insights", json={"startup_id": "s1", "force_refresh": True}).status_code for _ in range(6)]
+    assert statuses == [200] * 5 + [429]
+    limited = api_client.post("/api/ai/pitch/stream", json={"startup_id": "s1"})
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) > 0
+    assert api_client.post("/api/ai/pitch/jobs", json={"startup_id": "s1"}).status_code == 429
+
+    # Cached results are free
+    cached = api_client.post("/api/ai/insights", json={"startup_id": "s1"})
+    assert cached.status_code == 200 and cached.json()["cached"] is True
+
+    usage = api_client.get("/api/startups/s1/ai/usage").json()
+    assert usage["plan"] == "free" and usage["enforced"] is True
+    assert usage["requests"] == 5 and usage["tokens_used"] > 0
+    assert usage["requests_available"] == 0
+    assert server.ai_limiter.stats()["rate_limited"] == 1
+    assert api_client.get("/api/health/ai").json()["limits"]["allowed"] == 5
+
+    # Re-posting the current plan does not refill the bucket
+    assert api_client.post("/api/startups/s1/subscription", json={"plan": "free"}).status_code == 200
+    assert api_client.post("/api/ai/insights", json={"startup_id": "s1", "force_refresh": True}).status_code == 429
+
+    # Upgrading takes effect at once
+    assert api_client.post("/api/startups/s1/subscription", json={"plan": "pro"}).status_code == 200
+    assert api_client.post("/api/ai/insights", json={"startup_id": "s1", "force_refresh": True}).status_code == 200
@@ -0,0 +1,70 @@
+"""
+Tests for the persistent AI result cache:
+- Repeating a request with unchanged startup data is served from ai_results
+- A relevant change (new task) or force_refresh triggers a new generation
+- Expired entries are not served
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from ai_gateway import AIGateway
+from test_ai_gateway import FakeGenAI
+
+
+class CountingGenAI(FakeGenAI):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def GenerativeModel(self, model_name, system_instruction):
+        model = super().GenerativeModel(model_name, system_instruction)
+        generate, fake = model.generate_content_async, self
+
+        async def counted(prompt, stream=False):
+            fake.calls += 1
+            return await generate(prompt, stream=stream)
+        model.generate_content_async = counted
+        return model
+
+
+@pytest.fixture
+def genai(api_client, startup, monkeypatch):
+    fake = CountingGenAI()
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 2, 5, genai=fake))
+    return fake
+
+
+def test_repeat_request_is_cached(api_client, genai):
+    first = api_client.post("/api/ai/insights", json={"startup_id": "s1", "prompt_type": "growth"}).json()
+    second = api_client.post("/api/ai/insights", json={"startup_id": "s1", "prompt_type": "growth"}).json()
+    assert first["cached"] is False and second["cached"] is True
+    assert second["insights"] == first["insights"]
+    assert second["generated_at"] == first["generated_at"]
+    assert genai.calls == 1
+
+    # Another prompt type and the pitch are separate entries
+    assert api_client.post("/api/ai/insights", json={"startup_id": "s1", "prompt_type": "tasks"}).json()["cached"] is False
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).json()["cached"] is False
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).json()["cached"] is True
+    assert genai.calls == 3
+
+
+def test_data_change_and_force_refresh(api_client, genai):
+    api_client.post("/api/ai/pitch", json={"startup_id": "s1"})
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1", "force_refresh": True}).json()["cached"] is False
+    assert genai.calls == 2
+
+    api_client.post("/api/startups/s1/tasks", json={"title": "Ship it"})
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).json()["cached"] is False
+    assert genai.calls == 3
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).json()["cached"] is True
+
+
+def test_expired_entry_is_regenerated(api_client, genai):
+    api_client.post("/api/ai/pitch", json={"startup_id": "s1"})
+    asyncio.run(server.db.ai_results.update_many({}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}}))
+    assert api_client.post("/api/ai/pitch", json={"startup_id": "s1"}).json()["cached"] is False
+    assert genai.calls == 2
@@ -0,0 +1,91 @@
+"""
+Tests for the AI prompt snapshot:
+- Counts match the source collections, with no 100/50 document caps
+- The digest lists the most recently updated tasks and the strongest feedback
+- The digest stays within its token budget
+"""
+import asyncio
+
+import pytest
+
+import ai_snapshot
+import server
+import startup_stats
+
+
+@pytest.fixture
+def seeded(mongo):
+    async def seed():
+        await mongo.startups.insert_one({"id": "s1", "name": "Acme", "industry": "fintech", "stage": "seed",
+                                         "description": None, "invite_code": "ABC"})
+        await mongo.startup_members.insert_many([{"id": f"m{i}", "startup_id": "s1", "user_id": f"u{i}"} for i in range(3)])
+        await mongo.tasks.insert_many([
+            {"id": f"t{i:03d}", "startup_id": "s1", "title": f"Task {i}", "description": "x" * 500,
+             "status": "done" if i % 3 == 0 else "in_progress" if i % 3 == 1 else "todo",
+             "updated_at": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00"}
+            for i in range(150)
+        ])
+        await mongo.milestones.insert_many([
+            {"id": f"ms{i}", "startup_id": "s1", "title": f"M{i}", "status": "completed" if i < 20 else "pending"}
+            for i in range(60)
+        ])
+        await mongo.feedback.insert_many([
+            {"id": f"f{i:02d}", "startup_id": "s1", "title": f"Feedback {i}", "content": "fine", "category": "product",
+             "rating": 3, "created_at": f"2026-01-{i + 1:02d}T00:00:00+00:00"}
+            for i in range(25)
+        ] + [
+            {"id": "f-low", "startup_id": "s1", "title": "Onboarding is confusing", "content": "Took me an hour",
+             "category": "product", "rating": 1, "created_at": "2026-01-10T12:00:00+00:00"},
+            {"id": "f-high", "startup_id": "s1", "title": "Love the dashboard", "rating": 5,
+             "category": "business", "created_at": "2026-01-05T12:00:00+00:00"},
+        ])
+        await mongo.tasks.insert_one({"id": "other", "startup_id": "s2", "title": "Not ours", "status": "done",
+                                      "updated_at": "2027-01-01T00:00:00+00:00"})
+    asyncio.run(seed())
+    return mongo
+
+
+def test_counts_and_digest(seeded):
+    snapshot = asyncio.run(ai_snapshot.build(seeded, "s1", 400))
+    assert snapshot["startup"] == {"name": "Acme", "industry": "fintech", "stage": "seed"}
+    assert snapshot["tasks_total"] == 150
+    assert snapshot["tasks_done"] == 50 and snapshot["tasks_in_progress"] == 50
+    assert snapshot["milestones_total"] == 60 and snapshot["milestones_completed"] == 20
+    assert snapshot["feedback_total"] == 27
+    assert snapshot["avg_rating"] == round((25 * 3 + 1 + 5) / 27, 1)
+    assert snapshot["team_size"] == 3
+    # Matches the counters maintained by the write routes
+    stats = asyncio.run(startup_stats.aggregate(seeded, "s1"))
+    assert snapshot["tasks_total"] == stats["tasks"]["total"]
+
+    assert snapshot["recent_tasks"][0] == "[todo] Task 149"
+    assert snapshot["recent_tasks"][1] == "[in_progress] Task 148"
+    assert "Not ours" not in " ".join(snapshot["recent_tasks"])
+    assert snapshot["feedback_highlights"][:2] == [
+        "[1/5 product] Onboarding is confusing: Took me an hour",
+        "[5/5 business] Love the dashboard",
+    ]
+    digest = ai_snapshot.digest_text(snapshot)
+    assert ai_snapshot.estimate_tokens(digest) <= 400 + 20  # list markup on top of the budgeted lines
+
+
+def test_digest_budget():
+    lines = [f"line {i} " + "y" * 40 for i in range(50)]
+    kept = ai_snapshot.bounded(lines, 60)
+    assert 0 < len(kept) < 50
+    assert sum(ai_snapshot.estimate_tokens(l) + 1 for l in kept) <= 60
+    assert ai_snapshot.feedback_lines([{"title": "t", "content": "z" * 1000, "rating": 2}])[0].endswith("…")
+    assert ai_snapshot.bounded(lines, 0) == []
+
+
+def test_prompt_carries_digest(seeded, monkeypatch):
+    monkeypatch.setattr(server, "AI_DIGEST_MAX_TOKENS", 120)
+    context = asyncio.run(server.build_ai_context("s1"))
+    prompt = server.insights_prompt(context, "general")
+    assert "Total tasks: 150, Done: 50, In Progress: 50" in prompt
+    assert "Recently updated tasks:\n- [todo] Task 149" in prompt
+    assert "Feedback highlights:\n- [1/5 product] Onboarding is confusing" in prompt
+    assert "Onboarding is confusing" in server.pitch_prompt(context)
+    empty = asyncio.run(ai_snapshot.build(seeded, "nobody", 120))
+    assert empty["tasks_total"] == 0 and empty["recent_tasks"] == []
+    assert "No recent task or feedback details." in server.pitch_prompt(empty)
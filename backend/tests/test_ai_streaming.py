@@ -0,0 +1,112 @@
+"""
+Tests for the SSE variants of the AI routes, against a local fake streaming model:
+- Chunks are forwarded as `chunk` events and end with a `done` event
+- A completed stream is stored, so the next request is served from ai_results
+- Stored results are served even when no model key is configured
+- A client disconnect cancels the upstream generation and frees the slot
+"""
+import asyncio
+import json
+
+import server
+from ai_gateway import AIGateway
+from test_ai_gateway import FakeGenAI
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_gateway_stream_yields_chunks():
+    fake = FakeGenAI()
+    gateway = AIGateway("key", "gemini-test", 1, 5, genai=fake)
+
+    async def collect():
+        return [chunk async for chunk in gateway.stream("Generate a compelling pitch", "You are a pitch consultant")]
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(chunks) == "[You are a ] Generate a compellin"
+    assert gateway._semaphore._value == 1
+
+
+def test_stream_routes(api_client, startup, monkeypatch):
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 2, 5, genai=FakeGenAI()))
+    res = api_client.post("/api/ai/insights/stream", json={"startup_id": "s1", "prompt_type": "growth"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(res.text)
+    assert [e for e, _ in events[:-1]] == ["chunk"] * (len(events) - 1)
+    assert events[-1] == ("done", {"cached": False, "generated_at": events[-1][1]["generated_at"]})
+    streamed = "".join(d["text"] for e, d in events if e == "chunk")
+
+    # Same text as the non-streaming route, which now hits the stored result
+    plain = api_client.post("/api/ai/insights", json={"startup_id": "s1", "prompt_type": "growth"}).json()
+    assert plain["cached"] is True and plain["insights"] == streamed
+    again = parse_events(api_client.post("/api/ai/insights/stream", json={"startup_id": "s1", "prompt_type": "growth"}).text)
+    assert again == [("chunk", {"text": streamed}), ("done", {"cached": True, "generated_at": events[-1][1]["generated_at"]})]
+
+    pitch = parse_events(api_client.post("/api/ai/pitch/stream", json={"startup_id": "s1"}).text)
+    assert pitch[-1][0] == "done"
+
+    # Stored results are still served once the key is gone; new generations are not
+    monkeypatch.setattr(server, "ai_gateway", AIGateway(None, "gemini-test", 1, 1))
+    offline = api_client.post("/api/ai/insights/stream", json={"startup_id": "s1", "prompt_type": "growth"})
+    assert offline.status_code == 200 and parse_events(offline.text) == again
+    refresh = api_client.post("/api/ai/insights/stream", json={"startup_id": "s1", "prompt_type": "growth", "force_refresh": True})
+    assert refresh.status_code == 503
+
+
+def test_stream_errors(api_client, startup, monkeypatch):
+    monkeypatch.setattr(server, "ai_gateway", AIGateway(None, "gemini-test", 1, 1))
+    assert api_client.post("/api/ai/pitch/stream", json={"startup_id": "s1"}).status_code == 503
+    assert api_client.post("/api/ai/pitch/stream", json={"startup_id": "other"}).status_code == 403
+
+    monkeypatch.setattr(server, "ai_gateway", AIGateway("key", "gemini-test", 1, 0.05, genai=FakeGenAI(delay=0.1)))
+    events = parse_events(api_client.post("/api/ai/pitch/stream", json={"startup_id": "s1"}).text)
+    assert events[-1] == ("error", {"status": 504, "detail": "AI service timed out"})
+    assert asyncio.run(server.db.ai_results.count_documents({})) == 0
+
+
+def test_disconnect_cancels_generation(api_client, startup, monkeypatch):
+    fake = FakeGenAI(delay=0.05)
+    gateway = AIGateway("key", "gemini-test", 1, 5, genai=fake)
+    monkeypatch.setattr(server, "ai_gateway", gateway)
+
+    async def scenario():
+        first_chunk = asyncio.Event()
+        sent = []
+        body = json.dumps({"startup_id": "s1"}).encode()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and b"event: chunk" in message.get("body", b""):
+                first_chunk.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/api/ai/pitch/stream", "raw_path": b"/api/ai/pitch/stream",
+            "query_string": b"", "root_path": "", "client": ("testclient", 1), "server": ("testserver", 80),
+            "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+        }
+        await asyncio.wait_for(server.app(scope, receive, send), 5)
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 200
+    assert fake.cancelled
+    assert fake.streamed < 7
+    assert gateway._semaphore._value == 1
+    assert asyncio.run(server.db.ai_results.count_documents({})) == 0
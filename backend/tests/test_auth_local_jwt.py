@@ -0,0 +1,168 @@
+"""
+Tests for local Supabase JWT verification in get_current_user:
+- Valid HS256 tokens are accepted without calling Supabase
+- Expired, wrong-audience, wrong-issuer and tampered tokens are rejected
+- Remote fallback only happens when configured
+- Verified and rejected tokens are cached, never past the token's exp
+- A failed JWKS fetch is not retried on every request
+"""
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import server
+
+SECRET = server.SUPABASE_JWT_SECRET
+
+
+def make_token(**overrides):
+    now = int(time.time())
+    claims = {
+        "sub": "user-123",
+        "email": "founder@test.com",
+        "role": "authenticated",
+        "aud": server.SUPABASE_JWT_AUDIENCE,
+        "iss": server.SUPABASE_JWT_ISSUER,
+        "iat": now,
+        "exp": now + 3600,
+        "user_metadata": {"full_name": "Test Founder"},
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+def make_request(token):
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+def authenticate(token):
+    return asyncio.run(server.get_current_user(make_request(token)))
+
+
+@pytest.fixture(autouse=True)
+def no_remote_calls(monkeypatch):
+    async def fail(token):
+        raise AssertionError("Supabase should not be called")
+    monkeypatch.setattr(server, "_verify_token_remotely", fail)
+    monkeypatch.setattr(server, "AUTH_VERIFY_MODE", "local")
+    server._verified_tokens.clear()
+    server._rejected_tokens.clear()
+    for k in server.auth_cache_stats:
+        server.auth_cache_stats[k] = 0
+
+
+class TestLocalVerification:
+    """Tokens are verified in-process"""
+
+    def test_valid_token_builds_user(self):
+        """A valid token yields the same fields the routes rely on"""
+        user = authenticate(make_token())
+        assert user.id == "user-123"
+        assert user.email == "founder@test.com"
+        assert user.user_metadata.get("full_name") == "Test Founder"
+        print("✓ Valid token accepted locally")
+
+    @pytest.mark.parametrize("overrides", [
+        {"exp": int(time.time()) - 3600},
+        {"aud": "anon"},
+        {"iss": "https://evil.example.com/auth/v1"},
+    ])
+    def test_invalid_claims_rejected(self, overrides):
+        """Expired, wrong-audience and wrong-issuer tokens return 401"""
+        with pytest.raises(HTTPException) as exc:
+            authenticate(make_token(**overrides))
+        assert exc.value.status_code == 401
+
+    def test_bad_signature_rejected(self):
+        """Tokens signed with another secret return 401"""
+        token = jwt.encode({"sub": "x", "aud": "authenticated", "exp": int(time.time()) + 60}, "another-secret-that-is-long-enough!!", algorithm="HS256")
+        with pytest.raises(HTTPException) as exc:
+            authenticate(token)
+        assert exc.value.status_code == 401
+
+
+class TestRemoteFallback:
+    """Remote verification is only used when local verification is impossible and fallback is on"""
+
+    def test_no_fallback_without_key(self, monkeypatch):
+        monkeypatch.setattr(server, "SUPABASE_JWT_SECRET", None)
+        monkeypatch.setattr(server, "AUTH_REMOTE_FALLBACK", False)
+        with pytest.raises(HTTPException) as exc:
+            authenticate(make_token())
+        assert exc.value.status_code == 401
+
+    def test_fallback_when_enabled(self, monkeypatch):
+        monkeypatch.setattr(server, "SUPABASE_JWT_SECRET", None)
+        monkeypatch.setattr(server, "AUTH_REMOTE_FALLBACK", True)
+
+        async def remote(token):
+            return server.AuthUser(id="remote-user", email="r@test.com")
+        monkeypatch.setattr(server, "_verify_token_remotely", remote)
+        user = authenticate(make_token())
+        assert user.id == "remote-user"
+        print("✓ Remote fallback used when configured")
+
+
+class TestTokenCache:
+    """Repeated requests with the same token do no verification work"""
+
+    def test_repeat_token_is_cache_hit(self, monkeypatch):
+        token = make_token()
+        authenticate(token)
+
+        async def fail(token):
+            raise AssertionError("Cached token should not be re-verified")
+        monkeypatch.setattr(server, "verify_token_locally", fail)
+        user = authenticate(token)
+        assert user.id == "user-123"
+        assert server.auth_cache_stats["hits"] == 1
+        assert server.auth_cache_stats["misses"] == 1
+        print("✓ Second request served from the token cache")
+
+    def test_entry_never_outlives_token(self):
+        exp = int(time.time()) + 5
+        token = make_token(exp=exp)
+        authenticate(token)
+        (user, expires_at), = server._verified_tokens.values()
+        assert expires_at <= exp
+
+    def test_rejected_token_is_negatively_cached(self, monkeypatch):
+        token = make_token(aud="anon")
+        with pytest.raises(HTTPException):
+            authenticate(token)
+
+        async def fail(token):
+            raise AssertionError("Rejected token should not be re-verified")
+        monkeypatch.setattr(server, "verify_token_locally", fail)
+        with pytest.raises(HTTPException) as exc:
+            authenticate(token)
+        assert exc.value.status_code == 401
+        assert server.auth_cache_stats["negative_hits"] == 1
+
+
+class TestJwksBackoff:
+    """A JWKS endpoint that is down is not called again by every request"""
+
+    def test_failed_fetch_backs_off(self, monkeypatch):
+        calls = []
+
+        async def down(self, url, **kwargs):
+            calls.append(url)
+            raise httpx.ConnectError("connection refused")
+        monkeypatch.setattr(httpx.AsyncClient, "get", down)
+        monkeypatch.setattr(server, "SUPABASE_JWKS_URL", "https://project.supabase.co/auth/v1/.well-known/jwks.json")
+        monkeypatch.setattr(server, "_jwks_cache", {"keys": {}, "fetched_at": 0.0, "attempted_at": 0.0, "failures": 0})
+
+        async def scenario():
+            for _ in range(3):
+                with pytest.raises(server.SigningKeyUnavailable):
+                    await server._get_jwks_key("kid-1")
+        asyncio.run(scenario())
+        assert len(calls) == 1
+        assert server._jwks_cache["failures"] == 1
@@ -0,0 +1,63 @@
+"""
+Tests for ETag / If-None-Match on heavy read endpoints:
+- Unchanged data answers 304 without running the route's queries
+- Any write to the startup changes the ETag
+- ETags differ per query string and per startup
+"""
+import asyncio
+
+import pytest
+
+import startup_stats
+
+
+ENDPOINTS = ["analytics", "finance/summary", "investor-view", "tasks", "milestones"]
+
+
+class TestConditionalGet:
+
+    @pytest.mark.parametrize("endpoint", ENDPOINTS)
+    def test_304_when_unchanged(self, api_client, startup, endpoint):
+        first = api_client.get(f"/api/startups/s1/{endpoint}")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        again = api_client.get(f"/api/startups/s1/{endpoint}", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+    def test_304_skips_queries(self, api_client, startup, monkeypatch):
+        etag = api_client.get("/api/startups/s1/analytics").headers["etag"]
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("304 must not load stats")
+        monkeypatch.setattr(startup_stats, "get", fail)
+        assert api_client.get("/api/startups/s1/analytics", headers={"If-None-Match": etag}).status_code == 304
+        print("✓ 304 served from the version check alone")
+
+    def test_writes_change_etag(self, api_client, startup):
+        etags = {api_client.get("/api/startups/s1/tasks").headers["etag"]}
+        task = api_client.post("/api/startups/s1/tasks", json={"title": "Ship"}).json()
+        etags.add(api_client.get("/api/startups/s1/tasks").headers["etag"])
+        api_client.patch(f"/api/tasks/{task['id']}/status", json={"status": "done"})
+        etags.add(api_client.get("/api/startups/s1/tasks").headers["etag"])
+        api_client.post("/api/startups/s1/finance/expenses", json={"title": "Rent", "amount": 10})
+        latest = api_client.get("/api/startups/s1/tasks")
+        etags.add(latest.headers["etag"])
+        assert len(etags) == 4
+        resp = api_client.get("/api/startups/s1/tasks", headers={"If-None-Match": latest.headers["etag"]})
+        assert resp.status_code == 304
+
+    def test_query_string_is_part_of_etag(self, api_client, startup):
+        a = api_client.get("/api/startups/s1/tasks", params={"status": "done"}).headers["etag"]
+        b = api_client.get("/api/startups/s1/tasks", params={"status": "todo"}).headers["etag"]
+        assert a != b
+        resp = api_client.get("/api/startups/s1/tasks", params={"status": "todo"}, headers={"If-None-Match": a})
+        assert resp.status_code == 200
+
+    def test_non_member_gets_403_not_304(self, api_client, startup):
+        etag = api_client.get("/api/startups/s1/analytics").headers["etag"]
+        asyncio.run(startup.startup_members.delete_many({}))
+        import server
+        server._membership_cache.clear()
+        assert api_client.get("/api/startups/s1/analytics", headers={"If-None-Match": etag}).status_code == 403
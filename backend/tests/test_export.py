@@ -0,0 +1,49 @@
+"""
+Tests for streaming ledger/task export:
+- CSV has a header row and quotes awkward values
+- NDJSON yields one object per row
+- Date ranges are applied and non-members get 403
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def ledger(startup):
+    mongo = startup
+
+    async def seed():
+        await mongo.expenses.insert_many([
+            {"id": f"e{i:03d}", "startup_id": "s1", "title": f'Rent, "HQ" {i}', "amount": i, "category": "rent",
+             "date": f"2026-{(i % 12) + 1:02d}-01"}
+            for i in range(450)
+        ])
+    asyncio.run(seed())
+
+
+class TestExport:
+
+    def test_csv_export(self, api_client, ledger):
+        resp = api_client.get("/api/startups/s1/export/expenses")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert 'filename="expenses-s1.csv"' in resp.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 450
+        assert rows[0]["title"].startswith('Rent, "HQ"')
+        assert [r["date"] for r in rows] == sorted(r["date"] for r in rows)
+        print("✓ 450 expenses exported as CSV")
+
+    def test_ndjson_with_date_range(self, api_client, ledger):
+        resp = api_client.get("/api/startups/s1/export/expenses",
+                              params={"format": "ndjson", "date_from": "2026-02-01", "date_to": "2026-03-31"})
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(rows) == 76
+        assert all("2026-02-01" <= r["date"] <= "2026-03-31" for r in rows)
+
+    def test_non_member_forbidden(self, api_client, ledger):
+        assert api_client.get("/api/startups/other/export/tasks").status_code == 403
@@ -0,0 +1,105 @@
+"""
+Tests for burn/runway forecasting:
+- Trailing means and growth rates over the monthly series
+- Projections find the month the balance crosses zero
+- Hiring plans shorten the runway
+- Forecasts are cached until the ledger changes
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import forecast
+import server
+
+NOW = datetime(2026, 7, 10, tzinfo=timezone.utc)
+
+
+def ledger(expenses_by_month, income_by_month=None):
+    return {
+        "income": {"by_month": income_by_month or {}},
+        "expenses": {"by_month": expenses_by_month},
+        "investments": {"by_month": {}},
+    }
+
+
+class TestSeries:
+
+    def test_gaps_are_zero_filled_up_to_last_complete_month(self):
+        series = forecast.monthly_series(ledger({"2026-02": 100, "2026-04": 300, "2026-07": 999}), forecast.last_complete_month(NOW))
+        assert [forecast.month_label(m) for m in series["axis"]] == ["2026-02", "2026-03", "2026-04", "2026-05", "2026-06"]
+        assert series["expenses"].tolist() == [100, 0, 300, 0, 0]
+
+    def test_trailing_mean_matches_python(self):
+        values = np.array([5.0, 1, 4, 8, 2, 7, 3])
+        expected = [np.mean(values[max(0, i - 2):i + 1]) for i in range(len(values))]
+        assert np.allclose(forecast.trailing_mean(values, 3), expected)
+
+    def test_growth_rate(self):
+        values = np.array([100.0, 100, 100, 133.1, 133.1, 133.1])
+        assert forecast.growth_rate(values, 3) == pytest.approx(0.1, abs=1e-4)
+        assert forecast.growth_rate(values[:4], 3) == 0.0
+
+
+class TestProjection:
+
+    def test_runway_interpolates_zero_crossing(self):
+        result = forecast.project(1000, 0, 400, 0, 0, 12)
+        assert result["runway_months"] == 2.5
+        assert result["balance"][:3] == [600, 200, -200]
+
+    def test_profitable_startup_never_runs_out(self):
+        assert forecast.project(1000, 500, 400, 0, 0, 12)["runway_months"] is None
+
+    def test_scenarios_and_hiring_plan(self):
+        months = {f"2025-{m:02d}": 1000 for m in range(7, 13)} | {f"2026-{m:02d}": 1000 for m in range(1, 7)}
+        result = forecast.build(ledger(months), 12000, 24, now=NOW)
+        assert result["as_of"] == "2026-06"
+        assert [s["runway_months"] for s in result["scenarios"]] == [12.0, 12.0, 12.0]
+        hiring = forecast.hiring_scenario(result, [{"start_month": "2026-07", "headcount": 1, "monthly_cost": 1000}])
+        assert hiring["runway_months"] == 6.0
+
+
+class TestForecastRoute:
+
+    @pytest.fixture
+    def startup(self, mongo):
+        server._forecast_cache.clear()
+        asyncio.run(mongo.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "founder"}))
+        return mongo
+
+    def test_cached_until_ledger_changes(self, api_client, startup, monkeypatch):
+        api_client.post("/api/startups/s1/finance/income", json={"title": "Seed", "amount": 10000, "date": "2025-01-01"})
+        first = api_client.get("/api/startups/s1/finance/forecast").json()
+        assert first["current_balance"] == 10000
+
+        calls = []
+        real_build = forecast.build
+        monkeypatch.setattr(forecast, "build", lambda *a, **k: calls.append(1) or real_build(*a, **k))
+        assert api_client.get("/api/startups/s1/finance/forecast").json() == first
+        assert calls == []
+
+        api_client.post("/api/startups/s1/finance/expenses", json={"title": "Rent", "amount": 2500, "date": "2025-02-01"})
+        assert api_client.get("/api/startups/s1/finance/forecast").json()["current_balance"] == 7500
+        assert calls == [1]
+        print("✓ Forecast reused until a ledger write bumps the version")
+
+    def test_new_startup_is_cached_before_any_ledger_write(self, api_client, startup, monkeypatch):
+        sid = api_client.post("/api/startups", json={"name": "Fresh"}).json()["id"]
+        calls = []
+        real_build = forecast.build
+        monkeypatch.setattr(forecast, "build", lambda *a, **k: calls.append(1) or real_build(*a, **k))
+        first = api_client.get(f"/api/startups/{sid}/finance/forecast").json()
+        assert api_client.get(f"/api/startups/{sid}/finance/forecast").json() == first
+        assert calls == [1]
+
+    def test_post_adds_hiring_scenario(self, api_client, startup):
+        resp = api_client.post("/api/startups/s1/finance/forecast", json={
+            "horizon_months": 12, "hiring_plan": [{"start_month": "2030-01", "headcount": 2, "monthly_cost": 5000}],
+        })
+        assert resp.status_code == 200
+        assert resp.json()["scenarios"][-1]["name"] == "hiring_plan_6m"
+        bad = api_client.post("/api/startups/s1/finance/forecast", json={"hiring_plan": [{"start_month": "Jan", "monthly_cost": 1}]})
+        assert bad.status_code == 422
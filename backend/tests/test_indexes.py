@@ -0,0 +1,70 @@
+"""
+Tests for the index registry:
+- Missing indexes are created and the version is recorded
+- An up-to-date version skips the work; --force re-checks
+- Unknown indexes are only dropped on request
+- The explain audit flags collection scans
+"""
+import asyncio
+
+import indexes
+
+
+def index_keys(db, collection):
+    info = asyncio.run(db[collection].index_information())
+    return {tuple(k for k, _ in i["key"]) for i in info.values()}
+
+
+class TestApplyIndexes:
+
+    def test_creates_registry_indexes(self, mongo):
+        report = asyncio.run(indexes.apply_indexes(mongo))
+        assert not report["failed"]
+        assert ("startup_id", "date", "id") in index_keys(mongo, "expenses")
+        assert ("invite_code", "status") in index_keys(mongo, "investor_invites")
+        assert ("milestone_id",) in index_keys(mongo, "tasks")
+        state = asyncio.run(mongo.schema_versions.find_one({"_id": "indexes"}))
+        assert state["version"] == indexes.INDEX_VERSION
+        print(f"✓ {len(report['created'])} indexes created")
+
+    def test_current_version_is_skipped(self, mongo):
+        asyncio.run(indexes.apply_indexes(mongo))
+        assert asyncio.run(indexes.apply_indexes(mongo))["skipped"]
+        forced = asyncio.run(indexes.apply_indexes(mongo, force=True))
+        assert not forced["skipped"] and forced["created"] == []
+
+    def test_drop_unknown(self, mongo):
+        asyncio.run(mongo.tasks.create_index("startup_id"))
+        asyncio.run(indexes.apply_indexes(mongo))
+        assert ("startup_id",) in index_keys(mongo, "tasks")
+        report = asyncio.run(indexes.apply_indexes(mongo, force=True, drop_unknown=True))
+        assert report["dropped"] == ["tasks.startup_id_1"]
+        assert ("startup_id",) not in index_keys(mongo, "tasks")
+
+
+class FakeExplainDb:
+    def __init__(self, plans):
+        self.plans = plans
+
+    async def command(self, cmd):
+        return {"queryPlanner": {"winningPlan": self.plans[cmd["explain"]["find"]]}}
+
+
+class TestAudit:
+
+    def test_plan_stages_walks_nested_plans(self):
+        plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+        assert indexes.plan_stages(plan) == {"LIMIT", "FETCH", "IXSCAN"}
+        sbe = {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+        assert indexes.plan_stages(sbe) == {"SORT", "COLLSCAN"}
+
+    def test_reports_collection_scans(self):
+        db = FakeExplainDb({
+            "tasks": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            "income": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+        })
+        queries = [("GET tasks", "tasks", {"startup_id": "s"}, None), ("GET income", "income", {"startup_id": "s"}, [("date", -1)])]
+        assert asyncio.run(indexes.audit(db, queries)) == [("GET income", "income", ["COLLSCAN", "SORT"])]
+
+    def test_registry_covers_every_audited_collection(self):
+        assert {collection for _, collection, _, _ in indexes.ROUTE_QUERIES} <= set(indexes.INDEXES)
@@ -0,0 +1,56 @@
+"""
+Tests for bulk ledger import:
+- JSON arrays and CSV bodies are both accepted
+- Invalid rows are reported by row number and skipped, valid rows are inserted
+- Monthly rollups match the raw ledger after an import
+- Role checks match the single-row create routes
+"""
+import asyncio
+
+import pytest
+
+import finance
+
+
+@pytest.fixture
+def founder(startup):
+    asyncio.run(startup.finance_rollup_state.insert_one({"startup_id": "s1"}))
+    return startup
+
+
+class TestLedgerImport:
+
+    def test_json_import_with_row_errors(self, api_client, founder, monkeypatch):
+        monkeypatch.setattr("server.LEDGER_IMPORT_CHUNK_SIZE", 7)
+        rows = [{"title": f"Server {i}", "amount": 10 + i, "category": "infrastructure", "date": f"2025-{i % 12 + 1:02d}-03"} for i in range(30)]
+        rows[4]["amount"] = "lots"
+        rows[9]["date"] = "03/10/2025"
+        del rows[20]["title"]
+        resp = api_client.post("/api/startups/s1/finance/expenses/import", json=rows)
+        assert resp.status_code == 200, resp.text
+        result = resp.json()
+        assert result["received"] == 30 and result["inserted"] == 27 and result["failed"] == 3
+        assert [e["row"] for e in result["errors"]] == [5, 10, 21]
+        assert result["errors"][0]["errors"][0]["field"] == "amount"
+        assert asyncio.run(founder.expenses.count_documents({"startup_id": "s1"})) == 27
+        assert asyncio.run(finance.check_rollups(founder, "s1")) == []
+        print("✓ 27 of 30 rows imported, 3 row-level errors reported")
+
+    def test_csv_import(self, api_client, founder):
+        body = "investor_name,amount,equity_percentage,investment_type,date\nAcme Ventures,250000,5,seed,2025-06-01\nJane Angel,50000,,,2025-07-15\n"
+        resp = api_client.post("/api/startups/s1/finance/investments/import", content=body, headers={"Content-Type": "text/csv"})
+        assert resp.json()["inserted"] == 2
+        summary = api_client.get("/api/startups/s1/finance/summary").json()
+        assert summary["total_investments"] == 300000
+        assert summary["total_equity_given"] == 5
+        docs = asyncio.run(founder.investments.find({"investor_name": "Jane Angel"}).to_list(1))
+        assert docs[0]["investment_type"] == "seed" and docs[0]["equity_percentage"] == 0
+
+    def test_member_cannot_import(self, api_client, founder):
+        asyncio.run(founder.startup_members.update_one({"user_id": "u1"}, {"$set": {"role": "member"}}))
+        resp = api_client.post("/api/startups/s1/finance/income/import", json=[{"title": "Grant", "amount": 1}])
+        assert resp.status_code == 403
+
+    def test_malformed_body(self, api_client, founder):
+        resp = api_client.post("/api/startups/s1/finance/income/import", content="{not json", headers={"Content-Type": "application/json"})
+        assert resp.status_code == 400
@@ -0,0 +1,85 @@
+"""
+Tests for the shared membership resolver:
+- Repeated lookups hit Mongo once
+- Membership writes invalidate the cached entry
+- Each request gets its own request-scoped cache, reset afterwards
+- Team listings load all profiles in one query
+"""
+import asyncio
+
+import server
+
+
+class CountingCollection:
+    """Wraps a collection and counts find_one calls"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.find_one_calls = 0
+
+    async def find_one(self, *args, **kwargs):
+        self.find_one_calls += 1
+        return await self.inner.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class TestMembershipCache:
+
+    def test_repeated_lookups_hit_mongo_once(self, mongo, monkeypatch):
+        async def scenario():
+            await mongo.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "member"})
+            counting = CountingCollection(mongo.startup_members)
+            monkeypatch.setattr(mongo, "startup_members", counting, raising=False)
+            for _ in range(5):
+                member = await server.get_membership("s1", "u1")
+                assert member["role"] == "member"
+            return counting.find_one_calls
+
+        assert asyncio.run(scenario()) == 1
+        print("✓ Five lookups cost one Mongo query")
+
+    def test_invalidation_after_role_change(self, mongo):
+        async def scenario():
+            assert await server.get_membership("s1", "u2") is None
+            await mongo.startup_members.insert_one({"id": "m2", "startup_id": "s1", "user_id": "u2", "role": "member"})
+            assert await server.get_membership("s1", "u2") is None  # negative entry still cached
+            server.invalidate_membership("s1", "u2")
+            assert (await server.get_membership("s1", "u2"))["role"] == "member"
+            await mongo.startup_members.update_one({"startup_id": "s1", "user_id": "u2"}, {"$set": {"role": "manager"}})
+            server.invalidate_membership("s1")
+            return (await server.get_membership("s1", "u2"))["role"]
+
+        assert asyncio.run(scenario()) == "manager"
+
+
+    def test_request_scope_is_set_and_reset(self):
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(server._request_memberships.get())
+
+        async def scenario():
+            middleware = server.RequestScopeMiddleware(app)
+            for _ in range(2):
+                await middleware({"type": "http"}, None, None)
+            await middleware({"type": "lifespan"}, None, None)
+            return server._request_memberships.get()
+
+        assert asyncio.run(scenario()) is None
+        assert seen[0] == {} and seen[1] == {} and seen[0] is not seen[1]
+        assert seen[2] is None
+
+
+class TestProfileLoader:
+
+    def test_load_profiles_single_query(self, mongo):
+        async def scenario():
+            await mongo.profiles.insert_many([{"id": f"u{i}", "email": f"u{i}@test.com", "full_name": f"User {i}"} for i in range(50)])
+            return await server.load_profiles([f"u{i}" for i in range(50)] + ["u1", "missing"])
+
+        profiles = asyncio.run(scenario())
+        assert len(profiles) == 50
+        assert profiles["u7"]["email"] == "u7@test.com"
+        assert "_id" not in profiles["u7"]
@@ -0,0 +1,73 @@
+"""
+Tests for keyset pagination on list endpoints:
+- Pages follow X-Next-Cursor until exhausted, without gaps or duplicates
+- Filters and date ranges are applied server-side
+- Tampered or mismatched cursors return 400
+"""
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def workspace(startup):
+    mongo = startup
+
+    async def seed():
+        await mongo.tasks.insert_many([
+            {"id": f"t{i:03d}", "startup_id": "s1", "title": f"Task {i}", "status": "done" if i % 3 == 0 else "todo",
+             "priority": "high", "assigned_to": "u1" if i % 2 else None, "created_at": f"2026-01-01T00:00:{i % 10:02d}"}
+            for i in range(25)
+        ])
+        await mongo.expenses.insert_many([
+            {"id": f"e{i:03d}", "startup_id": "s1", "title": f"Expense {i}", "amount": i, "category": "salary" if i % 2 else "marketing",
+             "date": f"2026-{(i % 12) + 1:02d}-15"}
+            for i in range(24)
+        ])
+    asyncio.run(seed())
+
+
+def collect(api_client, url, **params):
+    pages, cursor = [], None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        resp = api_client.get(url, params=params)
+        assert resp.status_code == 200, resp.text
+        pages.append(resp.json())
+        cursor = resp.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+class TestKeysetPagination:
+
+    def test_tasks_paginate_without_gaps(self, api_client, workspace):
+        pages = collect(api_client, "/api/startups/s1/tasks", limit=7)
+        ids = [t["id"] for page in pages for t in page]
+        assert [len(p) for p in pages] == [7, 7, 7, 4]
+        assert sorted(ids) == [f"t{i:03d}" for i in range(25)]
+        assert len(set(ids)) == 25
+        print("✓ 25 tasks across 4 pages, no duplicates")
+
+    def test_tasks_filtered_by_status_and_assignee(self, api_client, workspace):
+        tasks = api_client.get("/api/startups/s1/tasks", params={"status": "done", "assignee": "u1"}).json()
+        assert tasks and all(t["status"] == "done" and t["assigned_to"] == "u1" for t in tasks)
+
+    def test_expenses_date_range_and_desc_order(self, api_client, workspace):
+        pages = collect(api_client, "/api/startups/s1/finance/expenses", limit=3, date_from="2026-03-01", date_to="2026-05-31", category="salary")
+        rows = [e for page in pages for e in page]
+        assert rows and all("2026-03-01" <= e["date"] <= "2026-05-31" and e["category"] == "salary" for e in rows)
+        assert [e["date"] for e in rows] == sorted((e["date"] for e in rows), reverse=True)
+
+    def test_bad_cursor_rejected(self, api_client, workspace):
+        resp = api_client.get("/api/startups/s1/tasks", params={"cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+        cursor = api_client.get("/api/startups/s1/tasks", params={"limit": 5}).headers["x-next-cursor"]
+        resp = api_client.get("/api/startups/s1/tasks", params={"limit": 5, "cursor": cursor, "order": "desc"})
+        assert resp.status_code == 400
+
+    def test_user_startups_keep_membership_role(self, api_client, workspace, mongo):
+        asyncio.run(mongo.startups.insert_one({"id": "s1", "name": "Acme"}))
+        startups = api_client.get("/api/startups").json()
+        assert startups == [{"id": "s1", "name": "Acme", "user_role": "founder"}]
@@ -0,0 +1,66 @@
+"""
+Tests for the investor portfolio endpoint:
+- Figures match the per-startup investor view
+- Startups without rollups or stats documents are built on the fly
+- Only the caller's startups are included
+- Large portfolios are paginated and totals are never silently partial
+"""
+import asyncio
+
+import pytest
+
+import finance
+
+
+@pytest.fixture
+def portfolio(mongo):
+    async def seed():
+        for i in range(4):
+            sid = f"s{i}"
+            await mongo.startups.insert_one({"id": sid, "name": f"Startup {i}", "industry": "fintech", "stage": "seed"})
+            await mongo.startup_members.insert_one({"id": f"m{i}", "startup_id": sid, "user_id": "u1", "role": "investor" if i else "founder",
+                                                    "joined_at": f"2026-01-0{i + 1}T00:00:00"})
+            await mongo.startup_members.insert_one({"id": f"f{i}", "startup_id": sid, "user_id": f"founder{i}", "role": "founder"})
+            await mongo.income.insert_many([{"id": f"{sid}-i{m}", "startup_id": sid, "amount": 1000 * (i + 1), "category": "revenue", "date": f"2026-0{m}-01"} for m in range(1, 4)])
+            await mongo.expenses.insert_many([{"id": f"{sid}-e{m}", "startup_id": sid, "amount": 1500 * (i + 1), "category": "salary", "date": f"2026-0{m}-10"} for m in range(1, 5)])
+            await mongo.investments.insert_one({"id": f"{sid}-inv", "startup_id": sid, "amount": 50000, "investment_type": "seed", "date": "2026-01-01"})
+            await mongo.tasks.insert_many([{"id": f"{sid}-t{t}", "startup_id": sid, "title": "x", "status": "done" if t < i else "todo", "priority": "medium"} for t in range(4)])
+            await mongo.milestones.insert_one({"id": f"{sid}-ms", "startup_id": sid, "title": "MVP", "status": "completed"})
+            if i % 2:
+                await finance.rebuild_rollups(mongo, sid)
+        await mongo.startups.insert_one({"id": "elsewhere", "name": "Not mine"})
+    asyncio.run(seed())
+    return mongo
+
+
+class TestPortfolio:
+
+    def test_matches_investor_view(self, api_client, portfolio):
+        resp = api_client.get("/api/investors/portfolio")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert [s["startup_id"] for s in body["startups"]] == ["s0", "s1", "s2", "s3"]
+        for entry in body["startups"]:
+            view = api_client.get(f"/api/startups/{entry['startup_id']}/investor-view").json()
+            for field in ("current_balance", "avg_monthly_burn", "runway_months", "total_investments"):
+                assert entry["financials"][field] == view["financials"][field]
+            for field in ("team_size", "tasks_completed", "tasks_total", "milestones_completed", "milestones_total"):
+                assert entry["metrics"][field] == view["metrics"][field]
+        assert body["totals"]["startups"] == 4
+        assert body["totals"]["balance"] == sum(s["financials"]["current_balance"] for s in body["startups"])
+        print("✓ Portfolio of 4 startups matches the investor view")
+
+    def test_role_filter_and_empty_portfolio(self, api_client, portfolio):
+        assert len(api_client.get("/api/investors/portfolio", params={"role": "investor"}).json()["startups"]) == 3
+        asyncio.run(portfolio.startup_members.delete_many({"user_id": "u1"}))
+        assert api_client.get("/api/investors/portfolio").json()["startups"] == []
+
+    def test_pages_follow_memberships(self, api_client, portfolio):
+        first = api_client.get("/api/investors/portfolio", params={"limit": 3})
+        body = first.json()
+        assert body["has_more"] is True and body["totals"]["startups"] == 3
+        rest = api_client.get("/api/investors/portfolio", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+        assert "X-Next-Cursor" not in rest.headers
+        assert rest.json()["has_more"] is False
+        assert [s["startup_id"] for s in body["startups"] + rest.json()["startups"]] == ["s0", "s1", "s2", "s3"]
+        assert api_client.get("/api/investors/portfolio").json()["has_more"] is False
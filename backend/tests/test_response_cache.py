@@ -0,0 +1,133 @@
+"""
+Tests for the response cache:
+- The memory backend evicts least-recently-used entries to stay under its byte cap
+- Concurrent misses for one key run the computation once
+- Writes to a startup invalidate its cached reports
+- The Redis backend works against an in-process Redis stand-in (fakeredis)
+"""
+import asyncio
+
+import pytest
+
+import response_cache as rcache
+import server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestMemoryBackend:
+
+    def test_byte_cap_evicts_lru(self):
+        backend = rcache.MemoryBackend(max_entries=100, max_bytes=25)
+
+        async def scenario():
+            await backend.set("a", b"x" * 10, 60, "s1")
+            await backend.set("b", b"x" * 10, 60, "s1")
+            await backend.get("a")  # a is now most recently used
+            await backend.set("c", b"x" * 10, 60, "s2")
+            return [await backend.get(k) is not None for k in ("a", "b", "c")]
+        assert run(scenario()) == [True, False, True]
+        assert backend.bytes == 20 and backend.evictions == 1
+
+    def test_invalidate_by_startup(self):
+        backend = rcache.MemoryBackend(max_entries=100, max_bytes=1000)
+
+        async def scenario():
+            await backend.set("s1:analytics:1", b"{}", 60, "s1")
+            await backend.set("s2:analytics:1", b"{}", 60, "s2")
+            await backend.invalidate("s1")
+            return await backend.get("s1:analytics:1"), await backend.get("s2:analytics:1")
+        assert run(scenario()) == (None, b"{}")
+
+
+class TestResponseCache:
+
+    def test_single_flight(self):
+        cache = rcache.ResponseCache(rcache.MemoryBackend(100, 10_000), ttl=60)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"total": 42}
+
+        async def scenario():
+            results = await asyncio.gather(*(cache.get_or_compute("s1", "analytics", 1, compute) for _ in range(20)))
+            results.append(await cache.get_or_compute("s1", "analytics", 1, compute))
+            return results
+        results = run(scenario())
+        assert calls == [1]
+        assert all(r == {"total": 42} for r in results)
+        stats = cache.stats()
+        assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 19, 1)
+        assert stats["hit_ratio"] == pytest.approx(20 / 21, abs=1e-4)
+        print("✓ 21 lookups, 1 computation")
+
+    def test_errors_are_not_cached(self):
+        cache = rcache.ResponseCache(rcache.MemoryBackend(100, 10_000), ttl=60)
+
+        async def boom():
+            raise RuntimeError("db down")
+        with pytest.raises(RuntimeError):
+            run(cache.get_or_compute("s1", "analytics", 1, boom))
+        assert cache.stats()["entries"] == 0
+
+
+class TestRedisBackend:
+
+    @pytest.fixture
+    def cache(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return rcache.ResponseCache(rcache.RedisBackend(fakeredis.FakeAsyncRedis()), ttl=60)
+
+    def test_round_trip_and_invalidate(self, cache):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"burn": 1.5}
+
+        async def scenario():
+            first = await cache.get_or_compute("s1", "finance_summary", 3, compute)
+            second = await cache.get_or_compute("s1", "finance_summary", 3, compute)
+            await cache.invalidate("s1")
+            third = await cache.get_or_compute("s1", "finance_summary", 3, compute)
+            return first, second, third
+        assert run(scenario()) == ({"burn": 1.5},) * 3
+        assert calls == [1, 1]
+
+    def test_lock_is_exclusive(self, cache):
+        async def scenario():
+            return await cache.backend.lock("k", 5), await cache.backend.lock("k", 5)
+        assert run(scenario()) == (True, False)
+
+
+class TestRouteCaching:
+
+    @pytest.fixture
+    def startup(self, mongo):
+        async def seed():
+            await mongo.startups.insert_one({"id": "s1", "name": "Acme"})
+            await mongo.startup_members.insert_one({"id": "m1", "startup_id": "s1", "user_id": "u1", "role": "founder"})
+        run(seed())
+        return mongo
+
+    def test_analytics_cached_until_write(self, api_client, startup, monkeypatch):
+        calls = []
+        real = server.compute_analytics
+
+        async def counting(startup_id):
+            calls.append(startup_id)
+            return await real(startup_id)
+        monkeypatch.setattr(server, "compute_analytics", counting)
+
+        assert api_client.get("/api/startups/s1/analytics").json()["total_tasks"] == 0
+        assert api_client.get("/api/startups/s1/analytics").json()["total_tasks"] == 0
+        assert len(calls) == 1
+        api_client.post("/api/startups/s1/tasks", json={"title": "Ship"})
+        assert api_client.get("/api/startups/s1/analytics").json()["total_tasks"] == 1
+        assert len(calls) == 2
+        stats = api_client.get("/api/health/cache").json()
+        assert stats["backend"] == "memory" and stats["hits"] == 1
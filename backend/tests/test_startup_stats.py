@@ -0,0 +1,122 @@
+"""
+Tests for the incrementally maintained startup_stats document:
+- Task, milestone and feedback routes keep the counters in step with the data
+- get_analytics served from the counters matches a full recomputation
+- check() reports drift and rebuild() repairs it
+- Concurrent first reads build the document once; writes racing a rebuild are kept
+- A rebuild never commits between a source write and its counter update
+"""
+import asyncio
+
+import pytest
+
+import indexes
+import startup_stats
+
+
+@pytest.fixture
+def workspace(startup):
+    asyncio.run(startup.startup_stats.insert_one(startup_stats.empty_stats("s1")))
+
+
+class TestStatsMaintenance:
+
+    def test_routes_keep_counters_current(self, api_client, workspace, mongo):
+        ids = [api_client.post("/api/startups/s1/tasks", json={"title": f"T{i}", "priority": "high"}).json()["id"] for i in range(4)]
+        api_client.put(f"/api/tasks/{ids[0]}", json={"status": "done", "priority": "low"})
+        api_client.patch(f"/api/tasks/{ids[1]}/status", json={"status": "review"})
+        api_client.delete(f"/api/tasks/{ids[2]}")
+        m = api_client.post("/api/startups/s1/milestones", json={"title": "MVP"}).json()
+        api_client.put(f"/api/milestones/{m['id']}", json={"status": "completed"})
+        api_client.post("/api/startups/s1/milestones", json={"title": "Beta"})
+        for rating, category in [(5, "product"), (2, "market"), (4, "product")]:
+            api_client.post("/api/startups/s1/feedback", json={"title": "f", "rating": rating, "category": category})
+
+        analytics = api_client.get("/api/startups/s1/analytics").json()
+        assert analytics["total_tasks"] == 3
+        assert analytics["task_stats"] == {"todo": 1, "in_progress": 0, "review": 1, "done": 1}
+        assert analytics["priority_stats"] == {"low": 1, "medium": 0, "high": 2, "urgent": 0}
+        assert analytics["milestone_stats"] == {"pending": 1, "in_progress": 0, "completed": 1}
+        assert analytics["feedback_by_category"] == {"product": 2, "market": 1}
+        assert analytics["avg_rating"] == 3.7
+        assert asyncio.run(startup_stats.check(mongo, "s1")) == {}
+        print("✓ Counters match source collections after mixed writes")
+
+    def test_drift_detected_and_rebuilt(self, workspace, mongo):
+        async def scenario():
+            await mongo.tasks.insert_one({"id": "t1", "startup_id": "s1", "status": "done", "priority": "low"})
+            drift = await startup_stats.check(mongo, "s1")
+            await startup_stats.rebuild(mongo, "s1")
+            return drift, await startup_stats.check(mongo, "s1")
+
+        drift, after = asyncio.run(scenario())
+        assert drift["tasks.total"] == (0, 1)
+        assert after == {}
+
+    def test_missing_document_built_on_read(self, mongo):
+        async def scenario():
+            await mongo.milestones.insert_one({"id": "m1", "startup_id": "s2", "status": "completed"})
+            return await startup_stats.get(mongo, "s2")
+
+        assert asyncio.run(scenario())["milestones"]["status"] == {"completed": 1}
+
+    def test_concurrent_first_reads(self, mongo):
+        async def scenario():
+            await indexes.apply_indexes(mongo)  # unique startup_id on startup_stats
+            await mongo.tasks.insert_many([{"id": f"t{i}", "startup_id": "s2", "status": "done"} for i in range(3)])
+            reads = await asyncio.gather(*(startup_stats.get(mongo, "s2") for _ in range(5)))
+            return reads, await mongo.startup_stats.count_documents({"startup_id": "s2"})
+
+        reads, docs = asyncio.run(scenario())
+        assert {r["tasks"]["total"] for r in reads} == {3}
+        assert docs == 1
+
+    def test_write_racing_a_rebuild_is_kept(self, mongo, monkeypatch):
+        aggregate = startup_stats.aggregate
+        raced = []
+
+        async def racing_aggregate(db, startup_id):
+            stats = await aggregate(db, startup_id)
+            if not raced:
+                # A task is created after the rebuild counted the source collections
+                raced.append(True)
+                async with startup_stats.writing(db, "s2"):
+                    await db.tasks.insert_one({"id": "late", "startup_id": "s2", "status": "todo"})
+                    await startup_stats.on_task_change(db, "s2", None, {"status": "todo"})
+            return stats
+
+        monkeypatch.setattr(startup_stats, "aggregate", racing_aggregate)
+
+        async def scenario():
+            await mongo.tasks.insert_one({"id": "t1", "startup_id": "s2", "status": "done"})
+            stats = await startup_stats.get(mongo, "s2")
+            monkeypatch.setattr(startup_stats, "aggregate", aggregate)
+            return stats, await startup_stats.check(mongo, "s2")
+
+        stats, drift = asyncio.run(scenario())
+        assert stats["tasks"]["total"] == 2
+        assert drift == {}
+
+    def test_rebuild_waits_for_a_write_in_flight(self, workspace, mongo):
+        async def scenario():
+            counted = asyncio.Event()
+
+            async def create_task():
+                task = {"id": "t1", "startup_id": "s1", "status": "todo", "priority": "medium"}
+                async with startup_stats.writing(mongo, "s1"):
+                    await mongo.tasks.insert_one(task)
+                    # The rebuild aggregates (and would commit) before the counters move
+                    await asyncio.sleep(0.2)
+                    await startup_stats.on_task_change(mongo, "s1", None, task)
+                    counted.set()
+
+            write = asyncio.create_task(create_task())
+            await asyncio.sleep(0.01)
+            await startup_stats.rebuild(mongo, "s1")
+            committed_after_write = counted.is_set()
+            await write
+            return committed_after_write, await startup_stats.check(mongo, "s1")
+
+        committed_after_write, drift = asyncio.run(scenario())
+        assert committed_after_write
+        assert drift == {}
@@ -0,0 +1,80 @@
+"""
+Tests for the async Supabase gateway:
+- A hanging Supabase call does not stall other routes on the same worker
+- Hanging calls time out instead of holding the request forever
+- The concurrency limit is respected
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import server
+
+
+class HangingAdmin:
+    """Stub for supabase_client.auth.admin whose create_user blocks until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def create_user(self, attributes):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.release.wait(5)
+        with self._lock:
+            self.active -= 1
+        return SimpleNamespace(user=SimpleNamespace(id="stub-user"))
+
+
+@pytest.fixture
+def stub_gateway(monkeypatch):
+    admin = HangingAdmin()
+    stub_client = SimpleNamespace(auth=SimpleNamespace(admin=admin))
+    gateway = server.SupabaseGateway(stub_client, max_workers=4, max_concurrency=2, timeout=0.5)
+    monkeypatch.setattr(server, "supabase_gateway", gateway)
+    yield admin
+    admin.release.set()
+    gateway.shutdown()
+
+
+def asgi_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+
+class TestNonBlockingAuth:
+    """Blocking SDK calls run off the event loop"""
+
+    def test_other_routes_serve_while_auth_hangs(self, stub_gateway):
+        async def scenario():
+            async with asgi_client() as http:
+                signup = asyncio.create_task(http.post("/api/auth/signup", json={"email": "a@test.com", "password": "x"}))
+                await asyncio.sleep(0.05)
+                started = time.monotonic()
+                health = await http.get("/api/")
+                elapsed = time.monotonic() - started
+                assert health.status_code == 200
+                assert elapsed < 0.25, f"Health check waited {elapsed:.2f}s behind a hanging auth call"
+                assert not signup.done()
+                return await signup
+
+        signup_response = asyncio.run(scenario())
+        assert signup_response.status_code == 504
+        print("✓ Health check served while signup was hanging")
+
+    def test_concurrency_limit(self, stub_gateway):
+        async def scenario():
+            calls = [server.supabase_gateway.create_user({"email": f"{i}@test.com"}) for i in range(4)]
+            await asyncio.sleep(0)
+            return await asyncio.gather(*calls, return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, server.SupabaseTimeout) for r in results)
+        assert stub_gateway.max_active <= 2
@@ -0,0 +1,94 @@
+"""
+Tests for the bulk task endpoint:
+- Mixed create / update / status / delete operations in one request
+- Per-item results for missing tasks, bad statuses and role checks
+- startup_stats stays equal to a rebuild from the tasks collection
+"""
+import asyncio
+
+import pytest
+
+import startup_stats
+
+
+@pytest.fixture
+def board(startup):
+    mongo = startup
+
+    async def seed():
+        # Role checks below need u1 to be a plain member
+        await mongo.startup_members.update_one({"id": "m1"}, {"$set": {"role": "member"}})
+        await mongo.tasks.insert_many([
+            {"id": f"t{i}", "startup_id": "s1", "title": f"Task {i}", "status": "todo", "priority": "medium",
+             "assigned_to": "u1" if i < 3 else "u2", "created_at": "2026-01-01T00:00:00"}
+            for i in range(6)
+        ])
+        await mongo.tasks.insert_one({"id": "other", "startup_id": "s2", "title": "Not ours", "status": "todo", "priority": "low"})
+        await startup_stats.rebuild(mongo, "s1")
+    asyncio.run(seed())
+    return mongo
+
+
+def bulk(api_client, *operations):
+    resp = api_client.post("/api/startups/s1/tasks/bulk", json={"operations": list(operations)})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+class TestBulkTasks:
+
+    def test_mixed_operations(self, api_client, board):
+        result = bulk(
+            api_client,
+            {"op": "create", "task": {"title": "New", "priority": "high"}},
+            {"op": "status", "task_id": "t0", "status": "done"},
+            {"op": "update", "task_id": "t1", "changes": {"milestone_id": "ms1", "priority": "urgent"}},
+            {"op": "delete", "task_id": "t2"},
+            {"op": "status", "task_id": "t1", "status": "review"},
+        )
+        assert [r["status_code"] for r in result["results"]] == [201, 200, 200, 200, 200]
+        assert result["succeeded"] == 5
+        t1 = asyncio.run(board.tasks.find_one({"id": "t1"}))
+        assert (t1["status"], t1["priority"], t1["milestone_id"]) == ("review", "urgent", "ms1")
+        assert asyncio.run(board.tasks.find_one({"id": "t2"})) is None
+        assert asyncio.run(startup_stats.check(board, "s1")) == {}
+        print("✓ 5 operations applied with one bulk_write, stats consistent")
+
+    def test_per_item_errors(self, api_client, board):
+        result = bulk(
+            api_client,
+            {"op": "status", "task_id": "t4", "status": "done"},      # assigned to someone else, caller is a member
+            {"op": "status", "task_id": "t0", "status": "finished"},  # invalid status
+            {"op": "delete", "task_id": "other"},                     # another startup's task
+            {"op": "update", "task_id": "t1"},                        # no changes
+            {"op": "status", "task_id": "t0", "status": "in_progress"},
+        )
+        assert [r["status_code"] for r in result["results"]] == [403, 400, 404, 400, 200]
+        assert asyncio.run(board.tasks.find_one({"id": "other"})) is not None
+        assert asyncio.run(startup_stats.check(board, "s1")) == {}
+
+    def test_concurrent_change_is_reported(self, api_client, board, monkeypatch):
+        collection_cls = type(board.tasks)
+        real_find = collection_cls.find
+
+        class RacingCursor:
+            def __init__(self, cursor):
+                self.cursor = cursor
+
+            async def to_list(self, length):
+                tasks = await self.cursor.to_list(length)
+                # Another request moves t0 after the bulk endpoint has read it
+                await board.tasks.update_one({"id": "t0"}, {"$set": {"status": "review"}})
+                return tasks
+
+        def find_then_race(self, *args, **kwargs):
+            cursor = real_find(self, *args, **kwargs)
+            return RacingCursor(cursor) if self.name == "tasks" else cursor
+        monkeypatch.setattr(collection_cls, "find", find_then_race)
+        result = bulk(api_client, {"op": "status", "task_id": "t0", "status": "done"}, {"op": "status", "task_id": "t1", "status": "done"})
+        assert [r["status_code"] for r in result["results"]] == [409, 200]
+        assert asyncio.run(startup_stats.check(board, "s1")) == {}
+
+    def test_non_member_forbidden(self, api_client, board):
+        resp = api_client.post("/api/startups/s2/tasks/bulk", json={"operations": [{"op": "delete", "task_id": "other"}]})
+        assert resp.status_code == 403